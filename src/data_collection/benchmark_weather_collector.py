@@ -0,0 +1,125 @@
+import sys
+import os
+import io
+import time
+import contextlib
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_collection.mock_kma_api_server import MockKMAServer
+from data_collection.collect_weather_data_from_api import collect_daily_with_thread_pool
+from data_collection.collect_weather_data_async import run_async_collection
+from data_collection.rate_limiter import AdaptiveRateLimiter
+
+OBS = "ta,hm,td,ws_10m,rn_60m,sd_3hr"
+# 광진구 500m 격자 중심점 수 (500m_grid_centroids.csv 가 없을 때 사용)
+DEFAULT_CENTROID_COUNT = 94
+GWANGJIN_BOUNDS = (127.05, 37.52, 127.12, 37.57)
+
+
+def load_base_centroids(coords_csv="500m_grid_centroids.csv"):
+    if os.path.exists(coords_csv):
+        return pd.read_csv(coords_csv)[["lon", "lat"]]
+    minx, miny, maxx, maxy = GWANGJIN_BOUNDS
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "lon": rng.uniform(minx, maxx, DEFAULT_CENTROID_COUNT),
+        "lat": rng.uniform(miny, maxy, DEFAULT_CENTROID_COUNT),
+    })
+
+
+def scale_centroids(df_coords, factor):
+    """
+    중심점 목록을 factor 배로 늘립니다. 복제본은 서로 다른 좌표가 되도록 약 1m 씩 어긋나게 둡니다.
+    """
+    if factor == 1:
+        return df_coords.reset_index(drop=True)
+    offsets = np.repeat(np.arange(factor), len(df_coords)) * 1e-5
+    return pd.DataFrame({
+        "lon": np.tile(df_coords["lon"].to_numpy(), factor) + offsets,
+        "lat": np.tile(df_coords["lat"].to_numpy(), factor),
+    }).round(7)
+
+
+def summarize_run(collector, factor, n_coords, results, wall_time, server_stats=None):
+    # server_stats 는 모의 서버에서만 있음 (실제 API 로 측정하면 HTTP 요청 수 / 429 / 5xx 는 NaN)
+    elapsed = np.array([r["elapsed"] for r in results if "elapsed" in r])
+    n_success = sum(r["status"] == "success" for r in results)
+    server_stats = server_stats or {"requests": np.nan, "throttled": np.nan, "server_error": np.nan}
+    return {
+        "collector": collector,
+        "scale": f"{factor}x",
+        "coords": n_coords,
+        "results": len(results),
+        "success": n_success,
+        "http_requests": server_stats["requests"],
+        "throttled": server_stats["throttled"],
+        "server_error": server_stats["server_error"],
+        "wall_time_s": round(wall_time, 3),
+        "results_per_s": round(len(results) / wall_time, 1),
+        "http_req_per_s": round(server_stats["requests"] / wall_time, 1),
+        "p50_ms": round(np.percentile(elapsed, 50) * 1000, 1) if len(elapsed) else np.nan,
+        "p95_ms": round(np.percentile(elapsed, 95) * 1000, 1) if len(elapsed) else np.nan,
+        "p99_ms": round(np.percentile(elapsed, 99) * 1000, 1) if len(elapsed) else np.nan,
+    }
+
+
+def run_collector(collector, df_coords, date_list, api_url, max_workers, max_window_days=1, limiter=None,
+                  authKey="benchmark", obs=OBS, itv="60", help_param="0"):
+    if collector == "thread_pool_per_day":
+        results = []
+        for date_str in date_list:
+            results.extend(collect_daily_with_thread_pool(
+                df_coords, date_str, api_url, authKey, obs, itv, help_param, max_workers, limiter
+            ))
+        return results
+    return run_async_collection(df_coords, date_list, api_url, authKey, obs, itv, help_param,
+                                max_concurrency=max_workers, max_window_days=max_window_days, limiter=limiter)
+
+
+def run_benchmark(scales=(1, 10, 100), date_list=("20230101",), max_workers=10,
+                  collectors=("thread_pool_per_day", "asyncio_shared_session"),
+                  latency=0.05, jitter=0.02, error_rate=0.0, throttle_rps=None, coords_csv="500m_grid_centroids.csv",
+                  max_window_days=1, limiter_rate=None, api_url=None, df_coords=None,
+                  authKey="benchmark", obs=OBS, itv="60", help_param="0"):
+    """
+    로컬 모의 KMA 서버를 띄워 중심점 수를 scales 배로 늘려 가며 수집기별 처리량과 지연 시간을 측정합니다.
+    지연 시간(p50/p95/p99)은 재시도를 포함해 (좌표, 날짜) 결과 하나를 얻는 데 걸린 시간입니다.
+    api_url 을 주면 모의 서버 대신 그 주소(실제 API)로, df_coords 를 주면 coords_csv 대신 그 좌표로 측정합니다.
+    max_window_days 는 비동기 수집기의 날짜 창 길이(기본 1: 두 수집기의 요청 수가 같음),
+    limiter_rate 를 주면 수집기마다 같은 초기 속도의 제한기를 새로 만들어 씁니다.
+    """
+    base = df_coords if df_coords is not None else load_base_centroids(coords_csv)
+    rows = []
+    with contextlib.ExitStack() as stack:
+        server = None
+        if api_url is None:
+            server = stack.enter_context(MockKMAServer(latency=latency, jitter=jitter, error_rate=error_rate,
+                                                       throttle_rps=throttle_rps))
+            api_url = server.url("sfc_nc_var.php")
+        for factor in scales:
+            coords = scale_centroids(base, factor)
+            for collector in collectors:
+                if server is not None:
+                    server.reset_stats()
+                limiter = AdaptiveRateLimiter(rate=limiter_rate) if limiter_rate is not None else None
+                start = time.perf_counter()
+                # 수집기의 요청별 print 출력은 측정에서 제외
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results = run_collector(collector, coords, list(date_list), api_url, max_workers,
+                                            max_window_days, limiter, authKey, obs, itv, help_param)
+                wall_time = time.perf_counter() - start
+                stats = dict(server.stats) if server is not None else None
+                rows.append(summarize_run(collector, factor, len(coords), results, wall_time, stats))
+                print(f"{collector} {factor}x 완료: {wall_time:.1f}초")
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    # 현재 중심점 수의 1배 / 10배 / 100배, 하루치 요청 기준
+    summary = run_benchmark(scales=(1, 10, 100), date_list=("20230101",), max_workers=10,
+                            latency=0.05, jitter=0.02, error_rate=0.01)
+    print(summary.to_string(index=False))
+    summary.to_csv("benchmark_weather_collector.csv", index=False)
@@ -1,3 +1,5 @@
+import sys
+import os
 import pandas as pd
 import requests
 import pandas as pd
@@ -7,6 +9,10 @@ import koreanize_matplotlib
 import matplotlib.pyplot as plt
 import contextily as ctx
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_collection.rate_limiter import AdaptiveRateLimiter, classify_status
+
 # 1. 광진구 노선 ID 리스트 불러오기
 df = pd.read_excel("./data/광진구_근접기반_정류소_노선정보.xlsx")
 route_ids = sorted(set(df["ROUTE_ID"]))
@@ -14,9 +20,12 @@ route_ids = sorted(set(df["ROUTE_ID"]))
 # 2. API 설정
 SERVICE_KEY = "MyAPIKey"
 BASE_URL = "http://ws.bus.go.kr/api/rest/busRouteInfo/getRoutePath"
+REQUEST_TIMEOUT = 10  # 초
 
 # 3. 결과 저장 리스트
 lines = []
+# 노선별 연속 호출 속도 제한 (429/5xx/timeout 이 늘면 속도를 줄이고, 오류가 몰리면 잠시 중단)
+limiter = AdaptiveRateLimiter(rate=5)
 
 # 4. API 호출 및 LineString 생성
 for route_id in route_ids:
@@ -25,10 +34,23 @@ for route_id in route_ids:
         "busRouteId": str(route_id),
         "resultType": "json"
     }
+    # 요청 단계의 모든 결과(응답 / 시간 초과 / 연결 오류)를 제한기에 기록해야 half_open 시험 요청이 풀림
+    try:
+        limiter.acquire()
+        response = requests.get(BASE_URL, params=params, timeout=REQUEST_TIMEOUT)
+    except requests.exceptions.Timeout:
+        limiter.record("timeout")
+        print(f"[{route_id}] 요청 시간 초과")
+        continue
+    except Exception as e:
+        limiter.record("error")
+        print(f"[{route_id}] 요청 중 오류 발생: {e}")
+        continue
+    limiter.record(classify_status(response.status_code))
+    if response.status_code != 200:
+        continue
+
     try:
-        response = requests.get(BASE_URL, params=params)
-        if response.status_code != 200:
-            continue
         print(response.text)
         data = response.json()
         points = data["ServiceResult"]["msgBody"]["itemList"]
@@ -42,6 +64,8 @@ for route_id in route_ids:
         print(f"[{route_id}] 처리 중 오류 발생: {e}")
         continue
 
+print(f"요청 제한기 상태: {limiter.metrics()}")
+
 # 5. GeoDataFrame 생성 및 좌표계 변환 (for contextily)
 gdf = gpd.GeoDataFrame(lines, crs="EPSG:4326").to_crs(epsg=3857)
 
@@ -0,0 +1,327 @@
+import sys
+import os
+import asyncio
+import time
+import aiohttp
+import pandas as pd
+from tqdm import tqdm
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_collection.collect_weather_data_from_api import (
+    is_valid_response,
+    generate_date_range,
+    plan_window_jobs,
+    split_response_by_day,
+)
+from data_collection.weather_response_cache import (
+    load_manifest,
+    record_result,
+    save_run_config,
+    load_run_config,
+    split_pending_jobs,
+    iter_cached_results,
+)
+from data_collection.weather_parquet_store import WeatherParquetSink
+from data_collection.rate_limiter import AdaptiveRateLimiter, classify_status
+
+
+async def fetch_api_data_by_coord_async(session, lon, lat, date_str, api_url, authKey, obs, itv, help_param,
+                                        timeout=30, max_retries=5, backoff_factor=1.5, end_date_str=None, limiter=None):
+    """
+    fetch_api_data_by_coord 와 동일한 재시도 / #START7777 검증 규칙을 공유 세션(keep-alive) 위에서 수행합니다.
+    limiter 를 주면 고정 backoff 대기 대신 공유 토큰 버킷이 요청 간격을 조절합니다.
+    """
+    tm1 = f"{date_str}0000"
+    tm2 = f"{end_date_str or date_str}2300"
+
+    params = {
+        "tm1": tm1,
+        "tm2": tm2,
+        "lon": lon,
+        "lat": lat,
+        "obs": obs,
+        "itv": itv,
+        "help": help_param,
+        "authKey": authKey
+    }
+    request_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    # elapsed: 재시도와 대기를 포함해 이 결과를 얻는 데 걸린 시간(초)
+    started = time.perf_counter()
+    for attempt in range(1, max_retries + 1):
+        # dispatched: 제한기에서 요청을 받아 나갔지만 아직 결과를 record 하지 않은 상태
+        dispatched = False
+        try:
+            if limiter is not None:
+                await limiter.acquire_async()
+                dispatched = True
+            async with session.get(api_url, params=params, timeout=request_timeout) as response:
+                response_text = await response.text()
+                if limiter is not None:
+                    dispatched = False
+                    limiter.record(classify_status(response.status))
+                if response.status == 200:
+                    if is_valid_response(response_text):
+                        return {"lon": lon, "lat": lat, "date": date_str, "response": response_text, "status": "success",
+                            "elapsed": time.perf_counter() - started}
+                    result = f"Insufficient data: {response_text[:50]}..."
+                else:
+                    result = f"Error: {response.status}"
+        except asyncio.TimeoutError:
+            result = f"Timeout (attempt {attempt}/{max_retries})"
+            if limiter is not None:
+                dispatched = False
+                limiter.record("timeout")
+        except Exception as e:
+            result = f"Exception: {str(e)}"
+            if limiter is not None:
+                dispatched = False
+                limiter.record("error")
+        finally:
+            # CancelledError 처럼 위에서 잡히지 않고 빠져나가면 half_open 시험 요청이 묶이지 않도록 풀어 줌
+            if dispatched:
+                limiter.release()
+
+        if limiter is not None:
+            continue
+        wait_time = backoff_factor ** attempt
+        print(f"재시도 대기 중 ({wait_time:.1f}초): {lon}, {lat}, {date_str}")
+        await asyncio.sleep(wait_time)
+
+    return {"lon": lon, "lat": lat, "date": date_str, "response": result, "status": "failed",
+            "elapsed": time.perf_counter() - started}
+
+
+def build_weather_jobs(df_coords, date_list):
+    return [(str(lon), str(lat), date_str)
+            for date_str in date_list
+            for lon, lat in zip(df_coords["lon"], df_coords["lat"])]
+
+
+def dedupe_coords_by_kma_cell(df_coords):
+    """
+    kma_cell 이 붙은 중심점 목록(map_centroids_to_kma_grid 결과)을 KMA 격자 셀 단위로 줄입니다.
+    반환값: (셀 중심 lon/lat 좌표 DataFrame, {(셀 lon, 셀 lat): [(중심점 lon, 중심점 lat), ...]})
+    """
+    members = {}
+    for cell_lon, cell_lat, lon, lat in zip(df_coords["kma_lon"], df_coords["kma_lat"], df_coords["lon"], df_coords["lat"]):
+        members.setdefault((str(cell_lon), str(cell_lat)), []).append((str(lon), str(lat)))
+    cells = df_coords.drop_duplicates("kma_cell")
+    return pd.DataFrame({"lon": cells["kma_lon"].to_numpy(), "lat": cells["kma_lat"].to_numpy()}), members
+
+
+def fan_out_result(result, members):
+    # 셀 단위 결과를 그 셀에 속한 모든 중심점 좌표로 복제
+    if members is None:
+        return [result]
+    return [dict(result, lon=lon, lat=lat) for lon, lat in members[(result["lon"], result["lat"])]]
+
+
+async def collect_weather_async(day_jobs, api_url, authKey, obs, itv, help_param,
+                                max_concurrency=10, on_result=None, max_window_days=31, window_retries=2,
+                                limiter=None):
+    """
+    모든 (lon, lat, date) 요청을 좌표별 날짜 창으로 묶어 하나의 작업 큐에 넣고,
+    max_concurrency 개의 워커가 날짜 경계 없이 처리합니다. 결과는 항상 날짜 단위 result 로 나뉘어 전달됩니다.
+    여러 날짜 창이 실패하면 반으로 나눠 다시 큐에 넣고, 이후 창의 최대 길이도 그만큼 줄입니다.
+    on_result 가 주어지면 결과를 모으지 않고 완료되는 즉시 콜백으로 넘깁니다.
+    limiter 를 주면 모든 워커의 요청이 하나의 토큰 버킷을 거치고, 진행 표시줄에 현재 속도/차단기 상태를 표시합니다.
+    """
+    jobs = asyncio.Queue()
+    for job in plan_window_jobs(day_jobs, max_window_days):
+        jobs.put_nowait(job)
+
+    results = []
+    window_limit = {"days": max_window_days}
+    progress = tqdm(total=len(day_jobs), desc="weather")
+    connector = aiohttp.TCPConnector(limit=max_concurrency, keepalive_timeout=60, ttl_dns_cache=300)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        def emit(day_results):
+            for result in day_results:
+                if on_result is None:
+                    results.append(result)
+                else:
+                    on_result(result)
+            progress.update(len(day_results))
+            if limiter is not None:
+                metrics = limiter.metrics()
+                progress.set_postfix(rate=metrics["rate"], breaker=metrics["breaker_state"], refresh=False)
+
+        async def process(lon, lat, dates):
+            # 앞선 실패로 줄어든 창 길이에 맞춰 다시 나눔
+            if len(dates) > window_limit["days"]:
+                for i in range(window_limit["days"], len(dates), window_limit["days"]):
+                    jobs.put_nowait((lon, lat, dates[i:i + window_limit["days"]]))
+                dates = dates[:window_limit["days"]]
+
+            if len(dates) == 1:
+                result = await fetch_api_data_by_coord_async(
+                    session, lon, lat, dates[0], api_url, authKey, obs, itv, help_param, limiter=limiter
+                )
+                emit([result])
+                return
+
+            result = await fetch_api_data_by_coord_async(
+                session, lon, lat, dates[0], api_url, authKey, obs, itv, help_param,
+                max_retries=window_retries, end_date_str=dates[-1], limiter=limiter
+            )
+            if result["status"] == "success":
+                emit(split_response_by_day(result, dates))
+            else:
+                mid = len(dates) // 2
+                window_limit["days"] = max(1, min(window_limit["days"], mid))
+                jobs.put_nowait((lon, lat, dates[:mid]))
+                jobs.put_nowait((lon, lat, dates[mid:]))
+
+        errors = []
+        failed = asyncio.Event()
+
+        async def worker():
+            # 창이 실패하면 작업이 다시 큐에 들어오므로, 큐가 잠깐 비어도 종료하지 않고 join 까지 대기
+            while True:
+                lon, lat, dates = await jobs.get()
+                try:
+                    await process(lon, lat, dates)
+                except Exception as e:
+                    # on_result(저장 등)에서 난 예외는 워커를 조용히 죽이지 않고 모아 두었다가 다시 발생시킴
+                    errors.append(e)
+                    failed.set()
+                finally:
+                    jobs.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(max_concurrency)]
+        waiters = [asyncio.create_task(jobs.join()), asyncio.create_task(failed.wait())]
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in workers + waiters:
+                task.cancel()
+            await asyncio.gather(*workers, *waiters, return_exceptions=True)
+            progress.close()
+
+    if errors:
+        raise errors[0]
+    return results
+
+
+def run_async_collection(df_coords, date_list, api_url, authKey, obs, itv, help_param,
+                         max_concurrency=10, on_result=None, max_window_days=31, limiter=None):
+    return asyncio.run(collect_weather_async(
+        build_weather_jobs(df_coords, date_list), api_url, authKey, obs, itv, help_param,
+        max_concurrency=max_concurrency, on_result=on_result, max_window_days=max_window_days, limiter=limiter
+    ))
+
+
+def run_cached_collection(cache_dir, coords_csv, start_date, end_date, api_url, authKey, obs, itv, help_param,
+                          max_concurrency=10, on_result=None, max_window_days=31, limiter=None):
+    """
+    응답 캐시를 거쳐 수집합니다. 실행 조건을 run.json 에 남기고, 이미 성공한 키는 건너뛰며
+    실패했거나 아직 수집되지 않은 키만 다시 요청합니다. 결과는 캐시에서 순서대로 읽어 반환하는 제너레이터입니다.
+    on_result 가 주어지면 캐시에 있던 결과를 먼저 흘려보낸 뒤, 새 결과는 완료되는 즉시 넘깁니다.
+    (캐시 결과는 매 실행마다 다시 넘어가므로 on_result 쪽에서 키 중복을 걸러야 함, WeatherParquetSink 는 자동으로 건너뜀)
+    """
+    save_run_config(cache_dir, {
+        "coords_csv": coords_csv, "start_date": start_date, "end_date": end_date,
+        "api_url": api_url, "obs": obs, "itv": itv, "help": help_param,
+    })
+    df_coords = pd.read_csv(coords_csv)
+    members = None
+    if "kma_cell" in df_coords.columns:
+        n_centroids = len(df_coords)
+        df_coords, members = dedupe_coords_by_kma_cell(df_coords)
+        print(f"중심점 {n_centroids}개 → KMA 격자 셀 {len(df_coords)}개 기준으로 요청")
+    jobs = build_weather_jobs(df_coords, generate_date_range(start_date, end_date))
+
+    manifest = load_manifest(cache_dir)
+    pending, completed = split_pending_jobs(cache_dir, jobs, manifest, obs, itv)
+    print(f"전체 {len(jobs)}건 중 캐시 사용 {len(completed)}건, 신규/재시도 요청 {len(pending)}건")
+
+    if on_result is not None:
+        for result in iter_cached_results(cache_dir, completed, manifest, obs, itv):
+            for fanned in fan_out_result(result, members):
+                on_result(fanned)
+
+    def record(result):
+        entry = record_result(cache_dir, result, obs, itv)
+        manifest[entry["key"]] = entry
+        if on_result is not None:
+            for fanned in fan_out_result(result, members):
+                on_result(fanned)
+
+    if pending:
+        asyncio.run(collect_weather_async(
+            pending, api_url, authKey, obs, itv, help_param,
+            max_concurrency=max_concurrency, on_result=record, max_window_days=max_window_days, limiter=limiter
+        ))
+    return (fanned
+            for result in iter_cached_results(cache_dir, jobs, manifest, obs, itv)
+            for fanned in fan_out_result(result, members))
+
+
+def resume_collection(cache_dir, authKey, max_concurrency=10, on_result=None, max_window_days=31, limiter=None):
+    """
+    run.json 에 기록된 조건 그대로 중단된 수집을 이어서 실행합니다. (인증키는 파일에 남기지 않음)
+    """
+    config = load_run_config(cache_dir)
+    return run_cached_collection(
+        cache_dir, config["coords_csv"], config["start_date"], config["end_date"],
+        config["api_url"], authKey, config["obs"], config["itv"], config["help"],
+        max_concurrency=max_concurrency, on_result=on_result, max_window_days=max_window_days, limiter=limiter
+    )
+
+
+def compare_throughput(df_coords, date_list, api_url, authKey, obs, itv, help_param, max_workers=10,
+                       max_window_days=31, limiter_rate=None):
+    """
+    기존 날짜별 ThreadPoolExecutor 루프와 비동기 수집기의 처리량을 같은 조건(실제 API, 1배 규모)에서 비교합니다.
+    측정은 benchmark_weather_collector.run_benchmark 한 곳에서만 하며, 여기서는 속도 향상 배율만 덧붙여 출력합니다.
+    """
+    # benchmark_weather_collector 가 이 모듈을 import 하므로 순환 import 를 피해 여기서 import
+    from data_collection.benchmark_weather_collector import run_benchmark
+
+    summary = run_benchmark(scales=(1,), date_list=tuple(date_list), max_workers=max_workers,
+                            max_window_days=max_window_days, limiter_rate=limiter_rate, api_url=api_url,
+                            df_coords=df_coords, authKey=authKey, obs=obs, itv=itv, help_param=help_param)
+    print(summary[["collector", "results", "wall_time_s", "results_per_s"]].to_string(index=False))
+    wall = summary.set_index("collector")["wall_time_s"]
+    print(f"속도 향상: {wall['thread_pool_per_day'] / wall['asyncio_shared_session']:.2f}배")
+    return summary
+
+
+def main():
+    api_url = "https://apihub.kma.go.kr/api/typ01/url/sfc_nc_var.php"
+    authKey = "myauthKey"
+    obs = "ta,hm,td,ws_10m,rn_60m,sd_3hr"
+    itv = "60"
+    help_param = "0"
+
+    # 2023년 1월 데이터만 예시 (weather_cache 에 원본 응답을 남겨 중단 시 이어서 수집)
+    # map_centroids_to_kma_grid.py 결과가 있으면 KMA 격자 셀마다 한 번만 요청하고 중심점으로 다시 펼침
+    coords_csv = "500m_grid_centroids_kma.csv" if os.path.exists("500m_grid_centroids_kma.csv") else "500m_grid_centroids.csv"
+    # 응답은 완료되는 즉시 파싱되어 월별 Parquet 파티션에 row group 단위로 추가됨
+    max_concurrency = 10
+    # 모든 워커가 공유하는 요청 속도 제한기 (429/5xx/timeout 이 늘면 속도를 줄이고, 오류가 몰리면 잠시 전체 중단)
+    limiter = AdaptiveRateLimiter(rate=max_concurrency)
+    dataset_dir = "weather_parquet"
+    failed = []
+    with WeatherParquetSink(dataset_dir) as sink:
+        def on_result(result):
+            if result["status"] != "success":
+                failed.append((result["lon"], result["lat"], result["date"]))
+            sink.write(result)
+
+        run_cached_collection(
+            "weather_cache", coords_csv, "20230101", "20230131",
+            api_url, authKey, obs, itv, help_param, max_concurrency, on_result=on_result, limiter=limiter
+        )
+
+    print("\n모든 날짜의 데이터 수집이 완료되었습니다.")
+    print(f"파싱 결과 {sink.rows_written}행이 '{dataset_dir}'에 저장되었습니다. "
+          f"(이미 저장된 결과 {sink.skipped}건 건너뜀, 실패 {len(failed)}건)")
+    print(f"요청 제한기 상태: {limiter.metrics()}")
+
+
+if __name__ == '__main__':
+    main()
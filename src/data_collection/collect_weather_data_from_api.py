@@ -6,10 +6,29 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 import csv
 import os
+import sys
 
-def fetch_api_data_by_coord(lon, lat, date_str, api_url, authKey, obs, itv, help_param, timeout=30, max_retries=5, backoff_factor=1.5):
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_collection.weather_response_cache import (
+    load_manifest,
+    record_result,
+    split_pending_jobs,
+    iter_cached_results,
+)
+from data_collection.rate_limiter import AdaptiveRateLimiter, classify_status
+
+def is_valid_response(response_text):
+    if "#START7777" in response_text and "#7777END" in response_text:
+        return True
+    return len(response_text.strip().split("\n")) > 1
+
+def fetch_api_data_by_coord(lon, lat, date_str, api_url, authKey, obs, itv, help_param, timeout=30, max_retries=5, backoff_factor=1.5,
+                            end_date_str=None, limiter=None):
+    # end_date_str 를 주면 date_str 00시 ~ end_date_str 23시 구간을 한 번에 요청
+    # limiter(AdaptiveRateLimiter) 를 주면 고정 backoff 대기 대신 공유 토큰 버킷이 요청 간격을 조절
     tm1 = f"{date_str}0000"
-    tm2 = f"{date_str}2300"
+    tm2 = f"{end_date_str or date_str}2300"
 
     params = {
         "tm1": tm1,
@@ -22,30 +41,43 @@ def fetch_api_data_by_coord(lon, lat, date_str, api_url, authKey, obs, itv, help
         "authKey": authKey
     }
 
+    # elapsed: 재시도와 대기를 포함해 이 결과를 얻는 데 걸린 시간(초)
+    started = time.perf_counter()
     for attempt in range(1, max_retries + 1):
         try:
             print(f"호출 시도 ({attempt}/{max_retries}): {lon}, {lat}, {date_str}")
+            if limiter is not None:
+                limiter.acquire()
             response = requests.get(api_url, params=params, timeout=timeout)
+            if limiter is not None:
+                limiter.record(classify_status(response.status_code))
             if response.status_code == 200:
                 response_text = response.text
-                if "#START7777" in response_text and "#7777END" in response_text:
-                    return {"lon": lon, "lat": lat, "date": date_str, "response": response_text, "status": "success"}
-                elif len(response_text.strip().split("\n")) > 1:
-                    return {"lon": lon, "lat": lat, "date": date_str, "response": response_text, "status": "success"}
+                if is_valid_response(response_text):
+                    return {"lon": lon, "lat": lat, "date": date_str, "response": response_text, "status": "success",
+                            "elapsed": time.perf_counter() - started}
                 else:
                     result = f"Insufficient data: {response_text[:50]}..."
             else:
                 result = f"Error: {response.status_code}"
         except requests.exceptions.Timeout:
             result = f"Timeout (attempt {attempt}/{max_retries})"
+            if limiter is not None:
+                limiter.record("timeout")
         except Exception as e:
             result = f"Exception: {str(e)}"
+            if limiter is not None:
+                limiter.record("error")
 
+        if limiter is not None:
+            # 다음 시도는 limiter.acquire() 에서 줄어든 속도 / 차단기 상태에 맞춰 대기
+            continue
         wait_time = backoff_factor ** attempt
         print(f"재시도 대기 중 ({wait_time:.1f}초): {lon}, {lat}, {date_str}")
         time.sleep(wait_time)
 
-    return {"lon": lon, "lat": lat, "date": date_str, "response": result, "status": "failed"}
+    return {"lon": lon, "lat": lat, "date": date_str, "response": result, "status": "failed",
+            "elapsed": time.perf_counter() - started}
 
 def generate_date_range(start_date_str, end_date_str):
     start = datetime.strptime(start_date_str, "%Y%m%d")
@@ -59,50 +91,127 @@ def parse_api_response(response_text):
         return response_text[start_idx:end_idx].strip()
     return response_text.strip()
 
-def main():
-    df_coords = pd.read_csv("500m_grid_centroids.csv")
-    print(f"총 {len(df_coords)} 개의 좌표 로드 완료")
+def plan_date_windows(date_list, max_window_days=31):
+    """
+    날짜 목록을 연속 구간별로 묶고, 각 구간을 max_window_days 일 이하의 요청 창(window)으로 자릅니다.
+    """
+    windows = []
+    current = []
+    prev = None
+    for date_str in sorted(date_list):
+        day = datetime.strptime(date_str, "%Y%m%d")
+        if current and (day - prev != timedelta(days=1) or len(current) >= max_window_days):
+            windows.append(current)
+            current = []
+        current.append(date_str)
+        prev = day
+    if current:
+        windows.append(current)
+    return windows
 
-    api_url = "https://apihub.kma.go.kr/api/typ01/url/sfc_nc_var.php"
-    authKey = "myauthKey"
-    obs = "ta,hm,td,ws_10m,rn_60m,sd_3hr"
-    itv = "60"
-    help_param = "0"
+def split_response_by_day(result, dates):
+    """
+    여러 날짜를 한 번에 받은 응답을 날짜별 result 로 나눕니다. (# 헤더 줄은 날짜마다 그대로 붙임)
+    응답에 빠진 날짜는 failed 로 돌려 다음 실행에서 하루 단위로 다시 요청되게 합니다.
+    """
+    header, by_day = [], {}
+    for line in parse_api_response(result["response"]).split("\n"):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped[:8].isdigit():
+            by_day.setdefault(stripped[:8], []).append(stripped)
+        else:
+            header.append(stripped)
 
-    # 2023년 1월 데이터만 예시
-    date_list = generate_date_range("20230101", "20230131")
-    max_workers = 10
-    all_results = []
-
-    for date_str in date_list:
-        print(f"\n==== {date_str} 데이터 요청 시작 ====")
-        results = []
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_coord = {
-                executor.submit(
-                    fetch_api_data_by_coord,
-                    str(row["lon"]), str(row["lat"]),
-                    date_str,
-                    api_url, authKey, obs, itv, help_param
-                ): (row["lon"], row["lat"]) for _, row in df_coords.iterrows()
-            }
-
-            for future in tqdm(as_completed(future_to_coord), total=len(future_to_coord), desc=f"{date_str}"):
-                result = future.result()
-                results.append(result)
-
-        daily_df = pd.DataFrame(results)
-        daily_df.to_csv(f"api_results_{date_str}.csv", index=False)
-        all_results.extend(results)
-        print(f"{date_str} 결과 저장 완료")
-
-    final_df = pd.DataFrame(all_results)
-    final_df.to_csv("api_results_by_coordinates.csv", index=False)
+    day_results = []
+    for date_str in dates:
+        lines = by_day.get(date_str)
+        if lines:
+            response_text = "\n".join(["#START7777"] + header + lines + ["#7777END"])
+            day_results.append({"lon": result["lon"], "lat": result["lat"], "date": date_str, "response": response_text, "status": "success"})
+        else:
+            day_results.append({"lon": result["lon"], "lat": result["lat"], "date": date_str, "response": "Missing in window response", "status": "failed"})
+    return day_results
 
-    print("\n모든 날짜의 데이터 수집이 완료되었습니다.")
+def fetch_api_data_by_window(lon, lat, dates, api_url, authKey, obs, itv, help_param, window_retries=2, limiter=None):
+    """
+    dates 구간을 한 번에 요청하고 날짜별로 나눕니다. 실패하면 창을 반으로 나눠 다시 시도하며,
+    하루 단위까지 내려가면 기존 fetch_api_data_by_coord 의 재시도 규칙을 그대로 따릅니다.
+    """
+    if len(dates) == 1:
+        return [fetch_api_data_by_coord(lon, lat, dates[0], api_url, authKey, obs, itv, help_param, limiter=limiter)]
+
+    result = fetch_api_data_by_coord(lon, lat, dates[0], api_url, authKey, obs, itv, help_param,
+                                     max_retries=window_retries, end_date_str=dates[-1], limiter=limiter)
+    if result["status"] == "success":
+        return split_response_by_day(result, dates)
+
+    mid = len(dates) // 2
+    return (fetch_api_data_by_window(lon, lat, dates[:mid], api_url, authKey, obs, itv, help_param, window_retries, limiter)
+            + fetch_api_data_by_window(lon, lat, dates[mid:], api_url, authKey, obs, itv, help_param, window_retries, limiter))
+
+def plan_window_jobs(day_jobs, max_window_days=31):
+    """
+    (lon, lat, date) 작업을 좌표별로 모아 연속된 날짜를 하나의 요청 창으로 묶습니다.
+    """
+    dates_by_coord = {}
+    for lon, lat, date_str in day_jobs:
+        dates_by_coord.setdefault((lon, lat), []).append(date_str)
+    return [(lon, lat, tuple(window))
+            for (lon, lat), dates in dates_by_coord.items()
+            for window in plan_date_windows(dates, max_window_days)]
+
+def collect_windows_with_thread_pool(day_jobs, api_url, authKey, obs, itv, help_param, max_workers=10, limiter=None,
+                                     max_window_days=31, on_result=None):
+    # (lon, lat, date) 작업을 좌표별 날짜 창으로 묶어 창 하나를 한 번에 요청 (결과는 날짜 단위 result)
+    # on_result 가 주어지면 결과를 모으지 않고 창이 끝날 때마다 날짜별로 넘김
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(fetch_api_data_by_window, lon, lat, list(dates), api_url, authKey, obs, itv, help_param,
+                            limiter=limiter)
+            for lon, lat, dates in plan_window_jobs(day_jobs, max_window_days)
+        ]
+
+        progress = tqdm(total=len(day_jobs), desc="weather")
+        for future in as_completed(futures):
+            day_results = future.result()
+            for result in day_results:
+                if on_result is None:
+                    results.append(result)
+                else:
+                    on_result(result)
+            progress.update(len(day_results))
+            if limiter is not None:
+                metrics = limiter.metrics()
+                progress.set_postfix(rate=metrics["rate"], breaker=metrics["breaker_state"], refresh=False)
+        progress.close()
+    return results
+
+def collect_daily_with_thread_pool(df_coords, date_str, api_url, authKey, obs, itv, help_param, max_workers=10, limiter=None):
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_coord = {
+            executor.submit(
+                fetch_api_data_by_coord,
+                str(row["lon"]), str(row["lat"]),
+                date_str,
+                api_url, authKey, obs, itv, help_param,
+                limiter=limiter
+            ): (row["lon"], row["lat"]) for _, row in df_coords.iterrows()
+        }
 
-    # 추가: 파싱하여 하나의 통합 파일로 저장
-    output_parsed_file = "parsed_weather_data_all_days.csv"
+        progress = tqdm(as_completed(future_to_coord), total=len(future_to_coord), desc=f"{date_str}")
+        for future in progress:
+            result = future.result()
+            results.append(result)
+            if limiter is not None:
+                metrics = limiter.metrics()
+                progress.set_postfix(rate=metrics["rate"], breaker=metrics["breaker_state"])
+    return results
+
+def write_parsed_results(all_results, output_parsed_file):
     with open(output_parsed_file, "w", newline="") as csvfile:
         fieldnames = ["lon", "lat", "date", "timestamp", "ta", "hm", "td", "ws_10m", "rn_60m", "sd_3hr"]
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
@@ -130,7 +239,57 @@ def main():
                         "sd_3hr": parts[6]
                     })
 
-    print(f"\n통합된 파싱 결과가 '{output_parsed_file}'에 저장되었습니다.")
+def main():
+    # weather_parquet_store 가 이 모듈의 parse_api_response 를 가져다 쓰므로 순환 import 를 피해 여기서 import
+    from data_collection.weather_parquet_store import WeatherParquetSink
+
+    df_coords = pd.read_csv("500m_grid_centroids.csv")
+    print(f"총 {len(df_coords)} 개의 좌표 로드 완료")
+
+    api_url = "https://apihub.kma.go.kr/api/typ01/url/sfc_nc_var.php"
+    authKey = "myauthKey"
+    obs = "ta,hm,td,ws_10m,rn_60m,sd_3hr"
+    itv = "60"
+    help_param = "0"
+
+    # 2023년 1월 데이터만 예시
+    date_list = generate_date_range("20230101", "20230131")
+    max_workers = 10
+    # 모든 워커가 공유하는 요청 속도 제한기 (429/5xx/timeout 이 늘면 속도를 줄이고, 오류가 몰리면 잠시 전체 중단)
+    limiter = AdaptiveRateLimiter(rate=max_workers)
+
+    # 원본 응답 캐시: 재실행 시 이미 성공한 (좌표, 날짜)는 건너뛰고 실패/미수집 건만 다시 요청
+    cache_dir = "weather_cache"
+    manifest = load_manifest(cache_dir)
+
+    # 좌표별로 연속된 날짜를 최대 31일 창으로 묶어 요청하고, 응답은 날짜별로 나눠 캐시에 기록
+    jobs = [(str(lon), str(lat), date_str) for date_str in date_list for lon, lat in zip(df_coords["lon"], df_coords["lat"])]
+    pending, completed = split_pending_jobs(cache_dir, jobs, manifest, obs, itv)
+    print(f"전체 {len(jobs)}건 중 캐시 사용 {len(completed)}건, 신규/재시도 요청 {len(pending)}건")
+
+    def record(result):
+        entry = record_result(cache_dir, result, obs, itv)
+        manifest[entry["key"]] = entry
+
+    if pending:
+        collect_windows_with_thread_pool(pending, api_url, authKey, obs, itv, help_param, max_workers, limiter,
+                                         on_result=record)
+
+    # 하루치 결과만 메모리에 두고, 파싱 결과는 월별 Parquet 파티션에 바로 덧붙임
+    dataset_dir = "weather_parquet"
+    with WeatherParquetSink(dataset_dir) as sink:
+        n_coords = len(df_coords)
+        for i, date_str in enumerate(date_list):
+            day_jobs = jobs[i * n_coords:(i + 1) * n_coords]
+            results = list(iter_cached_results(cache_dir, day_jobs, manifest, obs, itv))
+            pd.DataFrame(results).to_csv(f"api_results_{date_str}.csv", index=False)
+            for result in results:
+                sink.write(result)
+            print(f"{date_str} 결과 저장 완료")
+
+    print("\n모든 날짜의 데이터 수집이 완료되었습니다.")
+    print(f"요청 제한기 상태: {limiter.metrics()}")
+    print(f"\n파싱 결과 {sink.rows_written}행이 '{dataset_dir}'에 저장되었습니다. (이미 저장된 결과 {sink.skipped}건 건너뜀)")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,192 @@
+import time
+import random
+import zlib
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+def _station_noise(*keys):
+    # 같은 (좌표, 시각) 요청에는 항상 같은 값을 돌려주도록 요청 값으로 난수 시드를 고정
+    return random.Random(zlib.crc32("|".join(str(k) for k in keys).encode("utf-8")))
+
+
+def iter_hours(tm1, tm2, step_minutes=60):
+    start = datetime.strptime(tm1, "%Y%m%d%H%M")
+    end = datetime.strptime(tm2, "%Y%m%d%H%M")
+    current = start
+    while current <= end:
+        yield current
+        current += timedelta(minutes=step_minutes)
+
+
+def render_sfc_nc_var(params):
+    """
+    sfc_nc_var.php 형식 응답 (#START7777 ~ #7777END, 시각 + obs 순서의 쉼표 구분 값)
+    """
+    lon, lat = params.get("lon", "0"), params.get("lat", "0")
+    obs = params.get("obs", "ta,hm,td,ws_10m,rn_60m,sd_3hr").split(",")
+    itv = int(params.get("itv", "60"))
+    lines = ["#START7777", f"# TM, {', '.join(obs)}"]
+    for t in iter_hours(params["tm1"], params["tm2"], itv):
+        rng = _station_noise(lon, lat, t.strftime("%Y%m%d%H"))
+        ta = round(-3 + 6 * rng.random() - 4 * (t.hour < 7), 1)
+        values = {
+            "ta": ta,
+            "hm": round(40 + 55 * rng.random(), 1),
+            "td": round(ta - 2 - 6 * rng.random(), 1),
+            "ws_10m": round(5 * rng.random(), 1),
+            "rn_60m": round(max(0.0, 3 * rng.random() - 2.5), 1),
+            "sd_3hr": round(max(0.0, 2 * rng.random() - 1.8), 1),
+        }
+        lines.append(",".join([t.strftime("%Y%m%d%H%M")] + [str(values.get(name, 0.0)) for name in obs]))
+    lines.append("#7777END")
+    return "\n".join(lines) + "\n"
+
+
+def render_kma_sfctm5(params):
+    """
+    kma_sfctm5.php 형식 응답 (TM, STN, ... , VAL - 노트북 파서가 6번째 컬럼을 VAL 로 읽음)
+    """
+    stn = params.get("stn", "108")
+    obs = params.get("obs", "TS")
+    lines = ["#START7777", "# TM, STN, OBS, QC, CNT, VAL"]
+    for t in iter_hours(params["tm1"], params["tm2"], int(params.get("itv", "60"))):
+        rng = _station_noise(stn, obs, t.strftime("%Y%m%d%H"))
+        lines.append(f"{t.strftime('%Y%m%d%H%M')},{stn},{obs},0,1,{round(-4 + 7 * rng.random(), 1)}")
+    lines.append("#7777END")
+    return "\n".join(lines) + "\n"
+
+
+ENDPOINTS = {
+    "sfc_nc_var.php": render_sfc_nc_var,
+    "kma_sfctm5.php": render_kma_sfctm5,
+}
+
+
+class MockKMAServer:
+    """
+    apihub.kma.go.kr 대신 로컬에서 띄우는 테스트용 API 서버입니다. (HTTP/1.1 keep-alive)
+    latency(초) + jitter 만큼 지연한 뒤 응답하고, error_rate 확률로 500 을,
+    최근 1초 동안 요청이 throttle_rps 를 넘으면 429 를 돌려줍니다.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.05, jitter=0.0, error_rate=0.0,
+                 throttle_rps=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rps = throttle_rps
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent = deque()
+        self.stats = {"requests": 0, "ok": 0, "throttled": 0, "server_error": 0, "not_found": 0}
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/api/typ01/url"
+
+    def url(self, endpoint="sfc_nc_var.php"):
+        return f"{self.base_url}/{endpoint}"
+
+    def reset_stats(self):
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0
+            self._recent.clear()
+
+    def _decide(self):
+        # 반환값: (상태 코드, 지연 시간)
+        with self._lock:
+            now = time.monotonic()
+            self.stats["requests"] += 1
+            self._recent.append(now)
+            while self._recent and now - self._recent[0] > 1.0:
+                self._recent.popleft()
+            delay = self.latency + self.jitter * self._rng.random()
+            if self.throttle_rps is not None and len(self._recent) > self.throttle_rps:
+                self.stats["throttled"] += 1
+                return 429, 0.0
+            if self._rng.random() < self.error_rate:
+                self.stats["server_error"] += 1
+                return 500, delay
+            return 200, delay
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, code, body):
+                payload = body.encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "text/plain; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                render = ENDPOINTS.get(parsed.path.rsplit("/", 1)[-1])
+                if render is None:
+                    with server._lock:
+                        server.stats["not_found"] += 1
+                    self._send(404, "Not Found")
+                    return
+
+                code, delay = server._decide()
+                if delay > 0:
+                    time.sleep(delay)
+                if code == 429:
+                    self._send(429, "Too Many Requests")
+                elif code == 500:
+                    self._send(500, "Internal Server Error")
+                else:
+                    params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                    try:
+                        body = render(params)
+                    except (KeyError, ValueError) as e:
+                        self._send(400, f"Bad Request: {e}")
+                        return
+                    with server._lock:
+                        server.stats["ok"] += 1
+                    self._send(200, body)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+if __name__ == '__main__':
+    with MockKMAServer(latency=0.05, error_rate=0.02, throttle_rps=200, port=8765) as server:
+        print(f"모의 KMA API 서버 실행 중: {server.url('sfc_nc_var.php')} , {server.url('kma_sfctm5.php')}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print(f"요청 통계: {server.stats}")
@@ -0,0 +1,172 @@
+import time
+import asyncio
+import threading
+from collections import deque
+
+
+def classify_status(status_code):
+    """
+    HTTP 상태 코드를 제한기에 넘길 결과 종류로 바꿉니다. (ok / throttled / server_error / error)
+    """
+    if status_code == 200:
+        return "ok"
+    if status_code == 429:
+        return "throttled"
+    if status_code >= 500:
+        return "server_error"
+    return "error"
+
+
+class CircuitBreaker:
+    """
+    최근 window 건의 실패 비율이 error_threshold 이상이면 cooldown 초 동안 모든 요청을 멈춥니다(open).
+    cooldown 이 지나면 요청 하나만 시험 삼아 보내고(half_open), 성공하면 다시 열어 둡니다(closed).
+    """
+
+    def __init__(self, window=50, error_threshold=0.5, min_samples=10, cooldown=30.0):
+        self.window = window
+        self.error_threshold = error_threshold
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.open_count = 0
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def error_rate(self):
+        if not self._outcomes:
+            return 0.0
+        return 1.0 - sum(self._outcomes) / len(self._outcomes)
+
+    def _open(self, now):
+        self.state = "open"
+        self.open_count += 1
+        self._opened_at = now
+        self._probe_in_flight = False
+
+    def wait_time(self, now):
+        # 호출자가 lock 을 잡은 상태에서 사용. 0 이면 요청을 보내도 됨
+        if self.state == "open":
+            remaining = self._opened_at + self.cooldown - now
+            if remaining > 0:
+                return remaining
+            self.state = "half_open"
+        if self.state == "half_open" and self._probe_in_flight:
+            return min(1.0, self.cooldown)
+        return 0.0
+
+    def on_dispatch(self):
+        # half_open 상태에서는 시험 요청 하나만 내보냄
+        if self.state == "half_open":
+            self._probe_in_flight = True
+
+    def release(self):
+        # 결과 없이 끝난 요청(취소 등): 실패로 세지 않고 시험 요청 자리만 비움
+        self._probe_in_flight = False
+
+    def record(self, ok, now):
+        if self.state == "half_open":
+            if ok:
+                self.state = "closed"
+                self._outcomes.clear()
+                self._probe_in_flight = False
+            else:
+                self._open(now)
+            return
+        self._outcomes.append(ok)
+        if (self.state == "closed" and len(self._outcomes) >= self.min_samples
+                and self.error_rate >= self.error_threshold):
+            self._open(now)
+
+
+class AdaptiveRateLimiter:
+    """
+    모든 워커가 공유하는 토큰 버킷입니다. 성공하면 초당 요청 수를 increase 만큼 올리고,
+    429/5xx/timeout 이 관측되면 decrease 배로 줄입니다(AIMD). 스레드와 asyncio 양쪽에서 사용할 수 있습니다.
+    """
+
+    THROTTLE_SIGNALS = ("throttled", "server_error", "timeout")
+
+    def __init__(self, rate=5.0, min_rate=0.5, max_rate=50.0, burst=None, increase=0.5, decrease=0.5,
+                 breaker=None):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self._tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        self._counts = {"ok": 0, "throttled": 0, "server_error": 0, "timeout": 0, "error": 0}
+        self._waited = 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = self.breaker.wait_time(now)
+            if wait > 0:
+                return wait
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.breaker.on_dispatch()
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            wait = self._reserve()
+            if wait <= 0:
+                return
+            self._waited += wait
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        while True:
+            wait = self._reserve()
+            if wait <= 0:
+                return
+            self._waited += wait
+            await asyncio.sleep(wait)
+
+    def record(self, outcome):
+        with self._lock:
+            now = time.monotonic()
+            self._counts[outcome] += 1
+            if outcome == "ok":
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            elif outcome in self.THROTTLE_SIGNALS:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                # 이미 쌓인 토큰으로 한꺼번에 몰려가지 않도록 버킷을 비움
+                self._tokens = min(self._tokens, 0.0)
+            self.breaker.record(outcome == "ok", now)
+
+    def release(self):
+        """
+        acquire 후 결과를 record 하지 못하고 끝난 요청(작업 취소 등)을 정리합니다.
+        속도와 실패 통계는 그대로 두고, half_open 시험 요청이었다면 다음 요청이 나갈 수 있게 합니다.
+        """
+        with self._lock:
+            self.breaker.release()
+
+    def metrics(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rate": round(self.rate, 3),
+                "tokens": round(self._tokens, 3),
+                "requests": sum(self._counts.values()),
+                **self._counts,
+                "waited_seconds": round(self._waited, 3),
+                "breaker_state": self.breaker.state,
+                "breaker_open_count": self.breaker.open_count,
+                "recent_error_rate": round(self.breaker.error_rate, 3),
+            }
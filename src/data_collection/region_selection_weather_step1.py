@@ -1,17 +1,22 @@
+import sys
+import os
 import pandas as pd
 import geopandas as gpd
 from shapely.geometry import Point
 import koreanize_matplotlib  # 한글 폰트 사용 (설치되어 있다면)
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.weather_cube import load_gid_coords
+
 # --- 1. 데이터 로딩 ---
 # (1) 결빙 건수 데이터 (컬럼: gid, total_count)
 freezing_df = pd.read_csv('기후 격자별 결빙 건수 값.csv')
 
-# (2) 전체 기상 데이터 (컬럼: gid, lon, lat 등)
-weather_df = pd.read_csv('전체_기상_데이터.csv')
-# gid별 첫 번째 행의 좌표를 추출하여 gid→(lon, lat) 매핑 생성 (중복 제거)
-coord_df = weather_df.groupby('gid').first().reset_index()[['gid', 'lon', 'lat']]
+# (2) gid→(lon, lat) 매핑 (컬럼: gid, lon, lat)
+# 기상 큐브(weather_cube.py)가 있으면 좌표 파일만 읽고, 없으면 전체 기상 CSV 에서 세 컬럼만 읽어 gid별 첫 좌표 사용
+coord_df = load_gid_coords('weather_cube' if os.path.isdir('weather_cube') else '전체_기상_데이터.csv')
 
 # (3) 500m 격자 중심점 데이터 (컬럼: grid_x, grid_y 등; gid 없음)
 centroids_df = pd.read_csv('500m_grid_centroids.csv')
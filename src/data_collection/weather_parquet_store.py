@@ -0,0 +1,132 @@
+import sys
+import os
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_collection.collect_weather_data_from_api import parse_api_response
+
+WEATHER_COLUMNS = ["ta", "hm", "td", "ws_10m", "rn_60m", "sd_3hr"]
+
+WEATHER_SCHEMA = pa.schema(
+    [("lon", pa.float64()), ("lat", pa.float64()), ("date", pa.string()), ("timestamp", pa.int64())]
+    + [(col, pa.float32()) for col in WEATHER_COLUMNS]
+    + [("month", pa.string())]
+)
+
+
+def parse_response_lines(lons, lats, dates, lines):
+    """
+    응답 본문 줄 목록을 한 번에 쪼개고 숫자 컬럼을 벡터 연산으로 변환합니다.
+    parse_api_response 결과 중 7개 이상으로 나뉘는 줄만 사용하며, 시각이 숫자가 아닌 헤더 줄은 버립니다.
+    """
+    if not lines:
+        return pd.DataFrame(columns=WEATHER_SCHEMA.names)
+
+    parts = pd.Series(lines, dtype=object).str.split(",", expand=True)
+    if parts.shape[1] < 7:
+        return pd.DataFrame(columns=WEATHER_SCHEMA.names)
+
+    timestamp = parts[0].str.strip()
+    keep = (parts[6].notna() & timestamp.str.fullmatch(r"\d+")).to_numpy()
+    parts = parts[keep]
+
+    df = pd.DataFrame({
+        "lon": np.asarray(lons, dtype=np.float64)[keep],
+        "lat": np.asarray(lats, dtype=np.float64)[keep],
+        "date": np.asarray(dates, dtype=object)[keep],
+        "timestamp": timestamp[keep].astype(np.int64).to_numpy(),
+    })
+    for i, col in enumerate(WEATHER_COLUMNS, start=1):
+        df[col] = pd.to_numeric(parts[i].str.strip(), errors="coerce").astype(np.float32).to_numpy()
+    df["month"] = df["date"].str[:6]
+    return df
+
+
+def result_key(lon, lat, date_str):
+    # 좌표는 캐시 키(make_cache_key)와 같은 자릿수로 정규화
+    return f"{float(lon):.7f}", f"{float(lat):.7f}", str(date_str)
+
+
+def load_written_keys(dataset_dir):
+    """
+    데이터셋에 이미 들어 있는 (lon, lat, date) 키 집합. 재실행 / 이어받기에서 같은 날짜를 두 번 쓰지 않기 위해 사용합니다.
+    """
+    if not os.path.isdir(dataset_dir) or not any(os.scandir(dataset_dir)):
+        return set()
+    df = pd.read_parquet(dataset_dir, columns=["lon", "lat", "date"]).drop_duplicates()
+    return {result_key(lon, lat, date) for lon, lat, date in zip(df["lon"], df["lat"], df["date"])}
+
+
+class WeatherParquetSink:
+    """
+    수집 결과를 완료되는 즉시 받아 row_group_rows 줄마다 월(month) 파티션 Parquet 데이터셋에 덧붙입니다.
+    원본 응답 문자열은 row group 하나 분량만 메모리에 머무릅니다.
+    데이터셋에 이미 있는 (lon, lat, date) 결과는 건너뛰므로 캐시 결과를 다시 흘려보내도 행이 중복되지 않습니다.
+    """
+
+    def __init__(self, dataset_dir, row_group_rows=200_000):
+        self.dataset_dir = dataset_dir
+        self.row_group_rows = row_group_rows
+        self.rows_written = 0
+        self.skipped = 0
+        self._written_keys = load_written_keys(dataset_dir)
+        self._run_id = uuid.uuid4().hex[:8]
+        self._part = 0
+        self._reset_buffer()
+
+    def _reset_buffer(self):
+        self._lons, self._lats, self._dates, self._lines = [], [], [], []
+
+    def write(self, result):
+        if result["status"] != "success":
+            return
+        key = result_key(result["lon"], result["lat"], result["date"])
+        if key in self._written_keys:
+            self.skipped += 1
+            return
+        self._written_keys.add(key)
+        lines = [line for line in parse_api_response(result["response"]).split("\n") if line.strip()]
+        n = len(lines)
+        self._lons.extend([result["lon"]] * n)
+        self._lats.extend([result["lat"]] * n)
+        self._dates.extend([result["date"]] * n)
+        self._lines.extend(lines)
+        if len(self._lines) >= self.row_group_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._lines:
+            return
+        df = parse_response_lines(self._lons, self._lats, self._dates, self._lines)
+        self._reset_buffer()
+        if df.empty:
+            return
+        table = pa.Table.from_pandas(df, schema=WEATHER_SCHEMA, preserve_index=False)
+        pq.write_to_dataset(
+            table, self.dataset_dir, partition_cols=["month"],
+            basename_template=f"part-{self._run_id}-{self._part:05d}-{{i}}.parquet"
+        )
+        self._part += 1
+        self.rows_written += len(df)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_weather_dataset(dataset_dir, months=None, columns=None):
+    """
+    월 파티션 Parquet 데이터셋을 읽습니다. months 를 주면 해당 파티션 디렉터리만 읽습니다.
+    """
+    filters = [("month", "in", [str(m) for m in months])] if months is not None else None
+    return pd.read_parquet(dataset_dir, columns=columns, filters=filters)
@@ -0,0 +1,121 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+
+# 여러 워커 스레드가 동시에 manifest 에 한 줄씩 덧붙이므로 쓰기 구간만 잠금
+_manifest_lock = threading.Lock()
+
+
+def make_cache_key(lon, lat, date_str, obs, itv):
+    """
+    (lon, lat, date, obs, itv) 요청 식별자를 정규화한 뒤 sha256 으로 해시한 캐시 키를 만듭니다.
+    """
+    ident = f"{float(lon):.7f}|{float(lat):.7f}|{date_str}|{obs}|{itv}"
+    return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+
+
+def cache_path(cache_dir, key):
+    # 한 디렉터리에 파일이 몰리지 않도록 키 앞 2글자로 분산
+    return os.path.join(cache_dir, "responses", key[:2], f"{key}.txt.gz")
+
+
+def load_cached_response(cache_dir, key):
+    path = cache_path(cache_dir, key)
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return f.read()
+
+
+def store_response(cache_dir, key, response_text):
+    path = cache_path(cache_dir, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # 임시 파일에 쓴 뒤 교체하여 중간에 죽어도 깨진 캐시 파일이 남지 않게 함
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        f.write(response_text)
+    os.replace(tmp_path, path)
+
+
+def append_manifest(cache_dir, entry):
+    os.makedirs(cache_dir, exist_ok=True)
+    line = json.dumps(entry, ensure_ascii=False)
+    with _manifest_lock:
+        with open(os.path.join(cache_dir, "manifest.jsonl"), "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def load_manifest(cache_dir):
+    """
+    manifest.jsonl 을 읽어 키별 마지막 상태를 반환합니다. (비정상 종료로 잘린 마지막 줄은 무시)
+    """
+    manifest = {}
+    path = os.path.join(cache_dir, "manifest.jsonl")
+    if not os.path.exists(path):
+        return manifest
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            manifest[entry["key"]] = entry
+    return manifest
+
+
+def save_run_config(cache_dir, config):
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, "run.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+
+def load_run_config(cache_dir):
+    with open(os.path.join(cache_dir, "run.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def record_result(cache_dir, result, obs, itv):
+    """
+    수집 결과 하나를 캐시에 반영합니다. 성공 응답은 압축 저장하고, 성공/실패 모두 manifest 에 기록합니다.
+    """
+    key = make_cache_key(result["lon"], result["lat"], result["date"], obs, itv)
+    entry = {"key": key, "lon": result["lon"], "lat": result["lat"], "date": result["date"], "status": result["status"]}
+    if result["status"] == "success":
+        store_response(cache_dir, key, result["response"])
+    else:
+        entry["error"] = result["response"]
+    append_manifest(cache_dir, entry)
+    return entry
+
+
+def split_pending_jobs(cache_dir, jobs, manifest, obs, itv):
+    """
+    (lon, lat, date) 작업 목록을 이미 성공한 작업과 다시 요청해야 할 작업(미수집 + 실패)으로 나눕니다.
+    """
+    pending, completed = [], []
+    for lon, lat, date_str in jobs:
+        key = make_cache_key(lon, lat, date_str, obs, itv)
+        entry = manifest.get(key)
+        if entry is not None and entry["status"] == "success" and os.path.exists(cache_path(cache_dir, key)):
+            completed.append((lon, lat, date_str))
+        else:
+            pending.append((lon, lat, date_str))
+    return pending, completed
+
+
+def iter_cached_results(cache_dir, jobs, manifest, obs, itv):
+    """
+    작업 목록 순서대로 캐시된 응답을 result dict 형태로 돌려줍니다. 끝내 실패한 키는 failed 로 반환합니다.
+    """
+    for lon, lat, date_str in jobs:
+        key = make_cache_key(lon, lat, date_str, obs, itv)
+        entry = manifest.get(key)
+        if entry is not None and entry["status"] == "success":
+            response_text = load_cached_response(cache_dir, key)
+            if response_text is not None:
+                yield {"lon": lon, "lat": lat, "date": date_str, "response": response_text, "status": "success"}
+                continue
+        error = entry.get("error", "Not collected") if entry is not None else "Not collected"
+        yield {"lon": lon, "lat": lat, "date": date_str, "response": error, "status": "failed"}
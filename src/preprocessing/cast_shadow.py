@@ -0,0 +1,324 @@
+import sys
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.solar_shade import daylight_sun_positions, WINTER_START, WINTER_END
+
+N_SECTORS = 32
+LINE_BATCH = 1024
+
+# horizon_dir/
+#   horizon.npy  float32 (방위 구간, 행, 열) - 구간 방향의 지평선 고도각(라디안), 가린 것이 없으면 -π/2
+#   meta.json    방위각 목록, 해상도, 원본 파일
+HORIZON_FILE = "horizon.npy"
+META_FILE = "meta.json"
+
+
+########################################
+# 1. 한 방위의 지평선 고도각 (선 단위 볼록 껍질 sweep, Dozier 방식)
+########################################
+def _orient(dsm, azimuth_deg, origin=(0, 0)):
+    """
+    방위 방향이 '열 증가(+col)' 가 되도록 배열을 전치 / 뒤집고, 열 한 칸당 행 변화량 m(|m| <= 1) 을 구합니다.
+    origin=(행, 열) 은 배열 첫 칸의 래스터 안 위치(타일이면 타일 시작점)이며, 변환된 열 0 의 절대 좌표 a 를 함께 돌려줍니다.
+    반환: (변환된 배열, m, 되돌리는 함수, a)
+    """
+    az = np.radians(azimuth_deg)
+    d_row, d_col = -np.cos(az), np.sin(az)   # 행은 남쪽, 열은 동쪽으로 증가
+    row0, col0 = origin
+    transpose = abs(d_row) > abs(d_col)
+    if transpose:
+        dsm = dsm.T
+        d_row, d_col = d_col, d_row
+        row0, col0 = col0, row0
+    flip_col = d_col < 0
+    if flip_col:
+        dsm = dsm[:, ::-1]
+        d_col = -d_col
+    m = d_row / d_col
+    # 뒤집은 경우 열 좌표를 -열 로 두어, 같은 픽셀은 어느 타일에서든 같은 선에 속하게 함
+    a = -(col0 + dsm.shape[1] - 1) if flip_col else col0
+
+    def restore(arr):
+        if flip_col:
+            arr = arr[:, ::-1]
+        return arr.T if transpose else arr
+    return dsm, m, restore, a
+
+
+def _ahead_max_slope(z, step):
+    """
+    선마다(행) 뒤쪽 열부터 거꾸로 훑으며 이미 지나온 점들의 위쪽 볼록 껍질을 stack 으로 유지하고,
+    각 점에서 앞쪽(열 증가 방향) 점들까지의 최대 기울기를 구합니다. 앞쪽 점이 없거나 NaN 이면 -inf.
+    (점마다 push / pop 이 한 번씩이므로 O(점 수), 선들은 한꺼번에 처리)
+    """
+    n, n_cols = z.shape
+    stack_x = np.empty((n, n_cols))
+    stack_z = np.empty((n, n_cols))
+    size = np.zeros(n, dtype=np.int64)
+    idx = np.arange(n)
+    best = np.full((n, n_cols), -np.inf)
+    for c in range(n_cols - 1, -1, -1):
+        zc = z[:, c]
+        sel = idx[~np.isnan(zc)]
+        if not len(sel):
+            continue
+        x = c * step
+
+        # 껍질 꼭대기 두 점 중 안쪽 점이 더 가파르게 보이지 않으면 꼭대기 점은 다시 쓰이지 않으므로 제거
+        active = sel[size[sel] >= 2]
+        while len(active):
+            za = zc[active]
+            top = size[active] - 1
+            slope_top = (stack_z[active, top] - za) / (stack_x[active, top] - x)
+            slope_second = (stack_z[active, top - 1] - za) / (stack_x[active, top - 1] - x)
+            pop = slope_top <= slope_second
+            size[active[pop]] -= 1
+            active = active[pop]
+            active = active[size[active] >= 2]
+
+        has = sel[size[sel] >= 1]
+        top = size[has] - 1
+        best[has, c] = (stack_z[has, top] - zc[has]) / (stack_x[has, top] - x)
+
+        stack_x[sel, size[sel]] = x
+        stack_z[sel, size[sel]] = zc[sel]
+        size[sel] += 1
+    return best
+
+
+def _prefix_max_slope(p, q, step):
+    """
+    p, q: (선, k) - 같은 선에서 k 칸짜리 구간과 바로 뒤 구간. p 의 t 번째 점에서 q 의 0 ~ t 번째 점까지의 최대 기울기.
+    t 가 커질수록 q 쪽 점이 먼 쪽 끝에 하나씩 붙으므로 위쪽 볼록 껍질을 stack 으로 늘려 가고,
+    p 에서 본 껍질 꼭짓점 기울기는 단봉형이라 이분 탐색으로 접점을 찾습니다. (점마다 O(log k))
+    """
+    n, k = p.shape
+    hull_x = np.empty((n, k))
+    hull_z = np.empty((n, k))
+    size = np.zeros(n, dtype=np.int64)
+    idx = np.arange(n)
+    best = np.full((n, k), -np.inf)
+    for t in range(k):
+        zq = q[:, t]
+        xq = (k + t) * step
+        sel = idx[~np.isnan(zq)]
+        active = sel[size[sel] >= 2]
+        while len(active):
+            top = size[active] - 1
+            slope_last = (hull_z[active, top] - hull_z[active, top - 1]) / (hull_x[active, top] - hull_x[active, top - 1])
+            slope_new = (zq[active] - hull_z[active, top]) / (xq - hull_x[active, top])
+            pop = slope_last <= slope_new
+            size[active[pop]] -= 1
+            active = active[pop]
+            active = active[size[active] >= 2]
+        hull_x[sel, size[sel]] = xq
+        hull_z[sel, size[sel]] = zq[sel]
+        size[sel] += 1
+
+        zp = p[:, t]
+        xp = t * step
+        sel = idx[~np.isnan(zp) & (size > 0)]
+        if not len(sel):
+            continue
+        lo = np.zeros(len(sel), dtype=np.int64)
+        hi = size[sel] - 1
+        searching = lo < hi
+        while searching.any():
+            s, l, h = sel[searching], lo[searching], hi[searching]
+            mid = (l + h) // 2
+            f_mid = (hull_z[s, mid] - zp[s]) / (hull_x[s, mid] - xp)
+            f_next = (hull_z[s, mid + 1] - zp[s]) / (hull_x[s, mid + 1] - xp)
+            up = f_mid < f_next
+            lo[searching] = np.where(up, mid + 1, l)
+            hi[searching] = np.where(up, h, mid)
+            searching = lo < hi
+        best[sel, t] = (hull_z[sel, lo] - zp[sel]) / (hull_x[sel, lo] - xp)
+    return best
+
+
+def window_max_slope(z, step, k=None):
+    """
+    선마다 각 점에서 앞쪽 k 칸(k=None 이면 끝까지) 안의 점들까지의 최대 기울기. 없으면 -inf.
+    선을 k 칸 구간으로 나누면 앞쪽 k 칸 = (자기 구간의 남은 칸) + (다음 구간의 앞 t + 1 칸) 이므로,
+    구간 안 볼록 껍질 sweep 과 다음 구간 접두 껍질 두 가지로 반경 제한 결과를 정확히 구합니다.
+    """
+    n, n_cols = z.shape
+    if k is None or k >= n_cols - 1:
+        return _ahead_max_slope(z, step)
+    if k <= 0:
+        return np.full((n, n_cols), -np.inf)
+    n_seg = -(-n_cols // k)
+    padded = np.full((n, n_seg * k), np.nan)
+    padded[:, :n_cols] = z
+    segments = padded.reshape(n, n_seg, k)
+
+    best = _ahead_max_slope(segments.reshape(n * n_seg, k), step).reshape(n, n_seg, k)
+    if n_seg > 1:
+        ahead = _prefix_max_slope(segments[:, :-1].reshape(-1, k), segments[:, 1:].reshape(-1, k), step)
+        best[:, :-1] = np.fmax(best[:, :-1], ahead.reshape(n, n_seg - 1, k))
+    return best.reshape(n, n_seg * k)[:, :n_cols]
+
+
+def horizon_angles(dsm, resolution, azimuth_deg, line_batch=LINE_BATCH, max_distance=None, origin=(0, 0)):
+    """
+    모든 픽셀에서 azimuth_deg 방향(북쪽 기준 시계 방향)으로 바라본 지평선 고도각(라디안)을 계산합니다.
+    픽셀 (r, c) 는 선 번호 r - round((c + a)·m) 의 평행선 하나에만 속하며, 선마다 위쪽 볼록 껍질 sweep 으로
+    각 점의 지평선을 구합니다. (방위 하나당 O(N), 선들은 묶음으로 한꺼번에 처리)
+    max_distance(m) 를 주면 선을 따라 그 거리 안의 점만 봅니다. (SVF 의 탐색 반경)
+    선은 래스터 절대 위치(origin) 기준으로 나누므로, 반경만큼 halo 를 둔 타일 결과가 전체 계산과 같습니다.
+    """
+    arr, m, restore, a = _orient(np.asarray(dsm, dtype=np.float64), azimuth_deg, origin)
+    n_rows, n_cols = arr.shape
+    step = resolution * np.sqrt(1.0 + m ** 2)
+    k = None if max_distance is None else int(np.floor(max_distance / step + 1e-9))
+    cols = np.arange(n_cols)
+    shift = np.rint((cols + a) * m).astype(np.int64)
+    line_min = -int(shift.max())
+    line_max = n_rows - 1 - int(shift.min())
+    horizon = np.full((n_rows, n_cols), -np.pi / 2)
+
+    for o0 in range(line_min, line_max + 1, line_batch):
+        lines = np.arange(o0, min(o0 + line_batch, line_max + 1))
+        rows = lines[:, None] + shift[None, :]
+        inside = (rows >= 0) & (rows < n_rows)
+        if not inside.any():
+            continue
+        line_cols = np.broadcast_to(cols, rows.shape)
+        z = np.full(rows.shape, np.nan)
+        z[inside] = arr[rows[inside], line_cols[inside]]
+
+        slope = window_max_slope(z, step, k)
+        has = inside & np.isfinite(slope)
+        horizon[rows[has], line_cols[has]] = np.arctan(slope[has])
+    return restore(horizon).astype(np.float32)
+
+
+########################################
+# 2. 방위 구간별 지평선 (구간 단위 병렬, memmap 에 바로 기록)
+########################################
+def sector_azimuths(n_sectors=N_SECTORS):
+    return np.arange(n_sectors) * (360.0 / n_sectors)
+
+
+def _sector_worker(args):
+    dsm_path, horizon_path, s, azimuth, resolution, line_batch = args
+    dsm = np.load(dsm_path, mmap_mode="r")
+    out = np.load(horizon_path, mmap_mode="r+")
+    out[s] = horizon_angles(dsm, resolution, azimuth, line_batch)
+    out.flush()
+    return s
+
+
+def build_horizon_stack(dsm, resolution, horizon_dir="horizon", n_sectors=N_SECTORS, workers=None,
+                        line_batch=LINE_BATCH, source=None):
+    """
+    n_sectors 개 방위의 지평선 고도각을 방위 구간별로 병렬 계산해 horizon_dir 에 저장합니다.
+    작업자는 DSM 을 memmap 으로 읽고 결과 memmap 의 자기 구간에만 쓰므로 큰 배열을 주고받지 않습니다.
+    """
+    os.makedirs(horizon_dir, exist_ok=True)
+    dsm_path = os.path.join(horizon_dir, "dsm.npy")
+    np.save(dsm_path, np.asarray(dsm, dtype=np.float32))
+    horizon_path = os.path.join(horizon_dir, HORIZON_FILE)
+    azimuths = sector_azimuths(n_sectors)
+    out = np.lib.format.open_memmap(horizon_path, mode="w+", dtype=np.float32,
+                                    shape=(n_sectors,) + np.shape(dsm))
+    del out
+
+    tasks = [(dsm_path, horizon_path, s, az, resolution, line_batch) for s, az in enumerate(azimuths)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for task in tasks:
+            _sector_worker(task)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, n_sectors)) as pool:
+            list(pool.map(_sector_worker, tasks))
+    os.remove(dsm_path)
+
+    with open(os.path.join(horizon_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({"azimuths": azimuths.tolist(), "resolution": resolution, "shape": list(np.shape(dsm)),
+                   "layout": ["sector", "row", "col"], "source": source}, f, ensure_ascii=False, indent=2)
+    return load_horizon_stack(horizon_dir)
+
+
+def load_horizon_stack(horizon_dir="horizon"):
+    # (지평선 memmap, 방위각 배열)
+    with open(os.path.join(horizon_dir, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    return np.load(os.path.join(horizon_dir, HORIZON_FILE), mmap_mode="r"), np.asarray(meta["azimuths"])
+
+
+########################################
+# 3. 태양 위치별 그림자 판정 (지평선과 비교 한 번)
+########################################
+def nearest_sector(azimuth_deg, azimuths):
+    width = 360.0 / len(azimuths)
+    return np.rint(np.asarray(azimuth_deg) / width).astype(np.int64) % len(azimuths)
+
+
+def shadow_mask(horizon, azimuths, altitude_deg, azimuth_deg):
+    # 태양 고도가 해당 방위의 지평선보다 낮으면 건물 / 지형 그림자
+    return np.radians(altitude_deg) < horizon[nearest_sector(azimuth_deg, azimuths)]
+
+
+def shadow_masks(horizon, azimuths, sun):
+    # 시각별 그림자 마스크를 차례로 돌려줌: (시각, (행, 열) bool)
+    for t, alt, az in zip(sun["time"], sun["altitude"], sun["azimuth"]):
+        yield t, shadow_mask(horizon, azimuths, alt, az)
+
+
+def shadow_hours(horizon, azimuths, sun):
+    """
+    기간 전체 그림자 시간 합계 (행, 열) int32.
+    같은 방위 구간의 시각들은 고도만 다르므로, 고도를 정렬해 두면 픽셀별 그림자 시간 = 지평선보다 낮은 고도 수
+    (searchsorted 한 번) 입니다. 비용이 시각 수가 아니라 방위 구간 수에 비례합니다.
+    """
+    sectors = nearest_sector(sun["azimuth"].to_numpy(), azimuths)
+    alts = np.radians(sun["altitude"].to_numpy())
+    total = np.zeros(horizon.shape[1:], dtype=np.int32)
+    for s in np.unique(sectors):
+        sorted_alts = np.sort(alts[sectors == s])
+        total += np.searchsorted(sorted_alts, np.asarray(horizon[s]), side="left").astype(np.int32)
+    return total
+
+
+if __name__ == '__main__':
+    import time
+    import rasterio
+    import geopandas as gpd
+    from pyproj import Transformer
+    from preprocessing.zonal_stats import load_label_raster, zonal_stats_array
+
+    # make_DSM.py 결과 (DEM + 건물 높이)
+    dsm_path = "DSM_output.tif"
+    with rasterio.open(dsm_path) as src:
+        dsm = src.read(1).astype(np.float32)
+        transform = src.transform
+        crs = src.crs
+        profile = src.profile.copy()
+        cx, cy = src.xy(src.height // 2, src.width // 2)
+    lon, lat = Transformer.from_crs(crs, "EPSG:4326", always_xy=True).transform(cx, cy)
+
+    start = time.perf_counter()
+    horizon, azimuths = build_horizon_stack(dsm, transform.a, "horizon", source=dsm_path)
+    print(f"지평선 고도각 계산 완료: 방위 {len(azimuths)}개 ({time.perf_counter() - start:.1f}초)")
+
+    sun = daylight_sun_positions(WINTER_START, WINTER_END, lat=lat, lon=lon)
+    hours = shadow_hours(horizon, azimuths, sun)
+    profile.update(driver="GTiff", dtype="int32", count=1, nodata=None, tiled=True,
+                   blockxsize=256, blockysize=256, compress="deflate")
+    with rasterio.open("DSM_shadow_hours.tif", "w", **profile) as dst:
+        dst.write(hours, 1)
+
+    grid = gpd.read_file("100m격자.shp")
+    if grid.crs != crs:
+        grid = grid.to_crs(crs)
+    labels = load_label_raster(grid, hours.shape, transform)
+    cell_stats = zonal_stats_array(hours, labels, len(grid), ("mean", "max", "min")).add_prefix("shadow_hours_")
+    grid.drop(columns="geometry").join(cell_stats).to_csv("격자별_겨울철_그림자시간.csv", index=False,
+                                                          encoding="utf-8-sig")
+    print(f"{WINTER_START} ~ {WINTER_END} 낮 시간 {len(sun)}개의 그림자 시간 저장 완료")
@@ -1,10 +1,15 @@
+import sys
+import os
 import netCDF4 as nc
 import numpy as np
 import geopandas as gpd
-from shapely.geometry import Point
 import koreanize_matplotlib
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.grid_hierarchy import dissolve_cells
+
 #############################
 # 1. 100m → 500m 격자 변환 및 중심점 추출
 #############################
@@ -23,8 +28,8 @@ gdf_100['centroid_y'] = gdf_100.geometry.centroid.y
 gdf_100['grid_x'] = (gdf_100['centroid_x'] // 500).astype(int)
 gdf_100['grid_y'] = (gdf_100['centroid_y'] // 500).astype(int)
 
-# (4) 동일한 500m 격자로 dissolve
-gdf_500 = gdf_100.dissolve(by=['grid_x', 'grid_y'])
+# (4) 동일한 500m 격자로 dissolve (꽉 찬 500m 격자는 경계 사각형 그대로, 경계에 걸친 격자만 셀 union)
+gdf_500 = dissolve_cells(gdf_100, by=['grid_x', 'grid_y'])
 
 # (5) 500m 폴리곤들의 중심점(centroid) 추출
 gdf_500_centers = gdf_500.copy()
@@ -59,12 +64,10 @@ mask = (
 indices = np.where(mask)
 print("관심 영역 내 API 격자 셀 개수:", len(indices[0]))
 
-# (3) API 격자 '점' 데이터 생성 (폴리곤 대신 중심점)
-points_api = []
-for i, j in zip(indices[0], indices[1]):
-    points_api.append(Point(lon_api[i, j], lat_api[i, j]))
-
-gdf_api_points = gpd.GeoDataFrame({'geometry': points_api}, crs="EPSG:4326")
+# (3) API 격자 '점' 데이터 생성 (폴리곤 대신 중심점, 마스크로 뽑은 좌표 배열에서 한 번에 생성)
+gdf_api_points = gpd.GeoDataFrame(
+    geometry=gpd.points_from_xy(np.asarray(lon_api)[mask], np.asarray(lat_api)[mask]), crs="EPSG:4326"
+)
 
 #############################
 # 3. 좌표계 맞추고 시각화 (점 vs. 점)
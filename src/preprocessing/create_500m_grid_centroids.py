@@ -1,7 +1,12 @@
+import sys
+import os
 import geopandas as gpd
-from shapely.geometry import box, Point
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.grid_hierarchy import parent_squares
+
 # 1. 100m 격자 shp 파일 읽기
 gdf_100m = gpd.read_file('100m.shp')
 
@@ -24,15 +29,18 @@ grid_df = gdf_100m[['grid_x', 'grid_y']].drop_duplicates().reset_index(drop=True
 grid_df['centroid_x'] = grid_df['grid_x'] + 250
 grid_df['centroid_y'] = grid_df['grid_y'] + 250
 
-# 6. 500m 셀의 폴리곤 생성 (왼쪽 하단에서 오른쪽 상단까지의 사각형)
-grid_df['geometry'] = grid_df.apply(lambda row: box(row['grid_x'], row['grid_y'], row['grid_x']+500, row['grid_y']+500), axis=1)
+# 6. 500m 셀의 폴리곤 생성 (왼쪽 하단에서 오른쪽 상단까지의 사각형, 격자 번호 = 좌표 // 500 으로 한 번에 생성)
+grid_df['geometry'] = parent_squares(grid_df['grid_x'] // 500, grid_df['grid_y'] // 500, 500)
 
 # 7. GeoDataFrame 생성 (기존 shp의 좌표계 유지)
 gdf_500m = gpd.GeoDataFrame(grid_df, geometry='geometry', crs=gdf_100m.crs)
 
-# 8. 중심점을 Point 객체로 저장하여 별도 GeoDataFrame 생성
-gdf_500m['centroid_point'] = gdf_500m.apply(lambda row: Point(row['centroid_x'], row['centroid_y']), axis=1)
-gdf_centroid = gpd.GeoDataFrame(gdf_500m[['grid_x', 'grid_y']], geometry=gdf_500m['centroid_point'], crs=gdf_500m.crs)
+# 8. 중심점 좌표 배열로 별도 GeoDataFrame 생성
+gdf_centroid = gpd.GeoDataFrame(
+    gdf_500m[['grid_x', 'grid_y']],
+    geometry=gpd.points_from_xy(gdf_500m['centroid_x'], gdf_500m['centroid_y']),
+    crs=gdf_500m.crs
+)
 
 # 9. 경위도 좌표(일반적으로 EPSG:4326)로 변환
 gdf_500m = gdf_500m.to_crs(epsg=4326)
@@ -0,0 +1,255 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.grid_code import load_grid, build_grid_from_gids, gid_to_key, cell_key, GRID_CRS
+
+# 보호구역(노인 / 어린이) 주소 좌표 (경도, 위도)
+PROTECTED_POINTS = [
+    (127.091743, 37.557558),
+    (127.100496, 37.541105),
+    (127.100646, 37.548106),
+    (127.098655, 37.553036),
+    (127.089106, 37.530348),
+    (127.088346, 37.564860),
+    (127.083542, 37.558158),
+    (127.104934, 37.548403),
+    (127.097621, 37.553968),
+    (127.082961, 37.564937),
+    (127.096317, 37.550054),
+    (127.071287, 37.530952),
+    (127.096383, 37.552830),
+    (127.097188, 37.550597),
+]
+
+# overlap_final.shp 컬럼 순서 (gpd.overlay(A60, 경사도) 결과와 같음)
+OVERLAP_COLUMNS = ["gid_500_1", "gid_500_2", "gid_100", "gid", "grid_x", "grid_y", "max", "geometry"]
+NOT_SELECTED = -1
+
+
+class CriteriaStack:
+    """
+    100m 격자 행 순서에 맞춘 기준 값 배열(band) 묶음입니다.
+    모든 기준이 같은 길이의 배열이라 선정 조건은 shp 공간 연산 없이 배열 비교 / 논리 연산으로 계산됩니다.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid.reset_index(drop=True)
+        self.keys = gid_to_key(self.grid["gid"])
+        self.gid_500 = self.grid["gid_500"].to_numpy(np.int64)
+        self._order = np.argsort(self.keys, kind="stable")
+        self.bands = {}
+
+    def __len__(self):
+        return len(self.grid)
+
+    def rows_of(self, keys):
+        # 셀 키 → 격자 행 번호 (격자에 없는 셀은 -1)
+        keys = np.asarray(keys, dtype=np.int64)
+        pos = np.searchsorted(self.keys[self._order], keys)
+        pos = np.minimum(pos, len(self.keys) - 1)
+        rows = self._order[pos]
+        return np.where(self.keys[rows] == keys, rows, NOT_SELECTED)
+
+    def align(self, keys, values, fill=np.nan, dtype=np.float64):
+        # 셀 키별 값을 격자 행 순서 배열로 (같은 셀이 여러 번 나오면 마지막 값)
+        band = np.full(len(self), fill, dtype=dtype)
+        rows = self.rows_of(keys)
+        found = rows >= 0
+        band[rows[found]] = np.asarray(values)[found]
+        return band
+
+    def broadcast_500(self, gid_500, values, fill=np.nan, dtype=np.float64):
+        # 500m 격자(gid_500) 값을 소속 100m 셀마다 펼침
+        table = np.full(int(self.gid_500.max()) + 1, fill, dtype=dtype)
+        gid_500 = np.asarray(gid_500, dtype=np.int64)
+        inside = (gid_500 >= 0) & (gid_500 < len(table))
+        table[gid_500[inside]] = np.asarray(values)[inside]
+        return table[self.gid_500]
+
+    def add_band(self, name, values):
+        values = np.asarray(values)
+        if len(values) != len(self):
+            raise ValueError(f"{name}: 길이 {len(values)} 가 격자 셀 수 {len(self)} 와 다릅니다.")
+        self.bands[name] = values
+        return values
+
+    def __getitem__(self, name):
+        return self.bands[name]
+
+    def to_frame(self):
+        return pd.concat([self.grid.drop(columns="geometry"), pd.DataFrame(self.bands)], axis=1)
+
+    def save(self, path):
+        # 임시 파일에 쓴 뒤 교체 (FreezingCountState.save 와 같은 방식)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, gids=self.grid["gid"].to_numpy(dtype=str), **{f"band_{k}": v for k, v in self.bands.items()})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            stack = cls(build_grid_from_gids(data["gids"]))
+            for name in data.files:
+                if name.startswith("band_"):
+                    stack.bands[name[len("band_"):]] = data[name]
+        return stack
+
+
+########################################
+# 1. 기준 값 읽기 (셀 키, 값)
+########################################
+def layer_cell_keys(gdf):
+    """
+    선정 결과 레이어의 셀 키. gid 컬럼이 있으면 gid 로, 없으면(filtered_pop 등) 셀 중심점 좌표로 구합니다.
+    """
+    if "gid" in gdf.columns:
+        return gid_to_key(gdf["gid"])
+    if gdf.crs is None:
+        gdf = gdf.set_crs(epsg=5181)
+    centroids = gdf.geometry.to_crs(GRID_CRS).centroid
+    return cell_key(np.floor(centroids.x.to_numpy()), np.floor(centroids.y.to_numpy()))
+
+
+def layer_rank(stack, gdf):
+    # 레이어 행 순서(= nlargest 선정 순서)를 격자 행에 기록, 레이어에 없는 셀은 -1
+    return stack.align(layer_cell_keys(gdf), np.arange(len(gdf)), fill=NOT_SELECTED, dtype=np.int64)
+
+
+def slope_band(stack, slope_csv_path):
+    df = pd.read_csv(slope_csv_path, encoding="cp949", usecols=["gid", "max"])
+    return stack.align(gid_to_key(df["gid"].astype(str)), df["max"].to_numpy())
+
+
+def population_band(stack, csv_paths):
+    # population_extraction.load_population_data 와 같은 기간 평균 A60
+    dfs = [pd.read_csv(path, encoding="cp949", usecols=["GID", "A60"]) for path in csv_paths]
+    df = pd.concat(dfs).groupby("GID", as_index=False).mean()
+    return stack.align(gid_to_key(df["GID"].astype(str)), df["A60"].to_numpy())
+
+
+def freeze_band(stack, freeze_csv_path, key="gid"):
+    # 기상 격자 결빙 건수(gid = gid_500) 를 100m 셀에 펼침
+    df = pd.read_csv(freeze_csv_path, usecols=[key, "total_count"])
+    return stack.broadcast_500(df[key].to_numpy(), df["total_count"].to_numpy())
+
+
+def access_band(stack, opt_csv_path):
+    # 응급의료 접근성 취약 셀(opt.csv) 이면 1
+    df = pd.read_csv(opt_csv_path)
+    df.columns = df.columns.str.lower()
+    return stack.align(gid_to_key(df["gid"].astype(str)), np.ones(len(df), dtype=np.int8), fill=0, dtype=np.int8)
+
+
+def protected_points_band(stack, points=PROTECTED_POINTS, crs="EPSG:4326"):
+    # 셀 안의 보호구역 주소 수
+    xy = gpd.GeoSeries(gpd.points_from_xy(*zip(*points)), crs=crs).to_crs(GRID_CRS)
+    rows = stack.rows_of(cell_key(np.floor(xy.x.to_numpy()), np.floor(xy.y.to_numpy())))
+    return np.bincount(rows[rows >= 0], minlength=len(stack)).astype(np.int32)
+
+
+########################################
+# 2. 배열 선정 연산
+########################################
+def top_rank(values, top_percent=0.5):
+    """
+    DataFrame.nlargest(int(셀 수 × top_percent)) 와 같은 선정을 순위 배열로 돌려줍니다. (같은 값은 앞 행 우선, 미선정 -1)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n_top = int(len(values) * top_percent)
+    valid = np.flatnonzero(~np.isnan(values))
+    order = valid[np.argsort(-values[valid], kind="stable")][:n_top]
+    rank = np.full(len(values), NOT_SELECTED, dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return rank
+
+
+def top_selected_500(stack, values, top_percent=0.5):
+    """
+    500m 격자 단위 상위 선정 (결빙 건수처럼 500m 격자마다 같은 값인 band). 선정된 500m 격자의 셀은 모두 True.
+    """
+    n_500 = int(stack.gid_500.max()) + 1
+    table = np.full(n_500, np.nan)
+    table[stack.gid_500] = np.asarray(values, dtype=np.float64)
+    return (top_rank(table, top_percent) >= 0)[stack.gid_500]
+
+
+def add_selection_bands(stack, top_percent=0.5):
+    # 값 band 로 기존 추출 스크립트와 같은 상위 선정 band(pop_rank, slope_rank, freeze_selected) 를 계산
+    if "a60" in stack.bands:
+        stack.add_band("pop_rank", top_rank(stack["a60"], top_percent))
+    if "max_slope" in stack.bands:
+        stack.add_band("slope_rank", top_rank(stack["max_slope"], top_percent))
+    if "freeze_count" in stack.bands:
+        stack.add_band("freeze_selected", top_selected_500(stack, stack["freeze_count"], top_percent))
+    return stack
+
+
+def any_in_500(stack, mask):
+    # 같은 500m 격자에 조건을 만족하는 셀이 하나라도 있으면 그 500m 격자의 모든 셀이 True
+    hit = np.bincount(stack.gid_500[np.asarray(mask, dtype=bool)], minlength=int(stack.gid_500.max()) + 1) > 0
+    return hit[stack.gid_500]
+
+
+def select_overlap_final(stack, pop_rank="pop_rank", access="access_opt", slope_rank="slope_rank",
+                         freeze_selected="freeze_selected"):
+    """
+    overlap_final 선정: (A60 상위 & 접근성 취약 셀이 있는 500m 격자) & (경사도 상위 & 결빙 상위 500m 격자).
+    반환: 선정 셀의 격자 행 번호 (A60 순위 순서, 기존 overlay 결과 행 순서와 같음)
+    """
+    pop = stack[pop_rank]
+    selected = (pop >= 0) & any_in_500(stack, stack[access]) & (stack[slope_rank] >= 0) & stack[freeze_selected].astype(bool)
+    rows = np.flatnonzero(selected)
+    return rows[np.argsort(pop[rows], kind="stable")]
+
+
+def overlap_final_frame(stack, rows, geometry=None, crs="EPSG:3857"):
+    """
+    선정 셀만 폴리곤으로 만들어 overlap_final.shp 와 같은 컬럼의 GeoDataFrame 을 돌려줍니다.
+    geometry 를 주지 않으면 격자 셀 폴리곤을 crs 로 변환해 사용합니다.
+    """
+    grid = stack.grid.iloc[rows]
+    if geometry is None:
+        geometry = grid.geometry.to_crs(crs).to_numpy()
+    return gpd.GeoDataFrame({
+        "gid_500_1": grid["gid_500"].astype(str).to_numpy(),
+        "gid_500_2": grid["gid_500"].to_numpy(np.int64),
+        "gid_100": grid["gid_100"].to_numpy(np.int64),
+        "gid": grid["gid"].to_numpy(),
+        "grid_x": grid["grid_x"].to_numpy(),
+        "grid_y": grid["grid_y"].to_numpy(),
+        "max": stack["max_slope"][rows],
+    }, geometry=list(geometry), crs=crs)[OVERLAP_COLUMNS]
+
+
+def layer_intersection(gdf_a, rank_a, gdf_b, rank_b, rows, crs="EPSG:3857"):
+    # 선정 셀에 대해서만 두 레이어의 원래 폴리곤을 교차 (overlay 결과와 같은 도형)
+    geom_a = gdf_a.to_crs(crs).geometry.to_numpy()[rank_a[rows]]
+    geom_b = gdf_b.to_crs(crs).geometry.to_numpy()[rank_b[rows]]
+    return shapely.intersection(geom_a, geom_b)
+
+
+def build_criteria_stack(grid_path, slope_csv_path=None, freeze_csv_path=None, opt_csv_path=None,
+                         pop_csv_paths=None, points=PROTECTED_POINTS):
+    """
+    100m 격자에 맞춘 기준 값 band 를 한 번에 만듭니다. 주어진 입력만 band 로 추가합니다.
+    band: max_slope, freeze_count, a60, access_opt, protected_points
+    """
+    stack = CriteriaStack(load_grid(grid_path))
+    if slope_csv_path is not None:
+        stack.add_band("max_slope", slope_band(stack, slope_csv_path))
+    if freeze_csv_path is not None:
+        stack.add_band("freeze_count", freeze_band(stack, freeze_csv_path))
+    if pop_csv_paths:
+        stack.add_band("a60", population_band(stack, pop_csv_paths))
+    if opt_csv_path is not None:
+        stack.add_band("access_opt", access_band(stack, opt_csv_path))
+    if points is not None:
+        stack.add_band("protected_points", protected_points_band(stack, points))
+    return stack
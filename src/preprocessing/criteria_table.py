@@ -0,0 +1,283 @@
+import sys
+import os
+import itertools
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.grid_code import gid_to_key
+from preprocessing.criteria_stack import build_criteria_stack
+
+TOP = "top"        # nlargest(int(n × p)) 선정 (인구 / 경사도 / 결빙)
+BOTTOM = "bottom"  # 오름차순 정렬 후 iloc[int(n × p):] 선정 (접근성 get_bottom_percent)
+# 원래 표에 없는 셀의 순위 (어떤 비율에서도 선정되지 않음)
+ABSENT = np.iinfo(np.int64).max
+
+
+########################################
+# 1. 기준별 순위 (한 번만 정렬)
+########################################
+def selection_rank(values, direction=TOP):
+    """
+    선정 순서대로 0, 1, 2, ... 순위를 매깁니다. 어떤 비율 p 든 '순위 < 선정 수(p)' 비교 한 번으로 선정됩니다.
+    TOP: 내림차순(같은 값은 앞 행 우선), NaN 은 원래 순서대로 맨 뒤 (nlargest 와 같음, 선정 수가 값 있는 행보다 많을 때만 NaN 행 선정)
+    BOTTOM: 오름차순(NaN 맨 뒤) 정렬의 뒤쪽부터 순위를 매겨, iloc[count:] 가 순위 < n - count 가 됨
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    nan = np.isnan(values)
+    valid = np.flatnonzero(~nan)
+    rank = np.empty(n, dtype=np.int64)
+    if direction == TOP:
+        order = np.concatenate([valid[np.argsort(-values[valid], kind="stable")], np.flatnonzero(nan)])
+    elif direction == BOTTOM:
+        ascending = np.concatenate([valid[np.argsort(values[valid], kind="stable")], np.flatnonzero(nan)])
+        order = ascending[::-1]
+    else:
+        raise ValueError(f"알 수 없는 선정 방향: {direction}")
+    rank[order] = np.arange(n)
+    return rank
+
+
+def selection_count(n, percent, direction=TOP):
+    # 비율 percent 에서 선정되는 순위 상한 (순위 < 반환값 이면 선정)
+    percent = np.asarray(percent, dtype=np.float64)
+    count = (n * percent).astype(np.int64)
+    return count if direction == TOP else n - count
+
+
+class CriteriaTable:
+    """
+    gid 별 기준 값과 선정 순위를 담은 표입니다.
+    기준마다 원래 파이프라인이 정렬하던 표(격자 / 500m 격자 / 시군구 영역)에서 순위를 한 번 구해 100m 셀에 펼쳐 두므로,
+    임계 비율 조합은 파일 읽기 / 병합 / overlay 없이 정수 비교로 바로 계산됩니다.
+    """
+
+    def __init__(self, gids, gid_500):
+        self.gids = np.asarray(gids, dtype=str)
+        self.gid_500 = np.asarray(gid_500, dtype=np.int64)
+        self.values = {}
+        self.ranks = {}
+        self.sizes = {}
+        self.directions = {}
+
+    @classmethod
+    def from_stack(cls, stack):
+        return cls(stack.grid["gid"].to_numpy(dtype=str), stack.gid_500)
+
+    def __len__(self):
+        return len(self.gids)
+
+    @property
+    def criteria(self):
+        return list(self.ranks)
+
+    def add_criterion(self, name, rank, size, direction=TOP, values=None):
+        # rank: 셀별 선정 순위 (원래 표에 없는 셀은 ABSENT), size: 원래 표의 행 수 (선정 수 = int(size × p) 기준)
+        rank = np.asarray(rank, dtype=np.int64)
+        if len(rank) != len(self):
+            raise ValueError(f"{name}: 길이 {len(rank)} 가 셀 수 {len(self)} 와 다릅니다.")
+        self.ranks[name] = rank
+        self.sizes[name] = int(size)
+        self.directions[name] = direction
+        self.values[name] = np.full(len(self), np.nan) if values is None else np.asarray(values, dtype=np.float64)
+        return rank
+
+    def limit(self, name, percent):
+        return selection_count(self.sizes[name], percent, self.directions[name])
+
+    def select(self, name, percent):
+        return self.ranks[name] < self.limit(name, percent)
+
+    def mask(self, **percents):
+        """
+        기준별 비율을 모두 만족하는 셀 (bool 배열). 예: table.mask(pop=0.5, slope=0.3, access=0.5)
+        지정하지 않은 기준은 조건에서 빠집니다.
+        """
+        selected = np.ones(len(self), dtype=bool)
+        for name, percent in percents.items():
+            selected &= self.select(name, percent)
+        return selected
+
+    def query(self, **percents):
+        # 선정 셀의 gid / gid_500 (셀 순서 그대로)
+        rows = np.flatnonzero(self.mask(**percents))
+        return pd.DataFrame({"gid": self.gids[rows], "gid_500": self.gid_500[rows]})
+
+    def to_frame(self):
+        df = pd.DataFrame({"gid": self.gids, "gid_500": self.gid_500})
+        for name in self.ranks:
+            df[name] = self.values[name]
+            df[f"{name}_rank"] = self.ranks[name]
+        return df
+
+    def save(self, path):
+        # 임시 파일에 쓴 뒤 교체 (CriteriaStack.save 와 같은 방식)
+        data = {"gids": self.gids, "gid_500": self.gid_500, "names": np.array(self.criteria, dtype=str)}
+        for name in self.ranks:
+            data[f"rank_{name}"] = self.ranks[name]
+            data[f"value_{name}"] = self.values[name]
+            data[f"meta_{name}"] = np.array([str(self.sizes[name]), self.directions[name]])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **data)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            table = cls(data["gids"], data["gid_500"])
+            for name in data["names"]:
+                size, direction = data[f"meta_{name}"]
+                table.add_criterion(str(name), data[f"rank_{name}"], int(size), str(direction), data[f"value_{name}"])
+        return table
+
+
+########################################
+# 2. 기준 추가 (원래 파이프라인이 정렬하던 표 단위로 순위)
+########################################
+def add_cell_criterion(table, name, values, direction=TOP):
+    # 100m 격자 전체(merge 결과, 값 없는 셀은 NaN) 를 정렬하던 기준: 인구 A60, 경사도 max
+    rank = selection_rank(values, direction)
+    return table.add_criterion(name, rank, len(rank), direction, values)
+
+
+def add_500_criterion(table, name, gid_500, values, direction=TOP):
+    # 500m(기상) 격자 표를 정렬하던 기준: 결빙 건수. 격자 표에 없는 gid_500 의 셀은 선정되지 않음
+    gid_500 = np.asarray(gid_500, dtype=np.int64)
+    source_rank = selection_rank(values, direction)
+    lookup = np.full(max(int(table.gid_500.max()), int(gid_500.max())) + 1, ABSENT, dtype=np.int64)
+    lookup[gid_500] = source_rank
+    value_lookup = np.full(len(lookup), np.nan)
+    value_lookup[gid_500] = np.asarray(values, dtype=np.float64)
+    return table.add_criterion(name, lookup[table.gid_500], len(gid_500), direction, value_lookup[table.gid_500])
+
+
+def add_keyed_criterion(table, name, gids, values, direction=BOTTOM):
+    # gid 가 있는 별도 표(시군구 접근성 격자 등)를 정렬하던 기준. 표에 없는 셀은 선정되지 않음
+    source_rank = selection_rank(values, direction)
+    stack_keys = gid_to_key(table.gids)
+    order = np.argsort(stack_keys, kind="stable")
+    keys = gid_to_key(gids)
+    pos = np.minimum(np.searchsorted(stack_keys[order], keys), len(order) - 1)
+    rows = order[pos]
+    found = stack_keys[rows] == keys
+    rank = np.full(len(table), ABSENT, dtype=np.int64)
+    rank[rows[found]] = source_rank[found]
+    cell_values = np.full(len(table), np.nan)
+    cell_values[rows[found]] = np.asarray(values, dtype=np.float64)[found]
+    return table.add_criterion(name, rank, len(source_rank), direction, cell_values)
+
+
+def read_accessibility(shp_path, sgg_cd="11215", column="value"):
+    # accessibility_visualization 과 같은 인코딩 처리 / 시군구 필터 (도형은 읽지 않음)
+    for encoding in ("utf-8", "cp949", "euc-kr"):
+        df = gpd.read_file(shp_path, encoding=encoding, ignore_geometry=True)
+        if not df.empty and not df["gid"].astype(str).str.contains("떎궗").any():
+            break
+    df = df[df["sgg_cd"] == sgg_cd]
+    return df["gid"].astype(str).to_numpy(), df[column].to_numpy(np.float64)
+
+
+def build_criteria_table(grid_path, slope_csv_path=None, freeze_csv_path=None, pop_csv_paths=None,
+                         access_shp_path=None, sgg_cd="11215", stack=None):
+    """
+    기준 값(criteria_stack band) 과 선정 순위를 gid 표로 만듭니다.
+    기준: pop(A60 상위), slope(최대 경사 상위), freeze(500m 결빙 건수 상위), access(응급의료 접근성 하위)
+    """
+    if stack is None:
+        stack = build_criteria_stack(grid_path, slope_csv_path=slope_csv_path, pop_csv_paths=pop_csv_paths,
+                                     points=None)
+    table = CriteriaTable.from_stack(stack)
+    if "a60" in stack.bands:
+        add_cell_criterion(table, "pop", stack["a60"])
+    if "max_slope" in stack.bands:
+        add_cell_criterion(table, "slope", stack["max_slope"])
+    if freeze_csv_path is not None:
+        df = pd.read_csv(freeze_csv_path, usecols=["gid", "total_count"])
+        add_500_criterion(table, "freeze", df["gid"].to_numpy(), df["total_count"].to_numpy())
+    if access_shp_path is not None:
+        gids, values = read_accessibility(access_shp_path, sgg_cd)
+        add_keyed_criterion(table, "access", gids, values, BOTTOM)
+    return table
+
+
+########################################
+# 3. 임계 비율 일괄 탐색
+########################################
+def sweep_thresholds(table, grid):
+    """
+    기준별 비율 목록의 모든 조합에 대해 선정 셀을 한 번에 계산합니다.
+    grid 예: {"pop": [0.3, 0.5, 0.7], "slope": [0.3, 0.5], "access": [0.5]}
+    반환: (조합별 비율 / 선정 셀 수 / 선정 500m 격자 수 DataFrame, 조합 × 셀 bool 배열)
+    """
+    names = list(grid)
+    levels = [np.asarray(grid[name], dtype=np.float64) for name in names]
+    # 기준별로 (비율 수, 셀 수) 선정 배열을 먼저 만들고 조합마다 AND
+    masks = [table.ranks[name][None, :] < table.limit(name, level)[:, None] for name, level in zip(names, levels)]
+    combos = np.array(list(itertools.product(*[range(len(level)) for level in levels])), dtype=np.int64)
+    combos = combos.reshape(-1, len(names))
+    selected = np.ones((len(combos), len(table)), dtype=bool)
+    for i, mask in enumerate(masks):
+        selected &= mask[combos[:, i]]
+
+    summary = pd.DataFrame({name: level[combos[:, i]] for i, (name, level) in enumerate(zip(names, levels))})
+    summary["n_cells"] = selected.sum(axis=1)
+    n_500 = int(table.gid_500.max()) + 1
+    summary["n_500"] = [np.count_nonzero(np.bincount(table.gid_500[row], minlength=n_500)) for row in selected]
+    return summary, selected
+
+
+def selected_gids(table, selected):
+    # sweep 결과 조합별 선정 gid 목록
+    return [table.gids[row].tolist() for row in np.asarray(selected, dtype=bool)]
+
+
+def save_sweep(summary, selected, table, csv_path):
+    # 조합별 요약 CSV (선정 gid 는 ';' 로 이어 붙임)
+    out = summary.copy()
+    out["gids"] = [";".join(gids) for gids in selected_gids(table, selected)]
+    out.to_csv(csv_path, index=False, encoding="utf-8-sig")
+    return csv_path
+
+
+if __name__ == '__main__':
+    import time
+    import argparse
+
+    parser = argparse.ArgumentParser(description="기준별 임계 비율 조합 선정 (순위 표 사용)")
+    parser.add_argument("--table", default="./extract_shp/criteria_table.npz")
+    parser.add_argument("--rebuild", action="store_true")
+    for name in ("pop", "slope", "freeze", "access"):
+        parser.add_argument(f"--{name}", type=float, nargs="+", help=f"{name} 선정 비율 (여러 개면 일괄 탐색)")
+    parser.add_argument("--sweep-out", default="criteria_sweep.csv")
+    args = parser.parse_args()
+
+    if args.rebuild or not os.path.exists(args.table):
+        csv_paths = ["./data/2023_01_pop.csv", "./data/2023_02_pop.csv", "./data/2023_12_pop.csv",
+                     "./data/2024_01_pop.csv", "./data/2024_02_pop.csv", "./data/2024_12_pop.csv"]
+        access_path = "./shp/159.2 응급의료시설(시군구격자) 접근성.shp"
+        table = build_criteria_table("./shp/100m_500m.shp",
+                                     slope_csv_path="./data/slope_stats_by_cell.csv",
+                                     freeze_csv_path="./data/기후 격자별 결빙 건수 값.csv",
+                                     pop_csv_paths=csv_paths,
+                                     access_shp_path=access_path if os.path.exists(access_path) else None)
+        table.save(args.table)
+        print(f"기준 순위 표 저장: {args.table} (기준 {table.criteria})")
+    else:
+        table = CriteriaTable.load(args.table)
+
+    grid = {name: getattr(args, name) for name in table.criteria if getattr(args, name)}
+    if all(len(levels) == 1 for levels in grid.values()):
+        start = time.perf_counter()
+        result = table.query(**{name: levels[0] for name, levels in grid.items()})
+        print(f"선정 셀 {len(result)}개 / 500m 격자 {result['gid_500'].nunique()}개 "
+              f"({(time.perf_counter() - start) * 1e6:.0f}µs)")
+        print(result.to_string(index=False))
+    else:
+        summary, selected = sweep_thresholds(table, grid)
+        save_sweep(summary, selected, table, args.sweep_out)
+        print(summary.to_string(index=False))
+        print(f"조합 {len(summary)}개 저장: {args.sweep_out}")
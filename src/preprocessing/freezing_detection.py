@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+WEATHER_VARIABLES = ["ta", "hm", "td", "ws_10m", "rn_60m", "sd_3hr"]
+
+# README 의 5가지 상황별 결빙 판단 알고리즘 ↔ freezing_detection_algorithm.sql 조건 번호
+SCENARIOS = {
+    "condensation": ("cond1", "cond2"),   # 1. 응결 결빙
+    "precipitation": ("cond3",),          # 2. 강수 결빙
+    "snow": ("cond4",),                   # 3. 적설 결빙
+    "persistence": ("cond6",),            # 4. 결빙 지속
+    "wind": ("cond5",),                   # 5. 풍속 영향
+}
+
+
+def load_surface_temperature(surface_csv):
+    """
+    지면온도 CSV(TM, VAL)를 시각별 ts_avg 로 바꿉니다. 한 시간 안에 여러 관측이 있으면 평균합니다.
+    """
+    df = pd.read_csv(surface_csv)
+    hour = (df["TM"].astype(np.int64) // 100) * 100
+    return df.groupby(hour)["VAL"].mean().rename("ts_avg").rename_axis("timestamp")
+
+
+def build_weather_arrays(df_weather, ts_avg, key="gid"):
+    """
+    기상 표(key, timestamp, ta, hm, td, ws_10m, rn_60m, sd_3hr)를 (격자 × 시각) 2차원 배열로 바꿉니다.
+    SQL 의 JOIN 과 같이 지면온도가 있는 시각만 남기며, ts_avg 는 모든 격자에 같은 값으로 펼칩니다.
+    반환값: (격자 key 배열, 시각 배열, {변수: (G, H) float64 배열})
+    """
+    df = df_weather[df_weather["timestamp"].isin(ts_avg.index)]
+    gid_codes, gids = pd.factorize(df[key], sort=True)
+    hour_codes, hours = pd.factorize(df["timestamp"], sort=True)
+
+    arrays = {}
+    for col in WEATHER_VARIABLES:
+        grid = np.full((len(gids), len(hours)), np.nan)
+        grid[gid_codes, hour_codes] = df[col].to_numpy(dtype=np.float64)
+        arrays[col] = grid
+    arrays["ts_avg"] = np.broadcast_to(ts_avg.reindex(hours).to_numpy(dtype=np.float64), (len(gids), len(hours)))
+    return np.asarray(gids), np.asarray(hours), arrays
+
+
+def lag(values, n):
+    # SQL LAG(x, n): 시각 축으로 n 칸 밀고 앞부분은 NULL(NaN)
+    shifted = np.full(values.shape, np.nan)
+    if n < values.shape[-1]:
+        shifted[..., n:] = values[..., :-n]
+    return shifted
+
+
+def preceding_sum(flags, n):
+    # SUM(flag) OVER (ROWS BETWEEN n PRECEDING AND 1 PRECEDING), 첫 행은 NULL 이므로 0 으로 둠
+    csum = np.cumsum(flags, axis=-1, dtype=np.int64)
+    csum = np.concatenate([np.zeros(flags.shape[:-1] + (1,), dtype=np.int64), csum], axis=-1)
+    idx = np.arange(flags.shape[-1])
+    return csum[..., idx] - csum[..., np.maximum(idx - n, 0)]
+
+
+def evaluate_freezing_conditions(arrays, history=None):
+    """
+    SQL 의 조건 1~6 을 (G, H) 배열 전체에 한 번에 적용합니다.
+    NaN 비교는 SQL 의 NULL 처럼 거짓이 되고, sd_3hr <> 0 도 NULL 이면 거짓으로 처리합니다.
+    history 를 주면 바로 앞 시각들의 값으로 보고 LAG / 이전 4행 합계 계산에만 이어 붙입니다.
+    ({"ta", "rn_60m", "ts_avg", "cond_flag"}: 각 (G, k) 배열)
+    """
+    n_hist = 0 if history is None else history["cond_flag"].shape[1]
+    ta, hm, td = arrays["ta"], arrays["hm"], arrays["td"]
+    ws, sd, ts = arrays["ws_10m"], arrays["sd_3hr"], arrays["ts_avg"]
+    if n_hist:
+        ta_all = np.concatenate([history["ta"], ta], axis=1)
+        rn_all = np.concatenate([history["rn_60m"], arrays["rn_60m"]], axis=1)
+        ts_all = np.concatenate([history["ts_avg"], ts], axis=1)
+    else:
+        ta_all, rn_all, ts_all = ta, arrays["rn_60m"], ts
+    prev_ts = lag(ts_all, 1)[:, n_hist:]
+    rn_prev3 = lag(rn_all, 3)[:, n_hist:]
+    ta_prev = [lag(ta_all, k)[:, n_hist:] for k in (1, 2, 3)]
+
+    with np.errstate(invalid="ignore"):
+        humid = (hm >= 65) & (ts <= td + 5) & (ta <= 5)
+        conds = {
+            "cond1": humid & (ts <= 0),
+            "cond2": humid & (ts > 0) & (ts <= 1) & ((prev_ts - ts) <= -1),
+            "cond3": (rn_prev3 > 1) & (ts <= 0) & ((ta_prev[2] <= 0) | (ta_prev[1] <= 0) | (ta_prev[0] <= 0) | (ta <= 0)),
+            "cond4": (sd != 0) & ~np.isnan(sd),
+            "cond5": (ts <= 0) & (np.abs(ts - (td + 5)) < 0.5) & (ws > 2),
+        }
+        cond_flag = conds["cond1"] | conds["cond2"] | conds["cond3"] | conds["cond4"] | conds["cond5"]
+        flags = cond_flag.astype(np.int8)
+        if n_hist:
+            flags = np.concatenate([history["cond_flag"].astype(np.int8), flags], axis=1)
+        prev_cond_count = preceding_sum(flags, 4)[:, n_hist:]
+        conds["cond6"] = (ta <= 0) & (ts <= 0) & (prev_cond_count > 0)
+    conds["cond_flag"] = cond_flag
+    return conds
+
+
+def count_freezing_scenarios(conds):
+    """
+    시나리오별 / 전체 결빙 시각 수를 격자별로 셉니다. total_count 는 SQL 의 COUNT(*) 와 같습니다.
+    """
+    counts = {name: np.any([conds[c] for c in cond_names], axis=0).sum(axis=1)
+              for name, cond_names in SCENARIOS.items()}
+    counts["total_count"] = (conds["cond_flag"] | conds["cond6"]).sum(axis=1)
+    return counts
+
+
+def detect_freezing(df_weather, ts_avg, key="gid"):
+    """
+    기상 표와 시각별 지면온도로 격자별 시나리오 결빙 건수 표를 만듭니다. (key, 시나리오 5개, total_count)
+    """
+    gids, _, arrays = build_weather_arrays(df_weather, ts_avg, key)
+    counts = count_freezing_scenarios(evaluate_freezing_conditions(arrays))
+    return pd.DataFrame({key: gids, **counts})
+
+
+if __name__ == '__main__':
+    import time
+
+    started = time.perf_counter()
+    df_weather = pd.read_csv('전체_기상_데이터.csv')
+    ts_avg = load_surface_temperature('surface_temperature_2301_2302.csv')
+    df_counts = detect_freezing(df_weather, ts_avg)
+    print(f"격자 {len(df_counts)}개 결빙 판단 완료 ({time.perf_counter() - started:.2f}초)")
+
+    df_counts.to_csv('기후 격자별 결빙 시나리오별 건수.csv', index=False)
+    # 기존 시각화 스크립트가 읽는 형식 (gid, total_count)
+    df_counts[['gid', 'total_count']].to_csv('기후 격자별 결빙 건수 값.csv', index=False)
+    print(df_counts.describe().T[['mean', 'min', 'max']])
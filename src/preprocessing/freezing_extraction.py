@@ -1,9 +1,22 @@
+import sys
+import os
 import geopandas as gpd
 import pandas as pd
 import matplotlib.pyplot as plt
 
-# 1. CSV 불러오기 (gid_500만 포함)
-df_filtered = pd.read_csv("./extract_shp/filtered_weather.csv")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.freezing_incremental import FreezingCountState
+from preprocessing.grid_hierarchy import dissolve_cells
+
+# 1. 결빙 상위 격자 불러오기 (gid_500만 포함)
+#    일일 누적 상태(freezing_incremental.py)가 있으면 최신 누적 건수로 상위 50%를 바로 다시 고름
+state_path = "./extract_shp/freezing_state.npz"
+if os.path.exists(state_path):
+    state = FreezingCountState.load(state_path)
+    df_filtered = pd.DataFrame({"gid_500": state.select_top_percent(0.5)[state.key].to_numpy()})
+else:
+    df_filtered = pd.read_csv("./extract_shp/filtered_weather.csv")
 
 # 2. 속성만 불러오기
 gdf_attrs = gpd.read_file("./shp/100m_500m.shp", ignore_geometry=True)
@@ -21,8 +34,8 @@ gdf_full = gpd.GeoDataFrame(
 # 5. 필터링 (gid_500 기준)
 gdf_filtered = gdf_full[gdf_full["gid_500"].isin(df_filtered["gid_500"])]
 
-# 6. dissolve 로 500m 격자 단위 통합
-gdf_dissolved = gdf_filtered.dissolve(by="gid_500", as_index=False)
+# 6. 500m 격자 단위 통합 (꽉 찬 500m 격자는 경계 사각형 그대로, 경계에 걸친 격자만 셀 union)
+gdf_dissolved = dissolve_cells(gdf_filtered, by="gid_500")
 
 # 7. 저장
 gdf_dissolved.to_file("filtered_weather.shp")
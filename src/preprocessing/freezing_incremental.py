@@ -0,0 +1,159 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.freezing_detection import (
+    SCENARIOS,
+    build_weather_arrays,
+    evaluate_freezing_conditions,
+    count_freezing_scenarios,
+)
+
+# LAG(ta, 3), LAG(rn_60m, 3), LAG(ts_avg, 1), 이전 4행 cond_flag 합계 → 최대 4시간 꼬리만 있으면 됨
+TAIL_HOURS = 4
+TAIL_VARIABLES = ["ta", "rn_60m", "ts_avg"]
+COUNT_COLUMNS = list(SCENARIOS) + ["total_count"]
+
+
+class FreezingCountState:
+    """
+    격자별 누적 결빙 건수와 다중 시각 조건에 필요한 마지막 TAIL_HOURS 시간 값을 들고 있는 상태입니다.
+    update() 는 마지막으로 반영한 시각 이후의 새 기상 데이터만 판단하여 건수에 더하므로
+    시즌 전체를 다시 계산한 결과와 같으면서 비용은 새 데이터 크기에 비례합니다.
+    """
+
+    def __init__(self, gids=(), key="gid"):
+        self.key = key
+        self.gids = np.asarray(gids)
+        self.counts = {col: np.zeros(len(self.gids), dtype=np.int64) for col in COUNT_COLUMNS}
+        self.tail = {col: np.full((len(self.gids), 0), np.nan) for col in TAIL_VARIABLES}
+        self.tail["cond_flag"] = np.zeros((len(self.gids), 0), dtype=bool)
+        self.last_timestamp = -1
+        self.hours_ingested = 0
+        # 이미 반영한 일일 기상 파일 이름 (매일 실행 시 새 파일만 읽기 위함)
+        self.ingested_files = set()
+
+    def _extend_gids(self, gids):
+        # 새로 등장한 격자는 건수 0, 이전 시각 값은 NULL 로 추가
+        new = np.setdiff1d(gids, self.gids)
+        if len(new) == 0:
+            return
+        all_gids = np.sort(np.concatenate([self.gids, new])) if len(self.gids) else new
+        pos = np.searchsorted(all_gids, self.gids)
+        n_tail = self.tail["cond_flag"].shape[1]
+        for col in COUNT_COLUMNS:
+            counts = np.zeros(len(all_gids), dtype=np.int64)
+            counts[pos] = self.counts[col]
+            self.counts[col] = counts
+        for col in TAIL_VARIABLES:
+            tail = np.full((len(all_gids), n_tail), np.nan)
+            tail[pos] = self.tail[col]
+            self.tail[col] = tail
+        flags = np.zeros((len(all_gids), n_tail), dtype=bool)
+        flags[pos] = self.tail["cond_flag"]
+        self.tail["cond_flag"] = flags
+        self.gids = all_gids
+
+    def update(self, df_weather, ts_avg):
+        """
+        last_timestamp 이후 시각의 기상 데이터만 판단해 누적 건수와 꼬리 값을 갱신합니다.
+        이미 반영한 시각의 행은 무시하므로 같은 날짜를 다시 넣어도 건수가 두 번 더해지지 않습니다.
+        반환값: 이번에 반영한 시각 수
+        """
+        df_new = df_weather[df_weather["timestamp"] > self.last_timestamp]
+        ts_new = ts_avg[ts_avg.index > self.last_timestamp]
+        gids, hours, arrays = build_weather_arrays(df_new, ts_new, self.key)
+        if len(hours) == 0:
+            return 0
+
+        self._extend_gids(gids)
+        # 이번 배치에 없는 격자도 상태 격자 순서에 맞춰 NULL 로 채움
+        rows = np.searchsorted(self.gids, gids)
+        aligned = {}
+        for col, values in arrays.items():
+            grid = np.full((len(self.gids), len(hours)), np.nan)
+            grid[rows] = values
+            aligned[col] = grid
+
+        conds = evaluate_freezing_conditions(aligned, history=self.tail)
+        for col, counts in count_freezing_scenarios(conds).items():
+            self.counts[col] += counts
+
+        for col in TAIL_VARIABLES:
+            self.tail[col] = np.concatenate([self.tail[col], aligned[col]], axis=1)[:, -TAIL_HOURS:]
+        self.tail["cond_flag"] = np.concatenate([self.tail["cond_flag"], conds["cond_flag"]], axis=1)[:, -TAIL_HOURS:]
+        self.last_timestamp = int(hours[-1])
+        self.hours_ingested += len(hours)
+        return len(hours)
+
+    def to_frame(self):
+        return pd.DataFrame({self.key: self.gids, **self.counts})
+
+    def select_top_percent(self, top_percent=0.5, column="total_count"):
+        # freezing_visualization.visualize_result 와 같은 기준: nlargest(int(격자 수 × top_percent))
+        df = self.to_frame()
+        return df.nlargest(int(len(df) * top_percent), column)
+
+    def save(self, path):
+        # 문자열 격자 번호(object 배열)는 allow_pickle=False 로 읽을 수 있도록 고정 길이 문자열로 저장
+        gids = self.gids.astype(str) if self.gids.dtype == object else self.gids
+        data = {"gids": gids, "key": np.array(self.key), "last_timestamp": np.array(self.last_timestamp),
+                "hours_ingested": np.array(self.hours_ingested),
+                "ingested_files": np.array(sorted(self.ingested_files), dtype=str)}
+        data.update({f"count_{col}": values for col, values in self.counts.items()})
+        data.update({f"tail_{col}": values for col, values in self.tail.items()})
+        # 임시 파일에 쓴 뒤 교체하여 저장 중에 죽어도 이전 상태가 남게 함
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **data)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            gids = data["gids"]
+            # 새로 만든 상태와 같게 문자열 격자 번호는 object 배열로 되돌림
+            state = cls(gids.astype(object) if gids.dtype.kind == "U" else gids, key=str(data["key"]))
+            state.last_timestamp = int(data["last_timestamp"])
+            state.hours_ingested = int(data["hours_ingested"])
+            if "ingested_files" in data.files:
+                state.ingested_files = set(data["ingested_files"].tolist())
+            state.counts = {col: data[f"count_{col}"] for col in COUNT_COLUMNS}
+            state.tail = {col: data[f"tail_{col}"] for col in TAIL_VARIABLES + ["cond_flag"]}
+        return state
+
+
+def load_or_create_state(path, key="gid"):
+    return FreezingCountState.load(path) if os.path.exists(path) else FreezingCountState(key=key)
+
+
+if __name__ == '__main__':
+    import glob
+    from preprocessing.freezing_detection import load_surface_temperature
+
+    # 겨울철 일일 운영: 새로 받은 날짜 파일만 상태에 반영하고 건수 / 상위 50% 선택을 갱신
+    state_path = "./extract_shp/freezing_state.npz"
+    state = load_or_create_state(state_path)
+    ts_avg = load_surface_temperature("surface_temperature_2301_2302.csv")
+
+    # 상태에 기록된 파일은 다시 읽지 않음 (하루 실행 비용이 시즌 길이가 아닌 새 파일 수에 비례)
+    new_files = [path for path in sorted(glob.glob("./weather_daily/*.csv"))
+                 if os.path.basename(path) not in state.ingested_files]
+    for weather_csv in new_files:
+        n_hours = state.update(pd.read_csv(weather_csv), ts_avg)
+        state.ingested_files.add(os.path.basename(weather_csv))
+        if n_hours:
+            print(f"{weather_csv}: {n_hours}시간 반영 (마지막 시각 {state.last_timestamp})")
+    print(f"새 일일 파일 {len(new_files)}개 반영 (누적 {len(state.ingested_files)}개)")
+    state.save(state_path)
+
+    state.to_frame().to_csv("기후 격자별 결빙 시나리오별 건수.csv", index=False)
+    state.to_frame()[[state.key, "total_count"]].to_csv("기후 격자별 결빙 건수 값.csv", index=False)
+    top = state.select_top_percent(0.5)
+    top.rename(columns={state.key: "gid_500"})[["gid_500", "total_count"]].to_csv(
+        "./extract_shp/filtered_weather.csv", index=False
+    )
+    print(f"누적 {state.hours_ingested}시간, 상위 50% 격자 {len(top)}개 선택")
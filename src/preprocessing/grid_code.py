@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+# 국가지점번호 격자 문자: 글자 순서가 100km 단위 (동향 700000m, 북향 1300000m 부터 시작)
+GRID_LETTERS = "가나다라마바사아자차카타파하"
+EASTING_ORIGIN = 700_000
+NORTHING_ORIGIN = 1_300_000
+LETTER_UNIT = 100_000
+GRID_CRS = "EPSG:5179"
+
+_LETTER_INDEX = {letter: i for i, letter in enumerate(GRID_LETTERS)}
+
+
+def decode_gid(gids, cell_size=100):
+    """
+    '다사646527' 형식 gid 배열을 셀 왼쪽 아래 좌표 (x, y) int64 배열로 바꿉니다. (EPSG:5179, m)
+    앞 두 글자가 100km 단위, 뒤 숫자 두 묶음이 cell_size 단위 동향 / 북향입니다.
+    """
+    s = pd.Series(np.asarray(gids, dtype=object), dtype=object).astype(str)
+    n_digits = (s.str.len() - 2) // 2
+    if n_digits.nunique() > 1:
+        raise ValueError("gid 숫자 자릿수가 서로 다릅니다.")
+    n = int(n_digits.iloc[0]) if len(s) else 3
+    east_letter = s.str[0].map(_LETTER_INDEX)
+    north_letter = s.str[1].map(_LETTER_INDEX)
+    if east_letter.isna().any() or north_letter.isna().any():
+        raise ValueError(f"알 수 없는 격자 문자: {s[east_letter.isna() | north_letter.isna()].iloc[0]}")
+    x = EASTING_ORIGIN + east_letter.to_numpy(np.int64) * LETTER_UNIT + s.str[2:2 + n].astype(np.int64).to_numpy() * cell_size
+    y = NORTHING_ORIGIN + north_letter.to_numpy(np.int64) * LETTER_UNIT + s.str[2 + n:2 + 2 * n].astype(np.int64).to_numpy() * cell_size
+    return x, y
+
+
+def encode_gid(x, y, cell_size=100):
+    """
+    셀 왼쪽 아래 좌표 (x, y) 를 gid 문자열 배열로 바꿉니다. (decode_gid 의 역변환)
+    """
+    x = np.asarray(x, dtype=np.int64)
+    y = np.asarray(y, dtype=np.int64)
+    n = len(str(LETTER_UNIT // cell_size - 1))
+    letters = np.array(list(GRID_LETTERS), dtype=object)
+    east = letters[(x - EASTING_ORIGIN) // LETTER_UNIT]
+    north = letters[(y - NORTHING_ORIGIN) // LETTER_UNIT]
+    east_num = pd.Series((x - EASTING_ORIGIN) % LETTER_UNIT // cell_size).astype(str).str.zfill(n)
+    north_num = pd.Series((y - NORTHING_ORIGIN) % LETTER_UNIT // cell_size).astype(str).str.zfill(n)
+    return (pd.Series(east) + pd.Series(north) + east_num + north_num).to_numpy(dtype=object)
+
+
+def cell_key(x, y, cell_size=100):
+    # 조인용 int64 키: (x 셀 번호, y 셀 번호) 를 하나의 정수로 묶음
+    return (np.asarray(x, dtype=np.int64) // cell_size) * 10_000_000 + np.asarray(y, dtype=np.int64) // cell_size
+
+
+def gid_to_key(gids):
+    return cell_key(*decode_gid(gids))
+
+
+def parent_index(x, y, parent_size=500):
+    """
+    상위 격자 번호 (grid_x, grid_y) = 좌표 // parent_size. (100m_500m.shp 의 grid_x, grid_y 와 같음)
+    """
+    return np.asarray(x, dtype=np.int64) // parent_size, np.asarray(y, dtype=np.int64) // parent_size
+
+
+def dense_rank_north_west(x, y):
+    """
+    북쪽 행부터, 같은 행은 서쪽부터 0, 1, 2 ... 순번을 매깁니다. 같은 (x, y) 는 같은 번호입니다.
+    100m_500m.shp 의 gid_100 (셀 좌표 기준), gid_500 (grid_x, grid_y 기준) 번호 규칙과 같습니다.
+    """
+    x = np.asarray(x, dtype=np.int64)
+    y = np.asarray(y, dtype=np.int64)
+    _, rank = np.unique(np.column_stack([-y, x]), axis=0, return_inverse=True)
+    return rank.reshape(-1).astype(np.int64)
+
+
+def cell_polygons(x, y, cell_size=100):
+    # 왼쪽 아래 좌표로 정사각형 셀 폴리곤을 한 번에 생성 (꼭짓점 순서는 기존 shp 와 같은 시계 방향)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    return shapely.box(x, y, x + cell_size, y + cell_size, ccw=False)
+
+
+def build_grid_from_gids(gids, parent_size=500, crs=GRID_CRS):
+    """
+    gid 목록만으로 100m_500m.shp 와 같은 컬럼(gid_500, gid_100, gid, grid_x, grid_y, geometry)의 격자를 만듭니다.
+    gid 목록이 연구 지역 전체 셀이면 gid_500 / gid_100 번호도 원본 shp 와 같습니다.
+    """
+    gids = pd.Series(np.asarray(gids, dtype=object)).astype(str).drop_duplicates().to_numpy(dtype=object)
+    x, y = decode_gid(gids)
+    grid_x, grid_y = parent_index(x, y, parent_size)
+    gid_500 = dense_rank_north_west(grid_x, grid_y)
+    gid_100 = dense_rank_north_west(x, y)
+    gdf = gpd.GeoDataFrame({
+        "gid_500": gid_500,
+        "gid_100": gid_100,
+        "gid": gids,
+        "grid_x": grid_x.astype(np.int32),
+        "grid_y": grid_y.astype(np.int32),
+    }, geometry=cell_polygons(x, y), crs=crs)
+    # 원본 shp 와 같은 행 순서 (gid_500, gid_100)
+    return gdf.iloc[np.lexsort((gid_100, gid_500))].reset_index(drop=True)
+
+
+def load_grid(source, parent_size=500, crs=GRID_CRS):
+    """
+    연구 지역 격자를 읽습니다. CSV 면 gid 컬럼만, shp 면 속성(gid)만 읽고 geometry 는 gid 에서 계산합니다.
+    """
+    if str(source).lower().endswith(".csv"):
+        gids = pd.read_csv(source, usecols=["gid"])["gid"]
+    else:
+        gids = gpd.read_file(source, ignore_geometry=True, columns=["gid"])["gid"]
+    return build_grid_from_gids(gids, parent_size, crs)
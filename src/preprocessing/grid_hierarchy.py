@@ -0,0 +1,126 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.grid_code import parent_index, cell_polygons
+
+LEVELS = (100, 500, 1000)
+
+
+def cell_origins(gdf):
+    # 정사각형 셀의 왼쪽 아래 좌표 (m, int64)
+    bounds = gdf.geometry.bounds
+    return np.rint(bounds["minx"].to_numpy()).astype(np.int64), np.rint(bounds["miny"].to_numpy()).astype(np.int64)
+
+
+def group_codes(*keys):
+    """
+    여러 키 배열을 사전순(dissolve 의 groupby 순서)으로 묶어 그룹 번호를 매깁니다.
+    반환값: (행별 그룹 번호, 그룹별 대표 키 튜플)
+    """
+    stacked = np.column_stack([np.asarray(k) for k in keys])
+    uniques, inverse = np.unique(stacked, axis=0, return_inverse=True)
+    return inverse.reshape(-1), tuple(uniques[:, i] for i in range(uniques.shape[1]))
+
+
+def build_hierarchy(x, y, levels=LEVELS):
+    """
+    셀 왼쪽 아래 좌표로 각 단계(100m / 500m / 1km ...)의 상위 격자 번호를 정수 나눗셈으로 구합니다.
+    컬럼: ix_{size}, iy_{size} (좌표 // size), pid_{size} (단계 안에서의 그룹 번호)
+    """
+    df = pd.DataFrame({"x": np.asarray(x, dtype=np.int64), "y": np.asarray(y, dtype=np.int64)})
+    for size in levels:
+        ix, iy = parent_index(df["x"], df["y"], size)
+        df[f"ix_{size}"] = ix
+        df[f"iy_{size}"] = iy
+        df[f"pid_{size}"] = group_codes(ix, iy)[0]
+    return df
+
+
+def aggregate_by_group(values, codes, n_groups=None, stats=("count", "sum", "mean", "min", "max")):
+    """
+    그룹 번호(codes)별 통계를 np.bincount / reduceat 으로 한 번에 계산합니다. NaN 은 제외합니다.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes = np.asarray(codes, dtype=np.int64)
+    n_groups = int(codes.max()) + 1 if n_groups is None else n_groups
+    valid = ~np.isnan(values)
+    count = np.bincount(codes[valid], minlength=n_groups)
+    total = np.bincount(codes[valid], weights=values[valid], minlength=n_groups)
+
+    result = {}
+    if "count" in stats:
+        result["count"] = count
+    if "sum" in stats:
+        result["sum"] = total
+    if "mean" in stats:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result["mean"] = total / count
+    if "min" in stats or "max" in stats:
+        order = np.argsort(codes[valid], kind="stable")
+        sorted_codes = codes[valid][order]
+        sorted_values = values[valid][order]
+        present = np.unique(sorted_codes)
+        starts = np.searchsorted(sorted_codes, present)
+        for name, ufunc in (("min", np.minimum), ("max", np.maximum)):
+            if name in stats:
+                out = np.full(n_groups, np.nan)
+                if len(present):
+                    out[present] = ufunc.reduceat(sorted_values, starts)
+                result[name] = out
+    return result
+
+
+def aggregate_to_level(x, y, values, size, stats=("count", "sum", "mean", "min", "max")):
+    """
+    셀 값들을 size(m) 상위 격자로 모읍니다. 반환: ix, iy 와 값 컬럼별 통계 (예: value_mean) 를 담은 표
+    """
+    ix, iy = parent_index(x, y, size)
+    codes, (gx, gy) = group_codes(ix, iy)
+    df = pd.DataFrame({f"ix_{size}": gx, f"iy_{size}": gy})
+    for name, vals in values.items():
+        for stat, arr in aggregate_by_group(vals, codes, len(gx), stats).items():
+            df[f"{name}_{stat}"] = arr
+    return df
+
+
+def parent_squares(ix, iy, size):
+    # 상위 격자 번호로 정사각형 폴리곤을 바로 생성 (왼쪽 아래 = 번호 × size)
+    return cell_polygons(np.asarray(ix, dtype=np.int64) * size, np.asarray(iy, dtype=np.int64) * size, size)
+
+
+def dissolve_cells(gdf, by, child_size=None):
+    """
+    정사각형 셀 격자용 dissolve. 셀로 꽉 찬 그룹은 경계 사각형을 그대로 폴리곤으로 만들고,
+    경계에 걸려 일부 셀만 있는 그룹만 셀 폴리곤을 union 합니다. 나머지 속성은 그룹별 첫 값을 씁니다.
+    gdf.dissolve(by=by) 와 같은 그룹 순서 / 도형을 돌려주며, by 컬럼은 index 가 아닌 일반 컬럼입니다.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    codes, keys = group_codes(*[gdf[col].to_numpy() for col in by])
+    n_groups = len(keys[0])
+
+    bounds = gdf.geometry.bounds
+    minx = aggregate_by_group(bounds["minx"].to_numpy(), codes, n_groups, ("min",))["min"]
+    miny = aggregate_by_group(bounds["miny"].to_numpy(), codes, n_groups, ("min",))["min"]
+    maxx = aggregate_by_group(bounds["maxx"].to_numpy(), codes, n_groups, ("max",))["max"]
+    maxy = aggregate_by_group(bounds["maxy"].to_numpy(), codes, n_groups, ("max",))["max"]
+    if child_size is None:
+        child_size = float(np.median(bounds["maxx"] - bounds["minx"]))
+    n_cells = np.bincount(codes, minlength=n_groups)
+    full = np.isclose(n_cells * child_size ** 2, (maxx - minx) * (maxy - miny))
+
+    geometry = shapely.box(minx, miny, maxx, maxy, ccw=False)
+    geoms = gdf.geometry.to_numpy()
+    for g in np.flatnonzero(~full):
+        geometry[g] = shapely.union_all(geoms[codes == g])
+
+    first_rows = np.unique(codes, return_index=True)[1]
+    attrs = gdf.drop(columns=by + [gdf.geometry.name]).iloc[first_rows].reset_index(drop=True)
+    data = {col: key for col, key in zip(by, keys)}
+    data.update({col: attrs[col].to_numpy() for col in attrs.columns})
+    return gpd.GeoDataFrame(data, geometry=geometry, crs=gdf.crs)
@@ -1,51 +1,90 @@
+import sys
+import os
+import pandas as pd
 import geopandas as gpd
 import rasterio
 from rasterio.features import rasterize
+from rasterio.warp import transform_bounds
+from rasterio.windows import bounds as window_bounds
 import numpy as np
 
-# 1. DEM 파일 불러오기
-dem_path = "output_dem_clip.tif"  # DEM 파일 경로 (본인의 경로에 맞게 수정)
-with rasterio.open(dem_path) as dem_src:
-    dem = dem_src.read(1).astype(np.float32)  # DEM 데이터를 float32 형식으로 읽음
-    dem_transform = dem_src.transform        # 공간 변환 행렬 (geotransform)
-    dem_crs = dem_src.crs                    # 좌표계 (예: EPSG:5174)
-    dem_profile = dem_src.profile            # 메타데이터 (이후 DSM 저장에 사용)
-    dem_shape = dem.shape                    # (행, 열)
-
-print(f"DEM 읽기 완료: shape={dem_shape}, CRS={dem_crs}")
-
-# 2. 건물 데이터 불러오기 및 DEM과 동일 CRS로 변환
-building_shp = "F_FAC_BUILDING_11215_202503.shp"  # 건물 shapefile 경로
-buildings = gpd.read_file(building_shp)
-# DEM 파일의 좌표계에 맞추기 (대소문자 구분 없이 변환)
-buildings = buildings.to_crs(dem_crs)
-print(f"건물 데이터 읽기 완료: 건물 개수={len(buildings)}")
-
-# 3. 건물 높이 래스터화
-# 각 건물 폴리곤에서 "HEIGHT" 컬럼 값을 value로 사용
-# shapes: 제너레이터 형태로 (geometry, building_height) 튜플 생성
-shapes = ((geom, height) for geom, height in zip(buildings.geometry, buildings["HEIGHT"]))
-
-# rasterize()를 사용해서 건물 래스터 생성: 건물이 있는 픽셀은 해당 건물 높이, 없으면 0
-building_raster = rasterize(
-    shapes=shapes,
-    out_shape=dem_shape,
-    transform=dem_transform,
-    fill=0,
-    dtype=np.float32
-)
-print("건물 높이 래스터화 완료.")
-
-# 4. DSM 생성: DSM = DEM + 건물 높이 래스터
-# (건물이 없는 곳: building_raster 값은 0이므로 DEM 값 그대로)
-dsm = dem + building_raster
-print("DSM 생성 완료.")
-
-# 5. DSM 저장하기
-dsm_output_path = "DSM_output.tif"  # 저장할 DSM 파일 경로
-# 기존 DEM의 profile을 업데이트 (자료형, 밴드 개수 지정)
-dem_profile.update(dtype=rasterio.float32, count=1)
-with rasterio.open(dsm_output_path, "w", **dem_profile) as dst:
-    dst.write(dsm, 1)
-
-print(f"DSM 파일이 저장되었습니다: {dsm_output_path}")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.terrain import block_windows, map_windows, TILE_SIZE
+
+
+def building_crs(building_paths):
+    # 건물 파일별 좌표계 (첫 행만 읽어서 확인)
+    return [gpd.read_file(path, rows=1).crs for path in building_paths]
+
+
+def read_buildings_in_window(building_paths, crs_list, bounds, dem_crs, height_column="HEIGHT"):
+    """
+    window 범위(DEM 좌표계)와 bbox 가 겹치는 건물만 파일에서 읽습니다. (파일 좌표계로 바꾼 bbox 로 공간 필터)
+    여러 구(區) 파일은 주어진 순서대로 이어 붙여, 겹치는 픽셀은 뒤 파일 / 뒤 건물 값이 남습니다.
+    """
+    parts = []
+    for path, crs in zip(building_paths, crs_list):
+        bbox = transform_bounds(dem_crs, crs, *bounds, densify_pts=21) if crs is not None and crs != dem_crs else bounds
+        part = gpd.read_file(path, bbox=bbox, columns=[height_column])
+        if len(part):
+            parts.append(part.to_crs(dem_crs) if part.crs is not None and part.crs != dem_crs else part)
+    if not parts:
+        return gpd.GeoDataFrame({height_column: []}, geometry=[], crs=dem_crs)
+    return gpd.GeoDataFrame(pd.concat([p[[height_column, "geometry"]] for p in parts], ignore_index=True),
+                            geometry="geometry", crs=dem_crs)
+
+
+def _dsm_window(args):
+    dem_path, window, building_paths, crs_list, height_column = args
+    with rasterio.open(dem_path) as src:
+        dem = src.read(1, window=window).astype(np.float32)
+        transform = src.window_transform(window)
+        bounds = window_bounds(window, src.transform)
+        dem_crs = src.crs
+    buildings = read_buildings_in_window(building_paths, crs_list, bounds, dem_crs, height_column)
+    if len(buildings) == 0:
+        return dem
+    # window 안에서만 건물 높이 래스터화 (건물이 없으면 0)
+    shapes = ((geom, height) for geom, height in zip(buildings.geometry, buildings[height_column]) if geom is not None)
+    building_raster = rasterize(shapes=shapes, out_shape=dem.shape, transform=transform, fill=0, dtype=np.float32)
+    return dem + building_raster
+
+
+def build_dsm(dem_path, building_paths, dsm_path, height_column="HEIGHT", block_size=2048, workers=None):
+    """
+    DSM = DEM + 건물 높이 래스터를 window 단위로 만듭니다.
+    window 마다 해당 범위의 건물만 읽어 래스터화하고(process pool), 결과를 출력 GeoTIFF 의 같은 위치에 기록합니다.
+    한 번에 메모리에 올라가는 것은 처리 중인 window 와 그 안의 건물뿐이라 서울시 전체 DSM 도 만들 수 있습니다.
+    """
+    building_paths = [building_paths] if isinstance(building_paths, str) else list(building_paths)
+    crs_list = building_crs(building_paths)
+    with rasterio.open(dem_path) as src:
+        profile = src.profile.copy()
+        width, height = src.width, src.height
+
+    for key in ("photometric", "interleave"):
+        profile.pop(key, None)
+    profile.update(driver="GTiff", dtype=rasterio.float32, count=1, tiled=True,
+                   blockxsize=TILE_SIZE, blockysize=TILE_SIZE, compress="deflate", predictor=3, BIGTIFF="IF_SAFER")
+    tasks = ((core, (dem_path, core, building_paths, crs_list, height_column))
+             for core, _, _ in block_windows(width, height, block_size, halo=0))
+    with rasterio.open(dsm_path, "w", **profile) as dst:
+        map_windows(_dsm_window, tasks, lambda core, dsm: dst.write(dsm, 1, window=core), workers)
+    return dsm_path
+
+
+if __name__ == '__main__':
+    # 1. DEM / 건물 파일 경로 (여러 구의 건물 파일을 함께 넣을 수 있음)
+    dem_path = "output_dem_clip.tif"  # DEM 파일 경로 (본인의 경로에 맞게 수정)
+    building_shps = ["F_FAC_BUILDING_11215_202503.shp"]  # 건물 shapefile 경로 목록
+    dsm_output_path = "DSM_output.tif"  # 저장할 DSM 파일 경로
+
+    with rasterio.open(dem_path) as dem_src:
+        print(f"DEM 정보: shape={dem_src.shape}, CRS={dem_src.crs}")
+
+    # 2. window 단위로 건물 높이 래스터화 후 DSM = DEM + 건물 높이 래스터 저장
+    # (건물이 없는 곳: 건물 래스터 값은 0이므로 DEM 값 그대로)
+    build_dsm(dem_path, building_shps, dsm_output_path)
+
+    print(f"DSM 파일이 저장되었습니다: {dsm_output_path}")
@@ -0,0 +1,79 @@
+import netCDF4 as nc
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def lonlat_to_xyz(lon, lat):
+    # 경위도를 단위 구 위의 3차원 좌표로 바꿔 KD-tree 거리가 실제 거리 순서와 같도록 함
+    lon_rad = np.radians(np.asarray(lon, dtype=np.float64))
+    lat_rad = np.radians(np.asarray(lat, dtype=np.float64))
+    return np.column_stack([
+        np.cos(lat_rad) * np.cos(lon_rad),
+        np.cos(lat_rad) * np.sin(lon_rad),
+        np.sin(lat_rad),
+    ])
+
+
+def load_kma_grid(nc_file):
+    with nc.Dataset(nc_file) as ds:
+        lon_api = np.asarray(ds.variables['lon'][:], dtype=np.float64)  # 예: shape (2049, 2049)
+        lat_api = np.asarray(ds.variables['lat'][:], dtype=np.float64)
+    return lon_api, lat_api
+
+
+def build_kma_grid_tree(lon_api, lat_api, bounds=None, margin=0.05):
+    """
+    KMA 격자 lon/lat 2차원 배열로 KD-tree 를 만듭니다.
+    bounds(minx, miny, maxx, maxy) 를 주면 margin(도) 만큼 넓힌 범위 안의 셀만 트리에 넣습니다.
+    반환값: (tree, rows, cols) - 트리의 n번째 점이 원래 격자의 (rows[n], cols[n]) 셀
+    """
+    if bounds is None:
+        mask = np.ones(lon_api.shape, dtype=bool)
+    else:
+        minx, miny, maxx, maxy = bounds
+        mask = (
+            (lon_api >= minx - margin) & (lon_api <= maxx + margin) &
+            (lat_api >= miny - margin) & (lat_api <= maxy + margin)
+        )
+    rows, cols = np.nonzero(mask)
+    tree = cKDTree(lonlat_to_xyz(lon_api[rows, cols], lat_api[rows, cols]))
+    return tree, rows, cols
+
+
+def snap_to_kma_grid(lon, lat, lon_api, lat_api, tree, rows, cols):
+    """
+    각 점을 가장 가까운 KMA 격자 셀로 보냅니다. (kma_i, kma_j, kma_cell, kma_lon, kma_lat, kma_dist_m)
+    """
+    chord, idx = tree.query(lonlat_to_xyz(lon, lat))
+    kma_i = rows[idx]
+    kma_j = cols[idx]
+    return pd.DataFrame({
+        'kma_i': kma_i,
+        'kma_j': kma_j,
+        'kma_cell': kma_i.astype(np.int64) * lon_api.shape[1] + kma_j,
+        'kma_lon': lon_api[kma_i, kma_j],
+        'kma_lat': lat_api[kma_i, kma_j],
+        'kma_dist_m': 2 * EARTH_RADIUS_M * np.arcsin(np.clip(chord / 2, 0, 1)),
+    })
+
+
+def map_centroids_to_kma_grid(df_centroids, nc_file):
+    lon_api, lat_api = load_kma_grid(nc_file)
+    bounds = (df_centroids['lon'].min(), df_centroids['lat'].min(),
+              df_centroids['lon'].max(), df_centroids['lat'].max())
+    tree, rows, cols = build_kma_grid_tree(lon_api, lat_api, bounds)
+    snapped = snap_to_kma_grid(df_centroids['lon'], df_centroids['lat'], lon_api, lat_api, tree, rows, cols)
+    return pd.concat([df_centroids.reset_index(drop=True), snapped], axis=1)
+
+
+if __name__ == '__main__':
+    df_centroids = pd.read_csv('500m_grid_centroids.csv')
+    df_mapped = map_centroids_to_kma_grid(df_centroids, './nc/sfc_grid_latlon.nc')
+    df_mapped.to_csv('500m_grid_centroids_kma.csv', index=False)
+
+    n_cells = df_mapped['kma_cell'].nunique()
+    print(f"500m 중심점 {len(df_mapped)}개 → KMA 격자 셀 {n_cells}개 "
+          f"(요청 수 {len(df_mapped) / n_cells:.1f}배 감소, 최대 거리 {df_mapped['kma_dist_m'].max():.0f}m)")
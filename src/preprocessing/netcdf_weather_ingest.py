@@ -0,0 +1,121 @@
+import sys
+import os
+import netCDF4 as nc
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.map_centroids_to_kma_grid import load_kma_grid, build_kma_grid_tree, snap_to_kma_grid
+
+# API 수집기(parse 결과)와 같은 컬럼 이름. 값은 NetCDF 안의 변수 이름
+WEATHER_VARIABLES = {"ta": "ta", "hm": "hm", "td": "td", "ws_10m": "ws_10m", "rn_60m": "rn_60m", "sd_3hr": "sd_3hr"}
+
+
+def build_sample_index(df_points, lon_api, lat_api, margin=0.05):
+    """
+    대상 점(lon, lat)마다 가장 가까운 KMA 격자 셀을 찾고, 모든 점을 덮는 최소 직사각형 창(window)을 구합니다.
+    반환값: {"window": (i0, i1, j0, j1), "flat": 창 안에서의 1차원 인덱스 배열, "snapped": 스냅 결과}
+    """
+    bounds = (df_points['lon'].min(), df_points['lat'].min(), df_points['lon'].max(), df_points['lat'].max())
+    tree, rows, cols = build_kma_grid_tree(lon_api, lat_api, bounds, margin)
+    snapped = snap_to_kma_grid(df_points['lon'], df_points['lat'], lon_api, lat_api, tree, rows, cols)
+
+    kma_i = snapped['kma_i'].to_numpy()
+    kma_j = snapped['kma_j'].to_numpy()
+    i0, i1 = int(kma_i.min()), int(kma_i.max()) + 1
+    j0, j1 = int(kma_j.min()), int(kma_j.max()) + 1
+    flat = (kma_i - i0) * (j1 - j0) + (kma_j - j0)
+    return {"window": (i0, i1, j0, j1), "flat": flat, "snapped": snapped}
+
+
+def select_time_range(time_var, start, end):
+    """
+    time 변수에서 [start, end] 에 해당하는 구간만 slice 로 돌려줍니다. (time 은 오름차순이라고 가정)
+    """
+    calendar = getattr(time_var, 'calendar', 'standard')
+    times = time_var[:]
+    lo = nc.date2num(pd.Timestamp(start).to_pydatetime(), time_var.units, calendar)
+    hi = nc.date2num(pd.Timestamp(end).to_pydatetime(), time_var.units, calendar)
+    t0 = int(np.searchsorted(times, lo, side='left'))
+    t1 = int(np.searchsorted(times, hi, side='right'))
+    return slice(t0, t1)
+
+
+def read_window(ds, var_name, time_slice, window):
+    # 창과 시간 구간에 해당하는 hyperslab 만 디스크에서 읽음 (time, y, x)
+    i0, i1, j0, j1 = window
+    values = ds.variables[var_name][time_slice, i0:i1, j0:j1]
+    return np.ma.filled(np.ma.asarray(values, dtype=np.float32), np.nan)
+
+
+def sample_netcdf_file(nc_file, df_points, index, start, end, variables=WEATHER_VARIABLES, id_columns=()):
+    """
+    격자 NetCDF 파일 하나에서 모든 대상 점의 시간별 값을 한 번에 뽑아 API 수집기와 같은 형태의 표로 만듭니다.
+    (id_columns, lon, lat, date, timestamp, ta, hm, td, ws_10m, rn_60m, sd_3hr)
+    """
+    with nc.Dataset(nc_file) as ds:
+        time_var = ds.variables['time']
+        time_slice = select_time_range(time_var, start, end)
+        times = nc.num2date(time_var[time_slice], time_var.units, getattr(time_var, 'calendar', 'standard'),
+                            only_use_cftime_datetimes=False, only_use_python_datetimes=True)
+        stamps = pd.DatetimeIndex(times)
+        n_times, n_points = len(stamps), len(df_points)
+
+        table = {col: np.tile(df_points[col].to_numpy(), n_times) for col in id_columns}
+        table['lon'] = np.tile(df_points['lon'].to_numpy(), n_times)
+        table['lat'] = np.tile(df_points['lat'].to_numpy(), n_times)
+        table['date'] = np.repeat(stamps.strftime('%Y%m%d').to_numpy(), n_points)
+        table['timestamp'] = np.repeat(stamps.strftime('%Y%m%d%H%M').astype(np.int64), n_points)
+        for col, var_name in variables.items():
+            if var_name not in ds.variables:
+                table[col] = np.full(n_times * n_points, np.nan, dtype=np.float32)
+                continue
+            values = read_window(ds, var_name, time_slice, index['window'])
+            # (time, y, x) → (time, y*x) 로 펼친 뒤 미리 계산한 인덱스로 모든 점을 한 번에 샘플링
+            table[col] = values.reshape(n_times, -1)[:, index['flat']].ravel()
+    return pd.DataFrame(table)
+
+
+def ingest_netcdf_weather(nc_files, df_points, latlon_file, start, end, variables=WEATHER_VARIABLES, id_columns=()):
+    """
+    여러 격자 NetCDF 파일(예: 일별/월별)을 차례로 읽어 하나의 표로 합칩니다.
+    격자 좌표(latlon_file)와 샘플링 인덱스는 처음 한 번만 계산합니다.
+    """
+    lon_api, lat_api = load_kma_grid(latlon_file)
+    index = build_sample_index(df_points, lon_api, lat_api)
+    frames = [sample_netcdf_file(f, df_points, index, start, end, variables, id_columns) for f in nc_files]
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame(columns=list(id_columns) + ['lon', 'lat', 'date', 'timestamp'] + list(variables))
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_100m_cell_centers(shp_file='100m.shp'):
+    # 100m 격자 중심점을 경위도로 변환 (gid 유지)
+    gdf_100 = gpd.read_file(shp_file)
+    centers = gpd.GeoDataFrame({'gid': gdf_100['gid']}, geometry=gdf_100.geometry.centroid, crs=gdf_100.crs)
+    centers = centers.to_crs(epsg=4326)
+    return pd.DataFrame({'gid': centers['gid'], 'lon': centers.geometry.x, 'lat': centers.geometry.y})
+
+
+if __name__ == '__main__':
+    import glob
+    import time
+
+    nc_files = sorted(glob.glob('./nc/weather/*.nc'))
+    latlon_file = './nc/sfc_grid_latlon.nc'
+    start, end = '2023-01-01 00:00', '2023-01-31 23:00'
+
+    started = time.perf_counter()
+    df_500 = pd.read_csv('500m_grid_centroids.csv')
+    df_500m_weather = ingest_netcdf_weather(nc_files, df_500, latlon_file, start, end)
+    df_500m_weather.to_csv('parsed_weather_data_netcdf_500m.csv', index=False)
+
+    df_100 = load_100m_cell_centers('100m.shp')
+    df_100m_weather = ingest_netcdf_weather(nc_files, df_100, latlon_file, start, end, id_columns=('gid',))
+    df_100m_weather.to_csv('parsed_weather_data_netcdf_100m.csv', index=False)
+
+    print(f"500m {len(df_500m_weather)}행, 100m {len(df_100m_weather)}행 저장 완료 "
+          f"({time.perf_counter() - started:.1f}초)")
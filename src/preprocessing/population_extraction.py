@@ -1,8 +1,14 @@
+import sys
+import os
 import geopandas as gpd
 import pandas as pd
 import koreanize_matplotlib
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.grid_code import load_grid, gid_to_key
+
 def load_population_data(csv_paths):
     dfs = [pd.read_csv(path, encoding='cp949')[['GID', 'A60']] for path in csv_paths]
     df_concat = pd.concat(dfs)
@@ -11,15 +17,17 @@ def load_population_data(csv_paths):
     return df_avg
 
 def merge_population_with_gdf(shp_path, df_pop):
-    gdf = gpd.read_file(shp_path)
+    # shp 에서는 gid 만 읽고 셀 폴리곤은 gid 좌표로 계산, 병합은 gid 문자열 대신 int64 셀 키로 수행
+    gdf = load_grid(shp_path)
     gdf = gdf.to_crs(epsg=3857)
-    gdf["gid"] = gdf["gid"].astype(str)
-    df_pop["gid"] = df_pop["gid"].astype(str)
-    gdf_merged = gdf.merge(df_pop, on="gid", how="left")
+    gdf["cell_key"] = gid_to_key(gdf["gid"])
+    df_pop = df_pop.assign(cell_key=gid_to_key(df_pop["gid"])).drop(columns="gid")
+    gdf_merged = gdf.merge(df_pop, on="cell_key", how="left").drop(columns="cell_key")
     return gdf_merged
 
-def extract_top50_gid500(gdf_merged, output_path):
-    top_n = int(len(gdf_merged) * 0.5)
+def extract_top50_gid500(gdf_merged, output_path, top_percent=0.5):
+    # 다른 비율 조합은 criteria_table 순위 표로 파일 재처리 없이 확인 가능
+    top_n = int(len(gdf_merged) * top_percent)
     gdf_top50 = gdf_merged.nlargest(top_n, 'total_count')
     gdf_top_gid500 = gpd.GeoDataFrame(
         gdf_top50[['gid_500']].copy(),
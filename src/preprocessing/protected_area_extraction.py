@@ -1,3 +1,5 @@
+import sys
+import os
 import pandas as pd
 import geopandas as gpd
 from shapely.geometry import Point
@@ -5,23 +7,12 @@ import matplotlib.pyplot as plt
 import contextily as ctx
 import koreanize_matplotlib
 
-# 1. 좌표 입력
-points = [
-    (127.091743, 37.557558),
-    (127.100496, 37.541105),
-    (127.100646, 37.548106),
-    (127.098655, 37.553036),
-    (127.089106, 37.530348),
-    (127.088346, 37.564860),
-    (127.083542, 37.558158),
-    (127.104934, 37.548403),
-    (127.097621, 37.553968),
-    (127.082961, 37.564937),
-    (127.096317, 37.550054),
-    (127.071287, 37.530952),
-    (127.096383, 37.552830),
-    (127.097188, 37.550597),
-]
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.criteria_stack import PROTECTED_POINTS
+
+# 1. 좌표 입력 (보호구역 주소 좌표는 criteria_stack 과 같은 목록 사용)
+points = PROTECTED_POINTS
 
 # 2. 주소 포인트 → GeoDataFrame
 addr_gdf = gpd.GeoDataFrame(
@@ -1,86 +1,69 @@
-import numpy as np
-import rasterio
-from rasterio.plot import plotting_extent
-from rasterstats import zonal_stats
+import sys
+import os
 import geopandas as gpd
 import koreanize_matplotlib
 import matplotlib.pyplot as plt
 
-# 파일 경로 설정 (성동구 2022 DEM 자료와 100m 격자 shapefile)
-dem_path = '37705.img'             # 성동구 2022 DEM 자료
-grid_shp_path = '100m격자.shp'       # 광진구에 해당하는 100m 격자 shapefile
-slope_raster_path = 'slope.tif'      # 계산된 기울기 레스터 저장 경로
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-# 1. DEM으로부터 기울기(경사도) 계산하기
-with rasterio.open(dem_path) as src:
-    dem = src.read(1, masked=True)
-    transform = src.transform
-    crs = src.crs
-    resolution = src.res[0]
-    
-    # x, y 방향 기울기 계산 (numpy.gradient 이용)
-    dzdx, dzdy = np.gradient(dem, resolution, resolution)
-    # 각 픽셀의 기울기를 계산 (라디안 단위 → 도 단위 변환)
-    slope_rad = np.arctan(np.sqrt(dzdx**2 + dzdy**2))
-    slope_deg = np.degrees(slope_rad)
+from preprocessing.terrain import write_terrain_rasters
+from preprocessing.zonal_stats import zonal_stats_raster
 
-# 2. 계산된 기울기 데이터를 GeoTIFF 파일로 저장
-with rasterio.open(
-    slope_raster_path, 'w',
-    driver='GTiff',
-    height=slope_deg.shape[0],
-    width=slope_deg.shape[1],
-    count=1,
-    dtype=slope_deg.dtype,
-    crs=crs,
-    transform=transform
-) as dst:
-    dst.write(slope_deg, 1)
+# 블록 병렬 처리(process pool)가 스크립트를 다시 실행하지 않도록 main 에서만 실행
+if __name__ == '__main__':
+    # 파일 경로 설정 (성동구 2022 DEM 자료와 100m 격자 shapefile)
+    dem_path = '37705.img'             # 성동구 2022 DEM 자료
+    grid_shp_path = '100m격자.shp'       # 광진구에 해당하는 100m 격자 shapefile
+    slope_raster_path = 'slope.tif'      # 계산된 기울기 레스터 저장 경로
 
-print("DEM 자료로부터 기울기(경사도) 계산 완료 및 파일 저장됨.")
+    # 1~2. DEM으로부터 기울기(경사도) 계산 및 GeoTIFF 파일로 저장
+    # (블록 + 1픽셀 halo 단위로 병렬 계산하여 tiled / 압축 GeoTIFF 로 저장, 전체 배열 np.gradient 결과와 같음)
+    write_terrain_rasters(dem_path, {'slope': slope_raster_path}, masked=True)
 
-# 3. 100m 격자별 최대 경사도 계산
-grid = gpd.read_file(grid_shp_path)
-stats = zonal_stats(grid_shp_path, slope_raster_path, stats=['max'])
-grid['max_slope'] = [s['max'] for s in stats]
+    print("DEM 자료로부터 기울기(경사도) 계산 완료 및 파일 저장됨.")
 
-print("각 격자별 최대 경사도 계산 완료.")
-print(grid[['max_slope']].head())
+    # 3. 100m 격자별 최대 경사도 계산
+    # 격자 라벨 래스터 한 장으로 모든 셀의 최대값을 한 번에 계산 (라벨은 zonal_cache 에 저장되어 재실행 시 재사용)
+    grid = gpd.read_file(grid_shp_path)
+    grid['max_slope'] = zonal_stats_raster(slope_raster_path, grid, stats=('max',))['max']
 
-# 4. 시각화: 격자별 최대 경사도 choropleth 지도 생성
-fig, ax = plt.subplots(figsize=(10, 10))
-grid.plot(column='max_slope', ax=ax, cmap='viridis', legend=True, 
-          edgecolor='black', linewidth=0.5)
-ax.set_title("광진구 100m 격자별 최대 경사도")
-ax.set_xlabel("X 좌표")
-ax.set_ylabel("Y 좌표")
-plt.show()
+    print("각 격자별 최대 경사도 계산 완료.")
+    print(grid[['max_slope']].head())
 
-# 5. CSV 내보내기 전에 gid 인코딩 수정  
-# (이미 grid 객체에 max_slope 컬럼 및 기타 정보가 있으므로 이를 그대로 사용)
-if 'gid' in grid.columns:
-    def fix_gid(x):
-        try:
-            # 경우에 따라 'latin1' 대신 다른 인코딩을 시도할 수 있음
-            return x.encode('latin1').decode('cp949')
-        except Exception:
-            return x
-    grid['gid'] = grid['gid'].apply(fix_gid)
+    # 4. 시각화: 격자별 최대 경사도 choropleth 지도 생성
+    fig, ax = plt.subplots(figsize=(10, 10))
+    grid.plot(column='max_slope', ax=ax, cmap='viridis', legend=True, 
+              edgecolor='black', linewidth=0.5)
+    ax.set_title("광진구 100m 격자별 최대 경사도")
+    ax.set_xlabel("X 좌표")
+    ax.set_ylabel("Y 좌표")
+    plt.show()
 
-# 6. "max_slope"를 기준으로 순위(rank) 컬럼 생성 (높은 경사도에 낮은 순위 번호)
-grid['rank'] = grid['max_slope'].rank(method='min', ascending=False)
+    # 5. CSV 내보내기 전에 gid 인코딩 수정  
+    # (이미 grid 객체에 max_slope 컬럼 및 기타 정보가 있으므로 이를 그대로 사용)
+    if 'gid' in grid.columns:
+        def fix_gid(x):
+            try:
+                # 경우에 따라 'latin1' 대신 다른 인코딩을 시도할 수 있음
+                return x.encode('latin1').decode('cp949')
+            except Exception:
+                return x
+        grid['gid'] = grid['gid'].apply(fix_gid)
 
-# 7. geometry 컬럼 제거 후 DataFrame 변환
-grid_df = grid.drop(columns='geometry')
+    # 6. "max_slope"를 기준으로 순위(rank) 컬럼 생성 (높은 경사도에 낮은 순위 번호)
+    grid['rank'] = grid['max_slope'].rank(method='min', ascending=False)
 
-# 8. 전체 데이터 CSV 저장 (경사도 및 순위 포함)
-csv_all = 'grid_with_slope_and_rank_fixed.csv'
-grid_df.to_csv('grid_with_slope_and_rank_fixed.csv', index=False, encoding='utf-8-sig')
-print('전체 격자 데이터 저장')
+    # 7. geometry 컬럼 제거 후 DataFrame 변환
+    grid_df = grid.drop(columns='geometry')
 
-# 9. 상위 50% 데이터(경사도 높은 순) 저장
-n_total = len(grid_df)
-top_half = grid_df.sort_values(by='max_slope', ascending=False).head(n_total // 2)
-csv_top = 'top_half_slope_fixed.csv'
-top_half.to_csv('top_half_slope_fixed.csv', index=False, encoding='utf-8-sig')
-print("상위 50% 격자 데이터 저장되었습니다.")
+    # 8. 전체 데이터 CSV 저장 (경사도 및 순위 포함)
+    csv_all = 'grid_with_slope_and_rank_fixed.csv'
+    grid_df.to_csv('grid_with_slope_and_rank_fixed.csv', index=False, encoding='utf-8-sig')
+    print('전체 격자 데이터 저장')
+
+    # 9. 상위 50% 데이터(경사도 높은 순) 저장
+    n_total = len(grid_df)
+    top_half = grid_df.sort_values(by='max_slope', ascending=False).head(n_total // 2)
+    csv_top = 'top_half_slope_fixed.csv'
+    top_half.to_csv('top_half_slope_fixed.csv', index=False, encoding='utf-8-sig')
+    print("상위 50% 격자 데이터 저장되었습니다.")
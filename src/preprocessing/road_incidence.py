@@ -0,0 +1,136 @@
+import sys
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.grid_code import load_grid
+from preprocessing.road_network import ROAD_STORE_DIR, STORE_CRS, EDGE_INDEX, ensure_road_store, load_road_edges, write_geoparquet
+
+GRID_PATH = "./shp/100m_500m.shp"
+INCIDENCE_NAME = "edge_cells"
+SHP_SIDECARS = (".shp", ".shx", ".dbf", ".prj")
+
+
+########################################
+# 1. 선분 × 셀 자르기 (STRtree)
+########################################
+def line_parts(geoms):
+    # 교차 결과 중 선분만 (overlay(keep_geom_type) 처럼 점 / 빈 도형은 버림)
+    geoms = np.asarray(geoms, dtype=object)
+    collection = shapely.get_type_id(geoms) == 7
+    if collection.any():
+        fixed = []
+        for geom in geoms[collection]:
+            lines = [g for g in shapely.get_parts(geom) if g.geom_type in ("LineString", "MultiLineString")]
+            fixed.append(shapely.line_merge(shapely.union_all(lines)) if lines else shapely.LineString())
+        geoms = geoms.copy()
+        geoms[collection] = fixed
+    return geoms
+
+
+def line_cell_pairs(lines, cells):
+    """
+    선분 배열과 셀 polygon 배열의 교차 쌍을 STRtree 로 찾아 잘라 줍니다.
+    반환: (선분 번호, 셀 번호, 잘린 선분) - 길이 0 인 교차(경계에만 닿음)는 overlay 결과처럼 제외
+    """
+    lines = np.asarray(lines, dtype=object)
+    cells = np.asarray(cells, dtype=object)
+    tree = shapely.STRtree(cells)
+    line_idx, cell_idx = tree.query(lines, predicate="intersects")
+    clipped = line_parts(shapely.intersection(lines[line_idx], cells[cell_idx]))
+    keep = shapely.length(clipped) > 0
+    order = np.lexsort((cell_idx[keep], line_idx[keep]))
+    return line_idx[keep][order], cell_idx[keep][order], clipped[keep][order]
+
+
+########################################
+# 2. 도로 edge × 100m 셀 대응표 (원본이 바뀌면 자동으로 다시 만듦)
+########################################
+def file_fingerprint(path):
+    # 파일 내용 해시 (shp 는 같은 이름의 .shx / .dbf / .prj 까지)
+    stem, ext = os.path.splitext(path)
+    paths = [stem + s for s in SHP_SIDECARS] if ext.lower() == ".shp" else [path]
+    digest = hashlib.sha1()
+    for p in paths:
+        if os.path.exists(p):
+            with open(p, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+def source_fingerprints(grid_path, store_dir):
+    return {"grid": file_fingerprint(grid_path),
+            "edges": file_fingerprint(os.path.join(store_dir, "edges.parquet"))}
+
+
+def build_edge_cells(grid_path=GRID_PATH, store_dir=ROAD_STORE_DIR):
+    """
+    도로 edge 를 100m 격자 셀마다 잘라 (edge 번호, u, v, key, gid, 잘린 geometry, 길이) 표로 저장합니다.
+    어떤 셀 선정 결과든 이 표와 gid 로 조인하면 overlay(edges, 선정 셀) 과 같은 조각을 얻습니다.
+    """
+    ensure_road_store(store_dir)
+    edges = load_road_edges(store_dir, columns=EDGE_INDEX + ["geometry"])
+    grid = load_grid(grid_path).to_crs(STORE_CRS)
+    edge_idx, cell_idx, clipped = line_cell_pairs(edges.geometry.to_numpy(), grid.geometry.to_numpy())
+
+    table = gpd.GeoDataFrame({"edge_id": edge_idx}, geometry=list(clipped), crs=STORE_CRS)
+    for col in EDGE_INDEX:
+        table[col] = edges[col].to_numpy()[edge_idx]
+    table["gid"] = grid["gid"].to_numpy()[cell_idx]
+    table["length"] = shapely.length(clipped)
+    table = table[["edge_id"] + EDGE_INDEX + ["gid", "length", "geometry"]]
+
+    write_geoparquet(table, os.path.join(store_dir, f"{INCIDENCE_NAME}.parquet"))
+    meta = {"grid": os.path.abspath(grid_path), "sources": source_fingerprints(grid_path, store_dir),
+            "n_pairs": len(table), "n_edges": len(edges), "n_cells": len(grid)}
+    with open(os.path.join(store_dir, f"{INCIDENCE_NAME}.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return table
+
+
+def load_edge_cells(grid_path=GRID_PATH, store_dir=ROAD_STORE_DIR):
+    # 저장된 대응표. 격자 / 도로망 파일 해시가 저장 당시와 다르거나 표가 없으면 다시 만듦
+    meta_path = os.path.join(store_dir, f"{INCIDENCE_NAME}.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        ensure_road_store(store_dir)
+        if meta.get("sources") == source_fingerprints(grid_path, store_dir):
+            table = gpd.read_parquet(os.path.join(store_dir, f"{INCIDENCE_NAME}.parquet"))
+            return table.drop(columns="bbox", errors="ignore")
+    return build_edge_cells(grid_path, store_dir)
+
+
+def edges_in_cells(cells, grid_path=GRID_PATH, store_dir=ROAD_STORE_DIR, edge_columns=None):
+    """
+    선정 셀(gid 컬럼이 있는 표, 예: overlap_final.shp) 안의 도로 조각을 gid 조인으로 돌려줍니다.
+    gpd.overlay(edges, cells, how="intersection") 대신 사용하며, edge 속성(road_name 등)과 셀 속성이 함께 붙습니다.
+    """
+    pieces = load_edge_cells(grid_path, store_dir)
+    cell_attrs = pd.DataFrame(cells.drop(columns=cells.geometry.name)) if isinstance(cells, gpd.GeoDataFrame) else cells
+    pieces = pieces.merge(cell_attrs, on="gid", how="inner")
+    columns = None if edge_columns is None else list(dict.fromkeys(EDGE_INDEX + list(edge_columns) + ["geometry"]))
+    # edge 원래 길이(length)는 잘린 길이와 겹치므로 length_edge 로
+    edges = pd.DataFrame(load_road_edges(store_dir, columns=columns).drop(columns="geometry"))
+    joined = pieces.merge(edges, on=EDGE_INDEX, how="left", suffixes=("", "_edge"))
+    return gpd.GeoDataFrame(joined, geometry="geometry", crs=STORE_CRS)
+
+
+if __name__ == '__main__':
+    import time
+
+    start = time.perf_counter()
+    table = build_edge_cells()
+    print(f"edge × 셀 대응표 저장: {len(table)}개 조각 ({time.perf_counter() - start:.2f}초)")
+
+    start = time.perf_counter()
+    overlap = gpd.read_file("./shp/overlap_final.shp")
+    pieces = edges_in_cells(overlap)
+    print(f"overlap_final 안 도로 조각 {len(pieces)}개 ({time.perf_counter() - start:.3f}초)")
@@ -0,0 +1,138 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# road_name 은 OSM 의 여러 도로명을 ", " 로 이어 붙인 문자열 (road_network 저장소와 같은 구분자)
+NAME_SEPARATOR = ", "
+TOKEN = "token"          # 도로명 단위 정확히 일치 (광장로1길 ≠ 광장로11길)
+SUBSTRING = "substring"  # 기존 any(rd in name ...) 와 같은 부분 문자열 일치
+
+
+def normalize_name(name):
+    # 도로명 비교용: 공백 제거 ("자양로 50길" → "자양로50길")
+    return "".join(str(name).split())
+
+
+class AhoCorasick:
+    """
+    여러 패턴을 한 번에 찾는 Aho-Corasick 자동자. 문자열을 한 번 훑어 포함된 패턴 번호를 모두 찾습니다.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+        for i, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(set())
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.output[state].add(i)
+
+        # 너비 우선으로 실패 링크 연결, 실패 상태의 출력도 합쳐 둠
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] |= self.output[self.fail[nxt]]
+
+    def _step(self, state, ch):
+        while state and ch not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(ch, 0)
+
+    def search(self, text):
+        # text 에 포함된 패턴 번호 집합
+        found = set()
+        state = 0
+        for ch in text:
+            state = self._step(state, ch)
+            found |= self.output[state]
+        return found
+
+    def contains_any(self, text):
+        state = 0
+        for ch in text:
+            state = self._step(state, ch)
+            if self.output[state]:
+                return True
+        return False
+
+
+class RoadNameMatcher:
+    """
+    도로명 목록으로 한 번 만들어 두고 road_name 컬럼 전체에 적용하는 매처입니다.
+    같은 road_name 은 한 번만 검사하므로(고유값 기준) 비용은 (고유 도로명 수 × 도로명 길이) 입니다.
+    mode="token": road_name 을 ", " 로 나눈 도로명 중 하나가 목록과 정확히 같으면 일치 (공백 무시)
+    mode="substring": 목록의 도로명이 road_name 어딘가에 포함되면 일치 (기존 방식)
+    """
+
+    def __init__(self, names, mode=TOKEN):
+        if mode not in (TOKEN, SUBSTRING):
+            raise ValueError(f"알 수 없는 매칭 방식: {mode}")
+        names = pd.Series(list(names), dtype=object).dropna().astype(str)
+        self.mode = mode
+        if mode == TOKEN:
+            self.names = pd.unique(names.map(normalize_name))
+            self._index = {name: i for i, name in enumerate(self.names)}
+        else:
+            self.names = pd.unique(names)
+            self._automaton = AhoCorasick(self.names)
+
+    @classmethod
+    def from_csv(cls, csv_path, column="도로명", encoding="utf-8-sig", mode=TOKEN):
+        df = pd.read_csv(csv_path, encoding=encoding)
+        df.columns = df.columns.str.strip()
+        return cls(df[column], mode)
+
+    def _matches(self, road_name):
+        # road_name 하나에서 찾은 목록 도로명 번호 집합
+        if self.mode == TOKEN:
+            tokens = (normalize_name(token) for token in road_name.split(NAME_SEPARATOR.strip()))
+            return {self._index[token] for token in tokens if token in self._index}
+        return self._automaton.search(road_name)
+
+    def _unique_apply(self, road_names, func, empty):
+        # 고유 road_name 마다 func 를 한 번씩 적용해 행별 값으로 펼침 (NaN / 문자열 아님은 empty)
+        values = pd.Series(road_names, dtype=object)
+        codes, uniques = pd.factorize(values)
+        table = np.empty(len(uniques) + 1, dtype=object)
+        table[:-1] = [func(name) if isinstance(name, str) else empty for name in uniques]
+        table[-1] = empty
+        # factorize 는 NaN 을 -1 로 주므로 마지막 칸(empty)을 가리킴 (모두 NaN 이어도 안전)
+        return table[codes]
+
+    def match(self, road_names):
+        """
+        road_name 배열 / Series 의 각 값이 목록과 일치하는지 bool 배열로 돌려줍니다. (NaN / 문자열 아님은 False)
+        """
+        if self.mode == SUBSTRING:
+            hit = self._unique_apply(road_names, self._automaton.contains_any, False)
+        else:
+            hit = self._unique_apply(road_names, lambda name: bool(self._matches(name)), False)
+        return hit.astype(bool)
+
+    def matched_names(self, road_names):
+        # 각 road_name 에서 일치한 목록 도로명 (", " 로 이어 붙임, 없으면 None)
+        def names_of(name):
+            found = sorted(self._matches(name))
+            return NAME_SEPARATOR.join(self.names[i] for i in found) if found else None
+
+        return pd.Series(self._unique_apply(road_names, names_of, None),
+                         index=getattr(road_names, "index", None), dtype=object)
+
+    def filter(self, gdf, column="road_name"):
+        # gdf 중 road_name 이 목록과 일치하는 행
+        return gdf[self.match(gdf[column])]
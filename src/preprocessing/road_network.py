@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import numpy as np
+import geopandas as gpd
+
+# 광진구 도로망 저장소 (GeoParquet, 한 번 만들어 두고 모든 도로 스크립트가 읽음)
+ROAD_STORE_DIR = "./data/road_network"
+BOUNDARY_PATH = "./shp/LARD_ADM_SECT_SGG_11_202502.shp"
+SGG_NM = "광진구"
+STORE_CRS = "EPSG:3857"
+EDGE_INDEX = ["u", "v", "key"]
+ROW_GROUP_SIZE = 2048
+
+# osmnx network_type="drive" 에서 제외하는 값 (OSM 추출 파일로 만들 때 같은 기준으로 거름)
+DRIVE_EXCLUDE = {
+    "highway": {"abandoned", "bridleway", "bus_guideway", "construction", "corridor", "cycleway", "elevator",
+                "escalator", "footway", "no", "path", "pedestrian", "planned", "platform", "proposed", "raceway",
+                "razed", "service", "steps", "track"},
+    "service": {"alley", "driveway", "emergency_access", "parking", "parking_aisle", "private"},
+    "area": {"yes"},
+    "access": {"private"},
+}
+
+
+########################################
+# 1. 도로망 만들기 (OSM 추출 파일 또는 최초 1회 다운로드)
+########################################
+def district_polygon(boundary_path=BOUNDARY_PATH, sgg_nm=SGG_NM):
+    # 시군구 경계 polygon (EPSG:4326), 기존 스크립트의 gwangjin.geometry.unary_union 과 같음
+    gdf = gpd.read_file(boundary_path, encoding="cp949")
+    return gdf[gdf["SGG_NM"] == sgg_nm].to_crs(epsg=4326).geometry.union_all()
+
+
+def drive_filter(edges):
+    # 태그 값이 리스트인 경우 하나라도 제외 값이면 제외
+    drop = np.zeros(len(edges), dtype=bool)
+    for tag, excluded in DRIVE_EXCLUDE.items():
+        if tag in edges.columns:
+            drop |= edges[tag].apply(
+                lambda v: any(x in excluded for x in (v if isinstance(v, list) else [v]))).to_numpy()
+    return edges[~drop]
+
+
+def graph_from_osm_extract(osm_path, polygon):
+    """
+    OSM XML 추출 파일(.osm)로 polygon 안의 차도 그래프를 만듭니다. 네트워크 접속이 필요 없습니다.
+    (.osm.pbf 는 osmium cat extract.osm.pbf -o extract.osm 으로 먼저 변환)
+    """
+    import osmnx as ox
+
+    graph = ox.graph_from_xml(osm_path, retain_all=True)
+    graph = ox.truncate.truncate_graph_polygon(graph, polygon)
+    nodes, edges = ox.graph_to_gdfs(graph)
+    edges = drive_filter(edges)
+    used = np.unique(np.concatenate([edges.index.get_level_values("u"), edges.index.get_level_values("v")]))
+    return ox.graph_from_gdfs(nodes.loc[nodes.index.isin(used)], edges)
+
+
+def flatten_list_columns(gdf):
+    # osmnx 가 여러 값을 리스트로 둔 속성(name, highway, osmid 등)을 ", " 로 이어 문자열로 (parquet 저장용)
+    gdf = gdf.copy()
+    for col in gdf.columns:
+        if col != gdf.geometry.name and gdf[col].dtype == object:
+            values = gdf[col].apply(lambda x: ", ".join(map(str, x)) if isinstance(x, list) else x)
+            # 리스트 / 단일 값이 섞여 있던 컬럼(osmid, lanes 등)은 문자열로 통일
+            gdf[col] = values.where(values.isna(), values.astype(str))
+    return gdf
+
+
+def write_geoparquet(gdf, path):
+    # Hilbert 순서로 정렬해 row group 마다 공간적으로 모이게 하고, bbox 컬럼으로 범위 읽기 지원
+    gdf = gdf.iloc[np.argsort(gdf.geometry.hilbert_distance().to_numpy(), kind="stable")]
+    tmp_path = f"{path}.tmp"
+    gdf.to_parquet(tmp_path, write_covering_bbox=True, row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp_path, path)
+
+
+def build_road_store(store_dir=ROAD_STORE_DIR, osm_path=None, boundary_path=BOUNDARY_PATH, sgg_nm=SGG_NM):
+    """
+    도로망(nodes / edges)을 GeoParquet 로 저장합니다. osm_path 가 있으면 추출 파일에서, 없으면 osmnx 로 한 번 다운로드합니다.
+    edges 에는 기존 스크립트가 매번 만들던 road_name(도로명 리스트 → 문자열) 컬럼을 미리 넣어 둡니다.
+    """
+    import osmnx as ox
+
+    polygon = district_polygon(boundary_path, sgg_nm)
+    if osm_path is not None:
+        graph = graph_from_osm_extract(osm_path, polygon)
+    else:
+        graph = ox.graph_from_polygon(polygon, network_type="drive")
+    nodes, edges = ox.graph_to_gdfs(graph)
+    edges["road_name"] = edges["name"].apply(lambda x: ", ".join(x) if isinstance(x, list) else x)
+
+    # graph_from_gdfs 는 노드 좌표를 geometry 가 아닌 x / y 컬럼에서 읽으므로 투영 좌표로 맞춰 둠
+    nodes = nodes.to_crs(STORE_CRS)
+    nodes["x"], nodes["y"] = nodes.geometry.x, nodes.geometry.y
+
+    os.makedirs(store_dir, exist_ok=True)
+    write_geoparquet(flatten_list_columns(nodes).reset_index(), os.path.join(store_dir, "nodes.parquet"))
+    write_geoparquet(flatten_list_columns(edges.to_crs(STORE_CRS)).reset_index(), os.path.join(store_dir, "edges.parquet"))
+    meta = {"source": os.path.abspath(osm_path) if osm_path else "osmnx.graph_from_polygon(network_type='drive')",
+            "boundary": os.path.abspath(boundary_path), "sgg_nm": sgg_nm, "crs": STORE_CRS,
+            "osmnx_version": ox.__version__, "n_nodes": len(nodes), "n_edges": len(edges),
+            "built_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+    with open(os.path.join(store_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return store_dir
+
+
+########################################
+# 2. 읽기 (네트워크 없이, bbox 범위만 읽기 가능)
+########################################
+def ensure_road_store(store_dir=ROAD_STORE_DIR, osm_path=None):
+    # 저장소가 없을 때만 만듦
+    if not os.path.exists(os.path.join(store_dir, "meta.json")):
+        build_road_store(store_dir, osm_path)
+    return store_dir
+
+
+def _read_store(store_dir, name, bbox=None, columns=None):
+    path = os.path.join(ensure_road_store(store_dir), f"{name}.parquet")
+    gdf = gpd.read_parquet(path, bbox=bbox, columns=columns)
+    return gdf.drop(columns="bbox", errors="ignore")
+
+
+def load_road_edges(store_dir=ROAD_STORE_DIR, bbox=None, columns=None):
+    """
+    광진구 차도 edges (EPSG:3857, road_name 포함). bbox=(minx, miny, maxx, maxy) 를 주면 그 범위의 row group 만 읽습니다.
+    """
+    return _read_store(store_dir, "edges", bbox, columns)
+
+
+def load_road_nodes(store_dir=ROAD_STORE_DIR, bbox=None, columns=None):
+    return _read_store(store_dir, "nodes", bbox, columns)
+
+
+def load_road_graph(store_dir=ROAD_STORE_DIR):
+    # 경로 탐색 등 그래프가 필요할 때만 (osmnx 필요)
+    import osmnx as ox
+
+    nodes = load_road_nodes(store_dir).set_index("osmid")
+    # 이전에 만든 저장소는 x / y 가 경위도로 남아 있을 수 있어 geometry 기준으로 다시 채움
+    nodes["x"], nodes["y"] = nodes.geometry.x, nodes.geometry.y
+    edges = load_road_edges(store_dir).set_index(EDGE_INDEX)
+    return ox.graph_from_gdfs(nodes, edges)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="광진구 도로망 GeoParquet 저장소 만들기")
+    parser.add_argument("--osm", default=None, help="OSM XML 추출 파일 (없으면 osmnx 로 1회 다운로드)")
+    parser.add_argument("--store", default=ROAD_STORE_DIR)
+    args = parser.parse_args()
+
+    build_road_store(args.store, args.osm)
+    start = time.perf_counter()
+    edges = load_road_edges(args.store)
+    print(f"도로망 저장 완료: {args.store} (edges {len(edges)}개, 읽기 {time.perf_counter() - start:.3f}초)")
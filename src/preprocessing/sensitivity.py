@@ -0,0 +1,262 @@
+import sys
+import os
+import itertools
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from shapely import wkt
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.grid_code import load_grid, gid_to_key
+from preprocessing.freezing_detection import SCENARIOS
+from preprocessing.criteria_table import CriteriaTable, add_500_criterion, ABSENT
+from preprocessing.terrain import map_windows
+from preprocessing.road_incidence import line_cell_pairs
+
+# 결빙 기준으로 쓸 수 있는 건수 컬럼 (시나리오 5개 + 전체)
+FREEZE_COLUMNS = list(SCENARIOS) + ["total_count"]
+# overlap_final 선정 조건 항: (A60, 경사도, 결빙) 은 셀 단위, 접근성은 500m 격자 안에 하나라도 있으면
+CELL_TERMS = ("pop", "slope", "freeze")
+AREA_TERM = "access"
+FIXED_ACCESS = "access_opt"
+COMBO_CHUNK = 256
+
+
+########################################
+# 1. 입력 준비 (결빙 시나리오 기준 / 도로 구간 / 구간-셀 대응)
+########################################
+def add_freeze_scenarios(table, scenario_csv_path, key="gid"):
+    """
+    시나리오별 결빙 건수 CSV(freezing_detection 출력)의 컬럼마다 500m 결빙 기준 freeze_<컬럼> 을 추가합니다.
+    """
+    df = pd.read_csv(scenario_csv_path)
+    names = []
+    for col in FREEZE_COLUMNS:
+        if col in df.columns:
+            name = f"freeze_{col}"
+            add_500_criterion(table, name, df[key].to_numpy(), df[col].to_numpy())
+            names.append(name)
+    return names
+
+
+def add_fixed_access(table, opt_csv_path, name=FIXED_ACCESS):
+    # 이미 선정된 접근성 취약 셀(opt.csv) 을 순위 0 / ABSENT 기준으로 (비율과 관계없이 고정)
+    df = pd.read_csv(opt_csv_path)
+    df.columns = df.columns.str.lower()
+    inside = np.isin(gid_to_key(table.gids), gid_to_key(df["gid"].astype(str)))
+    table.add_criterion(name, np.where(inside, 0, ABSENT), 1, values=inside.astype(np.float64))
+    return name
+
+
+def load_segments(csv_path):
+    # 도로 구간 CSV (road_name, geometry(WKT), [score]) → EPSG:3857 GeoDataFrame
+    try:
+        df = pd.read_csv(csv_path, encoding="utf-8-sig")
+    except UnicodeDecodeError:
+        df = pd.read_csv(csv_path, encoding="cp949")
+    df["geometry"] = df["geometry"].apply(wkt.loads)
+    if "score" not in df.columns:
+        df["score"] = 0
+    return gpd.GeoDataFrame(df, geometry="geometry", crs="EPSG:3857")
+
+
+def segment_cell_incidence(segments, grid):
+    """
+    도로 구간 × 100m 셀 대응(구간 안쪽이 셀과 겹치는 경우, overlay(intersection) 결과에 남는 조합)을
+    CSR 배열 (indptr, cell_rows) 로 만듭니다. 구간 i 의 셀 = cell_rows[indptr[i]:indptr[i + 1]]
+    """
+    cells = grid.to_crs(segments.crs).geometry.to_numpy()
+    seg_idx, cell_idx, _ = line_cell_pairs(segments.geometry.to_numpy(), cells)
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(seg_idx, minlength=len(segments)))])
+    return indptr.astype(np.int64), cell_idx.astype(np.int64)
+
+
+########################################
+# 2. 파라미터 조합 → (기준 행, 선정 수) 배열
+########################################
+def build_parameter_grid(table, percents, freeze_criteria, min_scores=(0,)):
+    """
+    기준별 비율 목록 × 결빙 시나리오 × 최소 도로 점수의 모든 조합을 만듭니다.
+    percents 예: {"pop": [0.3, 0.5, 0.7], "slope": [...], "freeze": [...], "access": [...]}
+    접근성 비율이 없으면 고정 접근성(access_opt) 기준을 씁니다.
+    반환: (조합 DataFrame, terms (조합, 4, 2) int64: 항별 (순위 행 번호, 선정 수), 최소 점수 배열)
+    """
+    names = table.criteria
+    access_levels = percents.get(AREA_TERM) or [1.0]
+    access_name = AREA_TERM if percents.get(AREA_TERM) else FIXED_ACCESS
+    axes = [percents["pop"], percents["slope"], list(freeze_criteria), percents["freeze"], access_levels, list(min_scores)]
+    rows = list(itertools.product(*axes))
+    params = pd.DataFrame(rows, columns=["pop", "slope", "freeze_scenario", "freeze", "access", "min_score"])
+
+    terms = np.empty((len(params), 4, 2), dtype=np.int64)
+    for i, name in enumerate(CELL_TERMS[:2]):
+        terms[:, i, 0] = names.index(name)
+        terms[:, i, 1] = table.limit(name, params[name].to_numpy())
+    for scenario in params["freeze_scenario"].unique():
+        hit = (params["freeze_scenario"] == scenario).to_numpy()
+        terms[hit, 2, 0] = names.index(scenario)
+        terms[hit, 2, 1] = table.limit(scenario, params.loc[hit, "freeze"].to_numpy())
+    terms[:, 3, 0] = names.index(access_name)
+    terms[:, 3, 1] = table.limit(access_name, params["access"].to_numpy())
+    return params, terms, params["min_score"].to_numpy(np.int64)
+
+
+########################################
+# 3. 공유 배열 (작업자는 .npy 를 memmap 으로 읽기만 함)
+########################################
+def write_shared_arrays(directory, **arrays):
+    os.makedirs(directory, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(values))
+    return directory
+
+
+_SHARED = {}
+
+
+def open_shared_arrays(directory):
+    # 작업자 프로세스마다 한 번만 memmap 으로 열어 둠 (복사 / pickle 없음)
+    if directory not in _SHARED:
+        _SHARED[directory] = {name[:-4]: np.load(os.path.join(directory, name), mmap_mode="r")
+                              for name in os.listdir(directory) if name.endswith(".npy")}
+    return _SHARED[directory]
+
+
+def group_any(mask, order, starts, groups):
+    # (조합, 셀) bool 배열에서 같은 그룹(500m 격자 / 도로 구간)에 True 가 하나라도 있는지
+    return np.logical_or.reduceat(mask[:, order], starts, axis=1)[:, groups]
+
+
+def evaluate_combos(shared, start, stop):
+    """
+    조합 [start, stop) 의 선정 셀 / 선정 도로 구간을 계산해 셀별 / 구간별 선정 횟수와 조합별 개수를 돌려줍니다.
+    셀 선정 = A60 & 경사도 & 결빙(셀 순위 비교) & 접근성(500m 격자 안 하나라도)
+    구간 선정 = 구간과 겹치는 셀 중 선정 셀이 있고 점수 >= 최소 점수
+    """
+    ranks, terms = shared["ranks"], shared["terms"][start:stop]
+    n_cells, n_segments = ranks.shape[1], len(shared["score"])
+    cell_counts = np.zeros(n_cells, dtype=np.int64)
+    segment_counts = np.zeros(n_segments, dtype=np.int64)
+    combo_cells = np.empty(len(terms), dtype=np.int64)
+    combo_segments = np.empty(len(terms), dtype=np.int64)
+
+    nonempty = np.flatnonzero(np.diff(shared["indptr"]) > 0)
+    for c0 in range(0, len(terms), COMBO_CHUNK):
+        chunk = terms[c0:c0 + COMBO_CHUNK]
+        selected = np.ones((len(chunk), n_cells), dtype=bool)
+        for t in range(len(CELL_TERMS)):
+            selected &= ranks[chunk[:, t, 0]] < chunk[:, t, 1][:, None]
+        access = ranks[chunk[:, 3, 0]] < chunk[:, 3, 1][:, None]
+        selected &= group_any(access, shared["order_500"], shared["starts_500"], shared["group_500"])
+
+        hit = np.zeros((len(chunk), n_segments), dtype=bool)
+        if len(nonempty):
+            hit[:, nonempty] = np.logical_or.reduceat(selected[:, shared["cell_rows"]],
+                                                      shared["indptr"][nonempty], axis=1)
+        hit &= shared["score"][None, :] >= shared["min_score"][start + c0:start + c0 + len(chunk), None]
+
+        cell_counts += selected.sum(axis=0)
+        segment_counts += hit.sum(axis=0)
+        combo_cells[c0:c0 + len(chunk)] = selected.sum(axis=1)
+        combo_segments[c0:c0 + len(chunk)] = hit.sum(axis=1)
+    return cell_counts, segment_counts, combo_cells, combo_segments
+
+
+def _evaluate_task(args):
+    directory, start, stop = args
+    return evaluate_combos(open_shared_arrays(directory), start, stop)
+
+
+def run_sensitivity(table, params, terms, min_scores, segments, incidence, shared_dir,
+                    combos_per_task=512, workers=None):
+    """
+    파라미터 조합 전체를 process pool 에서 평가합니다.
+    순위 / 조합 / 구간-셀 대응 배열은 shared_dir 에 한 번 저장하고 작업자는 memmap 으로 공유하며,
+    작업에는 (디렉터리, 조합 범위) 만 넘깁니다.
+    반환: (셀별 선정 빈도 DataFrame, 구간별 선정 빈도 GeoDataFrame, 조합별 결과 DataFrame)
+    """
+    _, group_500, counts_500 = np.unique(table.gid_500, return_inverse=True, return_counts=True)
+    indptr, cell_rows = incidence
+    write_shared_arrays(shared_dir,
+                        ranks=np.stack([table.ranks[name] for name in table.criteria]),
+                        terms=terms, min_score=min_scores,
+                        order_500=np.argsort(group_500, kind="stable"),
+                        starts_500=np.concatenate([[0], np.cumsum(counts_500)[:-1]]),
+                        group_500=group_500,
+                        indptr=indptr, cell_rows=cell_rows,
+                        score=segments["score"].to_numpy(np.int64))
+    _SHARED.pop(shared_dir, None)
+
+    cell_counts = np.zeros(len(table), dtype=np.int64)
+    segment_counts = np.zeros(len(segments), dtype=np.int64)
+    params = params.copy()
+    params["n_cells"] = 0
+    params["n_segments"] = 0
+
+    def collect(span, result):
+        cells, segs, combo_cells, combo_segments = result
+        cell_counts[:] += cells
+        segment_counts[:] += segs
+        params.iloc[span[0]:span[1], params.columns.get_loc("n_cells")] = combo_cells
+        params.iloc[span[0]:span[1], params.columns.get_loc("n_segments")] = combo_segments
+
+    tasks = (((start, min(start + combos_per_task, len(params))),
+              (shared_dir, start, min(start + combos_per_task, len(params))))
+             for start in range(0, len(params), combos_per_task))
+    map_windows(_evaluate_task, tasks, collect, workers)
+
+    n = max(len(params), 1)
+    cell_freq = pd.DataFrame({"gid": table.gids, "gid_500": table.gid_500,
+                              "selected": cell_counts, "frequency": cell_counts / n})
+    segment_freq = segments[["road_name", "score", "geometry"]].copy()
+    segment_freq["n_cells"] = np.diff(indptr)
+    segment_freq["selected"] = segment_counts
+    segment_freq["frequency"] = segment_counts / n
+    return cell_freq, segment_freq, params
+
+
+if __name__ == '__main__':
+    import time
+    import argparse
+
+    parser = argparse.ArgumentParser(description="입지 선정 / 도로 점수 민감도 분석 (파라미터 조합별 선정 빈도)")
+    parser.add_argument("--table", default="./extract_shp/criteria_table.npz")
+    parser.add_argument("--grid", default="./shp/100m_500m.shp")
+    parser.add_argument("--scenario-csv", default="./data/기후 격자별 결빙 시나리오별 건수.csv")
+    parser.add_argument("--opt-csv", default="./data/opt.csv")
+    parser.add_argument("--roads", default="./output/final_scored_roads.csv")
+    parser.add_argument("--levels", type=float, nargs="+", default=[0.3, 0.4, 0.5, 0.6, 0.7])
+    parser.add_argument("--min-scores", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--shared-dir", default="./extract_shp/sensitivity_shared")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    # 1. 기준 순위 표 (criteria_table.py 로 만든 표) + 결빙 시나리오별 / 고정 접근성 기준
+    table = CriteriaTable.load(args.table)
+    freeze_criteria = ["freeze"]
+    if os.path.exists(args.scenario_csv):
+        freeze_criteria = add_freeze_scenarios(table, args.scenario_csv)
+    add_fixed_access(table, args.opt_csv)
+
+    # 2. 도로 구간과 100m 셀 대응
+    grid = load_grid(args.grid)
+    segments = load_segments(args.roads)
+    incidence = segment_cell_incidence(segments, grid)
+
+    # 3. 조합 평가
+    levels = args.levels
+    percents = {"pop": levels, "slope": levels, "freeze": levels}
+    if "access" in table.criteria:
+        percents["access"] = levels
+    params, terms, min_scores = build_parameter_grid(table, percents, freeze_criteria, args.min_scores)
+    start = time.perf_counter()
+    cell_freq, segment_freq, params = run_sensitivity(table, params, terms, min_scores, segments, incidence,
+                                                      args.shared_dir, workers=args.workers)
+    print(f"조합 {len(params)}개 평가 완료 ({time.perf_counter() - start:.1f}초)")
+
+    # 4. 저장 (빈도 = 선정된 조합 수 / 전체 조합 수)
+    cell_freq.to_csv("격자별_선정빈도.csv", index=False, encoding="utf-8-sig")
+    segment_freq.to_csv("도로구간별_선정빈도.csv", index=False, encoding="utf-8-sig")
+    params.to_csv("민감도_조합별_결과.csv", index=False, encoding="utf-8-sig")
+    print(cell_freq["frequency"].describe())
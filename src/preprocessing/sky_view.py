@@ -0,0 +1,108 @@
+import sys
+import os
+import math
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.terrain import block_windows, map_windows, TILE_SIZE
+from preprocessing.cast_shadow import horizon_angles, sector_azimuths
+
+N_DIRECTIONS = 16
+SEARCH_RADIUS = 100.0   # m
+
+
+########################################
+# 1. 지평선 고도각 → 하늘 시야율
+########################################
+def svf_from_horizons(horizons):
+    # SVF = 1 - 방향 평균 sin(지평선 고도각), 아래를 향한 지평선(음수)은 하늘을 가리지 않으므로 0 으로
+    horizons = np.asarray(horizons, dtype=np.float64)
+    return 1.0 - np.mean(np.sin(np.maximum(horizons, 0.0)), axis=0)
+
+
+def sky_view_factor(dsm, resolution, n_directions=N_DIRECTIONS, max_distance=SEARCH_RADIUS, origin=(0, 0)):
+    """
+    DSM 배열의 픽셀별 하늘 시야율(0 ~ 1). 방향마다 반경 max_distance 안의 지평선 고도각을 구해 평균합니다.
+    지평선은 그림자 계산(cast_shadow.horizon_angles)과 같은 볼록 껍질 sweep 으로 구하므로 두 결과의 지평선이 같습니다.
+    origin 은 dsm 이 타일일 때 래스터 안 (행, 열) 위치입니다. 방향별 지평선을 쌓지 않고 sin 합계만 누적합니다.
+    """
+    total = np.zeros(np.shape(dsm))
+    for az in sector_azimuths(n_directions):
+        horizon = horizon_angles(dsm, resolution, az, max_distance=max_distance, origin=origin)
+        total += np.sin(np.maximum(horizon, 0.0))
+    return (1.0 - total / n_directions).astype(np.float32)
+
+
+########################################
+# 2. 타일 병렬 처리 (halo = 탐색 반경) / 저해상도 미리보기
+########################################
+def halo_pixels(resolution, max_distance=SEARCH_RADIUS):
+    return int(math.ceil(max_distance / resolution))
+
+
+def _svf_window(args):
+    dsm_path, outer, inner, resolution, n_directions, max_distance = args
+    with rasterio.open(dsm_path) as src:
+        block = src.read(1, window=outer).astype(np.float32)
+    return sky_view_factor(block, resolution, n_directions, max_distance, origin=(outer.row_off, outer.col_off))[inner]
+
+
+def write_svf_raster(dsm_path, out_path, n_directions=N_DIRECTIONS, max_distance=SEARCH_RADIUS,
+                     block_size=1024, workers=None, preview_factor=1):
+    """
+    DSM GeoTIFF 의 하늘 시야율을 tiled / 압축 GeoTIFF 로 저장합니다.
+    타일마다 탐색 반경만큼 halo 를 붙여 계산하므로 결과는 DSM 전체로 계산한 것과 같습니다.
+    preview_factor > 1 이면 DSM 을 1/preview_factor 해상도(평균)로 읽어 한 번에 계산하는 미리보기입니다.
+    """
+    with rasterio.open(dsm_path) as src:
+        profile = src.profile.copy()
+        resolution = src.res[0]
+        width, height = src.width, src.height
+        if preview_factor > 1:
+            out_shape = (max(height // preview_factor, 1), max(width // preview_factor, 1))
+            dsm = src.read(1, out_shape=out_shape, resampling=Resampling.average).astype(np.float32)
+            transform = src.transform * src.transform.scale(width / out_shape[1], height / out_shape[0])
+    for key in ("photometric", "interleave", "nodata"):
+        profile.pop(key, None)
+    profile.update(driver="GTiff", count=1, dtype="float32", tiled=True,
+                   blockxsize=TILE_SIZE, blockysize=TILE_SIZE, compress="deflate", predictor=3)
+
+    if preview_factor > 1:
+        profile.update(width=out_shape[1], height=out_shape[0], transform=transform)
+        with rasterio.open(out_path, "w", **profile) as dst:
+            dst.write(sky_view_factor(dsm, resolution * preview_factor, n_directions, max_distance), 1)
+        return out_path
+
+    halo = halo_pixels(resolution, max_distance)
+    tasks = ((core, (dsm_path, outer, inner, resolution, n_directions, max_distance))
+             for core, outer, inner in block_windows(width, height, block_size, halo))
+    with rasterio.open(out_path, "w", **profile) as dst:
+        map_windows(_svf_window, tasks, lambda core, svf: dst.write(svf, 1, window=core), workers)
+    return out_path
+
+
+if __name__ == '__main__':
+    import time
+    import argparse
+    from preprocessing.grid_code import load_grid
+    from preprocessing.zonal_stats import zonal_stats_raster
+
+    parser = argparse.ArgumentParser(description="DSM 하늘 시야율(SVF) 계산 및 100m 격자 집계")
+    parser.add_argument("--dsm", default="DSM_output.tif")
+    parser.add_argument("--directions", type=int, default=N_DIRECTIONS)
+    parser.add_argument("--radius", type=float, default=SEARCH_RADIUS)
+    parser.add_argument("--preview", type=int, default=1, help="미리보기 배율 (예: 4 → 1/4 해상도)")
+    args = parser.parse_args()
+
+    svf_path = "DSM_svf.tif" if args.preview == 1 else f"DSM_svf_preview{args.preview}.tif"
+    start = time.perf_counter()
+    write_svf_raster(args.dsm, svf_path, args.directions, args.radius, preview_factor=args.preview)
+    print(f"SVF 래스터 저장 완료: {svf_path} ({time.perf_counter() - start:.1f}초)")
+
+    grid = load_grid("./shp/100m_500m.shp")
+    cell_stats = zonal_stats_raster(svf_path, grid, stats=("mean", "min", "max")).add_prefix("svf_")
+    grid.drop(columns="geometry").join(cell_stats).to_csv("격자별_하늘시야율.csv", index=False, encoding="utf-8-sig")
+    print("100m 격자별 SVF 집계 저장 완료")
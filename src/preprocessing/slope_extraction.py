@@ -1,22 +1,29 @@
-import geopandas as gpd
+import sys
+import os
 import pandas as pd
 import koreanize_matplotlib
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.grid_code import load_grid, gid_to_key
+
 def load_slope_data(slope_csv_path):
     df = pd.read_csv(slope_csv_path, encoding='cp949')[['gid', 'max']]
     df['gid'] = df['gid'].astype(str)
     return df
 
 def merge_slope_with_gdf(shapefile_path, df_slope):
-    gdf = gpd.read_file(shapefile_path)
+    # shp 에서는 gid 만 읽고 셀 폴리곤은 gid 좌표로 계산, 병합은 gid 문자열 대신 int64 셀 키로 수행
+    gdf = load_grid(shapefile_path)
     gdf = gdf.to_crs(epsg=3857)
-    gdf["gid"] = gdf["gid"].astype(str)
-    df_slope["gid"] = df_slope["gid"].astype(str)
-    return gdf.merge(df_slope, on="gid", how="left")
+    gdf["cell_key"] = gid_to_key(gdf["gid"])
+    df_slope = df_slope.assign(cell_key=gid_to_key(df_slope["gid"])).drop(columns="gid")
+    return gdf.merge(df_slope, on="cell_key", how="left").drop(columns="cell_key")
 
-def extract_top50_slope(gdf_merged, output_path):
-    top_n = int(len(gdf_merged) * 0.5)
+def extract_top50_slope(gdf_merged, output_path, top_percent=0.5):
+    # 다른 비율 조합은 criteria_table 순위 표로 파일 재처리 없이 확인 가능
+    top_n = int(len(gdf_merged) * top_percent)
     gdf_top50 = gdf_merged.nlargest(top_n, 'max').copy()
     gdf_top50.to_file(output_path)
     print(f"✅ 저장 완료: {output_path}")
@@ -0,0 +1,188 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.terrain import gradient, slope_radians, hillshade
+from preprocessing.zonal_stats import zonal_stats_array, load_label_raster
+
+KST_HOURS = 9
+# 기상 자료(surface_temperature_2301_2302) 와 같은 겨울철 기간
+WINTER_START = "2023-01-01"
+WINTER_END = "2023-02-28"
+
+
+########################################
+# 1. 태양 위치 (NOAA 근사식, 시각 배열 한 번에 계산)
+########################################
+def sun_positions(times, lat, lon, tz_hours=KST_HOURS):
+    """
+    현지 시각(times) 배열의 태양 고도 / 방위각(도)을 계산합니다. 방위각은 북쪽 기준 시계 방향입니다.
+    """
+    times = pd.DatetimeIndex(times)
+    doy = times.dayofyear.to_numpy(np.float64)
+    hour = (times.hour + times.minute / 60 + times.second / 3600).to_numpy(np.float64)
+
+    gamma = 2 * np.pi / 365 * (doy - 1 + (hour - tz_hours - 12) / 24)
+    eqtime = 229.18 * (0.000075 + 0.001868 * np.cos(gamma) - 0.032077 * np.sin(gamma)
+                       - 0.014615 * np.cos(2 * gamma) - 0.040849 * np.sin(2 * gamma))
+    decl = (0.006918 - 0.399912 * np.cos(gamma) + 0.070257 * np.sin(gamma)
+            - 0.006758 * np.cos(2 * gamma) + 0.000907 * np.sin(2 * gamma)
+            - 0.002697 * np.cos(3 * gamma) + 0.00148 * np.sin(3 * gamma))
+    true_solar_minutes = hour * 60 + eqtime + 4 * lon - 60 * tz_hours
+    ha = np.radians(true_solar_minutes / 4 - 180)
+    lat_rad = np.radians(lat)
+
+    sin_alt = np.sin(lat_rad) * np.sin(decl) + np.cos(lat_rad) * np.cos(decl) * np.cos(ha)
+    altitude = np.degrees(np.arcsin(np.clip(sin_alt, -1, 1)))
+    azimuth = np.degrees(np.arctan2(np.sin(ha), np.cos(ha) * np.sin(lat_rad) - np.tan(decl) * np.cos(lat_rad))) + 180
+    return pd.DataFrame({"time": times, "altitude": altitude, "azimuth": azimuth % 360})
+
+
+def daylight_sun_positions(start=WINTER_START, end=WINTER_END, lat=37.54, lon=127.08, freq="1h",
+                           min_altitude=0.0, tz_hours=KST_HOURS):
+    # 기간 [start, end] 의 매 시각 중 해가 떠 있는(고도 > min_altitude) 시각만
+    times = pd.date_range(pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(days=1), freq=freq, inclusive="left")
+    sun = sun_positions(times, lat, lon, tz_hours)
+    return sun[sun["altitude"] > min_altitude].reset_index(drop=True)
+
+
+def sun_vectors(altitude_deg, azimuth_deg, dtype=np.float32):
+    # (동, 북, 위) 단위 벡터 (3, 시각 수)
+    alt = np.radians(np.asarray(altitude_deg, dtype=np.float64))
+    az = np.radians(np.asarray(azimuth_deg, dtype=np.float64))
+    return np.stack([np.sin(az) * np.cos(alt), np.cos(az) * np.cos(alt), np.sin(alt)]).astype(dtype)
+
+
+########################################
+# 2. 시각 전체 음영 누적 (기울기는 한 번만 계산)
+########################################
+SHADE_CHUNK_BYTES = 256 * 1024 ** 2
+
+
+def surface_normals(dem, resolution, dtype=np.float32):
+    """
+    DSM 기울기로 픽셀별 단위 법선 벡터 (행, 열, 3) 을 만듭니다. (동, 북, 위 성분)
+    행은 남쪽으로 증가하므로 북쪽 방향 변화율은 -d_row 입니다.
+    """
+    d_row, d_col = gradient(np.asarray(dem, dtype=np.float64), resolution)
+    norm = np.sqrt(1.0 + d_row ** 2 + d_col ** 2)
+    return np.stack([-d_col / norm, d_row / norm, 1.0 / norm], axis=-1).astype(dtype)
+
+
+def row_normals(dem, resolution, r0, r1, dtype=np.float32):
+    # r0 ~ r1 행의 법선만. 위아래 1행 halo 를 붙여 계산하므로 전체 DSM 으로 계산한 값과 같음
+    h0, h1 = max(r0 - 1, 0), min(r1 + 1, np.shape(dem)[0])
+    return surface_normals(dem[h0:h1], resolution, dtype)[r0 - h0:r1 - h0]
+
+
+def accumulate_shade(dem, resolution, sun, shade_cos=0.0, max_bytes=SHADE_CHUNK_BYTES):
+    """
+    모든 태양 위치에 대해 입사각 cos = 법선 · 태양 벡터 를 (픽셀, 시각) 행렬곱으로 한 번에 계산합니다.
+    반환: 픽셀별 음영 시간(cos <= shade_cos, 태양이 경사면 뒤), 평균 hillshade(0 ~ 255)
+    (행 묶음 × 시각 묶음) 단위로 나눠 누적하므로 cos 블록 하나(float32)가 max_bytes 를 넘지 않습니다.
+    법선도 행 묶음마다 만들어 DSM 전체 크기의 중간 배열을 두지 않습니다.
+    """
+    vectors = sun_vectors(sun["altitude"], sun["azimuth"])
+    n_hours = vectors.shape[1]
+    height, width = np.shape(dem)
+    itemsize = np.dtype(np.float32).itemsize
+    hour_chunk = int(np.clip(max_bytes // (itemsize * width), 1, max(n_hours, 1)))
+    row_chunk = int(max(1, max_bytes // (itemsize * width * hour_chunk)))
+
+    shaded = np.zeros((height, width), dtype=np.int32)
+    mean_shade = np.full((height, width), np.nan)
+    for r0 in range(0, height, row_chunk):
+        r1 = min(r0 + row_chunk, height)
+        block = row_normals(dem, resolution, r0, r1).reshape(-1, 3)
+        count = np.zeros(len(block), dtype=np.int32)
+        total = np.zeros(len(block), dtype=np.float64)
+        for h0 in range(0, n_hours, hour_chunk):
+            cos_i = block @ vectors[:, h0:h0 + hour_chunk]
+            count += (cos_i <= shade_cos).sum(axis=1, dtype=np.int32)
+            np.clip(cos_i, 0, None, out=cos_i)
+            total += cos_i.sum(axis=1, dtype=np.float64)
+        shaded[r0:r1] = count.reshape(r1 - r0, width)
+        if n_hours:
+            mean_shade[r0:r1] = (255.0 * total / n_hours).reshape(r1 - r0, width)
+    return shaded, mean_shade
+
+
+def shade_hours_by_cell(shaded, labels, n_zones, stats=("mean", "max", "min")):
+    # 픽셀별 음영 시간을 격자 라벨 래스터로 셀별 통계 (zonal_stats 엔진 사용)
+    return zonal_stats_array(shaded, labels, n_zones, stats)
+
+
+########################################
+# 3. 기존 방식(시각마다 기울기 + hillshade 재계산) 반복과 비교
+########################################
+def compass_aspect(d_row, d_col):
+    # 내리막 방향의 북쪽 기준 시계 방향 각(라디안). 태양 방위각과 같은 기준
+    return np.arctan2(-d_col, d_row)
+
+
+def loop_hillshade(dem, resolution, sun, shade_value=0.0):
+    """
+    DSM_visualization 의 계산(기울기 → slope / aspect → hillshade)을 시각마다 반복하는 기존 방식입니다.
+    hillshade 공식의 고도 자리에 천정각(90 - 고도)을, aspect 는 방위각과 같은 기준(compass_aspect)을 넣습니다.
+    """
+    shaded = np.zeros(np.shape(dem), dtype=np.int32)
+    for alt, az in zip(sun["altitude"], sun["azimuth"]):
+        d_row, d_col = gradient(np.asarray(dem, dtype=np.float64), resolution)
+        slope = slope_radians(d_row, d_col)
+        aspect = compass_aspect(d_row, d_col)
+        shaded += hillshade(slope, aspect, 90 - alt, az) <= shade_value
+    return shaded
+
+
+def benchmark_shade_sweep(dem, resolution, sun):
+    start = time.perf_counter()
+    batched, _ = accumulate_shade(dem, resolution, sun)
+    t_batch = time.perf_counter() - start
+    start = time.perf_counter()
+    looped = loop_hillshade(dem, resolution, sun)
+    t_loop = time.perf_counter() - start
+    return {"hours": len(sun), "pixels": int(np.size(dem)), "batched_sec": t_batch, "loop_sec": t_loop,
+            "speedup": t_loop / t_batch if t_batch > 0 else np.nan,
+            "mismatch_pixels": int((batched != looped).sum())}
+
+
+if __name__ == '__main__':
+    import rasterio
+    import geopandas as gpd
+    from pyproj import Transformer
+
+    dsm_path = "DSM_output.tif"
+    with rasterio.open(dsm_path) as src:
+        dsm = src.read(1).astype(np.float32)
+        transform = src.transform
+        crs = src.crs
+        profile = src.profile.copy()
+        cx, cy = src.xy(src.height // 2, src.width // 2)
+    lon, lat = Transformer.from_crs(crs, "EPSG:4326", always_xy=True).transform(cx, cy)
+
+    sun = daylight_sun_positions(WINTER_START, WINTER_END, lat=lat, lon=lon)
+    print(f"{WINTER_START} ~ {WINTER_END} 낮 시간 {len(sun)}개 (중심 위경도 {lat:.4f}, {lon:.4f})")
+
+    shaded, mean_shade = accumulate_shade(dsm, transform.a, sun)
+    profile.update(driver="GTiff", dtype="int32", count=1, nodata=None, tiled=True,
+                   blockxsize=256, blockysize=256, compress="deflate")
+    with rasterio.open("DSM_shaded_hours.tif", "w", **profile) as dst:
+        dst.write(shaded, 1)
+
+    grid = gpd.read_file("100m격자.shp")
+    if grid.crs != crs:
+        grid = grid.to_crs(crs)
+    labels = load_label_raster(grid, shaded.shape, transform)
+    cell_stats = shade_hours_by_cell(shaded, labels, len(grid)).add_prefix("shade_hours_")
+    grid.drop(columns="geometry").join(cell_stats).to_csv("격자별_겨울철_음영시간.csv", index=False,
+                                                          encoding="utf-8-sig")
+    print("픽셀별 / 격자별 음영 시간 저장 완료")
+
+    # 기존 방식(시각마다 반복) 과 속도 비교: DSM 가운데 500 x 500 구간
+    h, w = dsm.shape
+    sub = dsm[max(h // 2 - 250, 0):h // 2 + 250, max(w // 2 - 250, 0):w // 2 + 250]
+    print(benchmark_shade_sweep(sub, transform.a, sun))
@@ -0,0 +1,248 @@
+import os
+import math
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+# 산출물 이름 → 계산 함수 입력 (terrain_products 의 키)
+PRODUCTS = ("slope", "slope_rad", "aspect", "hillshade")
+HALO = 1
+TILE_SIZE = 256
+
+
+########################################
+# 1. 지형 커널 (전체 배열 / 블록 공통)
+########################################
+def gradient(dem, resolution):
+    # np.gradient 와 같은 순서: (행 방향, 열 방향) 변화율
+    return np.gradient(dem, resolution, resolution)
+
+
+def slope_radians(d_row, d_col):
+    return np.arctan(np.sqrt(d_row ** 2 + d_col ** 2))
+
+
+def aspect_radians(d_row, d_col):
+    # DSM_visualization 과 같은 정의: arctan2(행 방향, -열 방향) 을 0 ~ 2π 로
+    aspect = np.arctan2(d_row, -d_col)
+    return np.where(aspect < 0, 2 * np.pi + aspect, aspect)
+
+
+def hillshade(slope_rad, aspect_rad, sun_alt_deg=40, sun_az_deg=180):
+    sun_alt_rad = math.radians(sun_alt_deg)
+    sun_az_rad = math.radians(sun_az_deg)
+    shade = 255.0 * (np.cos(sun_alt_rad) * np.cos(slope_rad) +
+                     np.sin(sun_alt_rad) * np.sin(slope_rad) * np.cos(sun_az_rad - aspect_rad))
+    return np.clip(shade, 0, 255)
+
+
+def terrain_products(dem, resolution, products=PRODUCTS, sun_alt_deg=40, sun_az_deg=180):
+    """
+    DEM/DSM 배열에서 요청한 산출물만 계산합니다.
+    slope 는 도(degree), slope_rad / aspect 는 라디안, hillshade 는 0 ~ 255 입니다.
+    """
+    d_row, d_col = gradient(dem, resolution)
+    slope_rad = slope_radians(d_row, d_col)
+    result = {}
+    if "slope" in products:
+        result["slope"] = np.degrees(slope_rad)
+    if "slope_rad" in products:
+        result["slope_rad"] = slope_rad
+    if "aspect" in products or "hillshade" in products:
+        aspect = aspect_radians(d_row, d_col)
+        if "aspect" in products:
+            result["aspect"] = aspect
+        if "hillshade" in products:
+            result["hillshade"] = hillshade(slope_rad, aspect, sun_alt_deg, sun_az_deg)
+    return result
+
+
+########################################
+# 2. 블록 분할 (1픽셀 halo)
+########################################
+def block_windows(width, height, block_size=1024, halo=HALO):
+    """
+    래스터를 block_size 블록으로 나눠 (core, halo 포함 window, core 의 halo window 안 위치) 를 돌려줍니다.
+    halo 는 래스터 경계에서 잘리므로 경계 픽셀은 전체 배열과 같은 한쪽 차분이 적용됩니다.
+    """
+    for row0 in range(0, height, block_size):
+        for col0 in range(0, width, block_size):
+            core = Window(col0, row0, min(block_size, width - col0), min(block_size, height - row0))
+            r0 = max(row0 - halo, 0)
+            c0 = max(col0 - halo, 0)
+            r1 = min(row0 + core.height + halo, height)
+            c1 = min(col0 + core.width + halo, width)
+            outer = Window(c0, r0, c1 - c0, r1 - r0)
+            inner = (slice(row0 - r0, row0 - r0 + core.height), slice(col0 - c0, col0 - c0 + core.width))
+            yield core, outer, inner
+
+
+def compute_block(block, inner, resolution, products=PRODUCTS, sun_alt_deg=40, sun_az_deg=180):
+    # halo 포함 블록으로 계산한 뒤 core 만 잘라냄 (3x3 이웃만 쓰므로 전체 배열 결과와 비트 단위로 같음)
+    return {name: arr[inner] for name, arr in
+            terrain_products(block, resolution, products, sun_alt_deg, sun_az_deg).items()}
+
+
+def map_windows(func, tasks, write, workers=None):
+    """
+    (core window, 인자) 작업들을 process pool 에서 func(인자) 로 계산하고, 끝나는 대로 write(core, 결과) 합니다.
+    처리 중인 작업 수를 (작업자 수 × 2) 로 제한해 최대 메모리를 블록 크기에 묶어 둡니다. workers=1 이면 순서대로 실행.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for core, args in tasks:
+            write(core, func(args))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        for core, args in tasks:
+            pending[pool.submit(func, args)] = core
+            if len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(pending.pop(future), future.result())
+        for future in list(pending):
+            write(pending.pop(future), future.result())
+
+
+def _process_window(args):
+    src_path, outer, inner, resolution, products, sun_alt_deg, sun_az_deg, masked, dtype = args
+    with rasterio.open(src_path) as src:
+        block = src.read(1, window=outer, masked=masked)
+    if dtype is not None:
+        block = block.astype(dtype)
+    return compute_block(block, inner, resolution, products, sun_alt_deg, sun_az_deg)
+
+
+########################################
+# 3. 블록 단위 병렬 처리 + tiled / 압축 GeoTIFF 저장
+########################################
+def output_dtypes(src_dtype, products=PRODUCTS, dtype=None, masked=False):
+    # 산출물별 결과 자료형 (예: float32 DSM 이어도 hillshade 는 float64) 을 3x3 배열로 미리 확인
+    # 마스크 배열은 np.ma 연산이 float64 로 올리는 경우가 있어 실제 읽기와 같은 종류의 배열로 확인
+    zeros = np.ma.zeros if masked else np.zeros
+    probe = zeros((3, 3), dtype=dtype or src_dtype)
+    return {name: arr.dtype for name, arr in terrain_products(probe, 1.0, products).items()}
+
+
+def write_terrain_rasters(src_path, outputs, block_size=1024, workers=None, sun_alt_deg=40, sun_az_deg=180,
+                          masked=False, dtype=None, resolution=None, compress="deflate"):
+    """
+    DEM/DSM 을 블록 단위로 읽어 outputs({산출물 이름: 저장 경로}) 의 GeoTIFF 를 만듭니다.
+    한 번에 메모리에 올라가는 양은 (작업 수 × 2) 블록으로 제한되며, 결과는 전체 배열 계산과 같습니다.
+    masked=True 면 nodata 를 마스크로 읽고(기존 step3 와 같음), 마스크 픽셀은 원본 nodata 로 저장합니다.
+    dtype 을 주면 블록을 그 자료형으로 바꿔 계산합니다. (예: DSM_visualization 의 float32)
+    """
+    products = tuple(outputs)
+    unknown = set(products) - set(PRODUCTS)
+    if unknown:
+        raise ValueError(f"지원하지 않는 산출물: {sorted(unknown)}")
+
+    with rasterio.open(src_path) as src:
+        profile = src.profile.copy()
+        width, height = src.width, src.height
+        resolution = resolution or src.res[0]
+        src_dtype = src.dtypes[0]
+        nodata = src.nodata
+
+    dtypes = output_dtypes(src_dtype, products, dtype, masked)
+    profile.pop("dtype", None)
+    profile.update(
+        driver="GTiff", count=1, tiled=True,
+        blockxsize=TILE_SIZE, blockysize=TILE_SIZE, compress=compress,
+        predictor=3, BIGTIFF="IF_SAFER", nodata=nodata if masked else None,
+    )
+    for key in ("photometric", "interleave"):
+        profile.pop(key, None)
+
+    dsts = {name: rasterio.open(path, "w", **profile, dtype=dtypes[name].name) for name, path in outputs.items()}
+
+    def write(core, result):
+        for name, arr in result.items():
+            if masked and nodata is not None:
+                arr = np.ma.filled(arr, nodata)
+            dsts[name].write(np.asarray(arr, dtype=dtypes[name]), 1, window=core)
+
+    tasks = ((core, (src_path, outer, inner, resolution, products, sun_alt_deg, sun_az_deg, masked, dtype))
+             for core, outer, inner in block_windows(width, height, block_size))
+    try:
+        map_windows(_process_window, tasks, write, workers)
+    finally:
+        for dst in dsts.values():
+            dst.close()
+    return outputs
+
+
+def compare_with_full_array(src_path, outputs, masked=False, dtype=None, resolution=None,
+                            sun_alt_deg=40, sun_az_deg=180):
+    """
+    write_terrain_rasters 결과를 래스터 전체를 한 번에 읽어 계산한 값(기존 np.gradient 방식)과 비교합니다.
+    전체를 메모리에 올리므로 작은 래스터 검증용입니다. 반환: {산출물 이름: 다른 픽셀 수}
+    """
+    with rasterio.open(src_path) as src:
+        dem = src.read(1, masked=masked)
+        resolution = resolution or src.res[0]
+        nodata = src.nodata
+    if dtype is not None:
+        dem = dem.astype(dtype)
+    expected = terrain_products(dem, resolution, tuple(outputs), sun_alt_deg, sun_az_deg)
+
+    mismatches = {}
+    for name, path in outputs.items():
+        arr = expected[name]
+        if masked and nodata is not None:
+            arr = np.ma.filled(arr, nodata)
+        with rasterio.open(path) as dst:
+            tiled = dst.read(1)
+        arr = np.asarray(arr)
+        if tiled.dtype != arr.dtype:
+            # 자료형이 다르면 반올림 차이가 생기므로 전체 픽셀을 다른 것으로 봄
+            mismatches[name] = tiled.size
+            continue
+        same = (tiled == arr) | (np.isnan(tiled) & np.isnan(arr))
+        mismatches[name] = int((~same).sum())
+    return mismatches
+
+
+def check_tiled_output(work_dir, shape=(700, 530), block_size=256, masked=True, dtype=None, workers=1):
+    """
+    nodata 가 섞인 float32 합성 DEM 으로 블록 처리 결과가 전체 배열 계산과 비트 단위로 같은지 확인합니다.
+    (region_selection_slope_step3 처럼 masked=True 로 읽는 경로 포함)
+    """
+    from rasterio.transform import from_origin
+
+    rng = np.random.default_rng(0)
+    dem = np.cumsum(rng.normal(0, 0.5, shape), axis=0).astype(np.float32) + 100
+    nodata = -9999.0
+    dem[rng.random(shape) < 0.01] = nodata
+
+    os.makedirs(work_dir, exist_ok=True)
+    src_path = os.path.join(work_dir, "check_dem.tif")
+    profile = dict(driver="GTiff", width=shape[1], height=shape[0], count=1, dtype="float32",
+                   crs="EPSG:5186", transform=from_origin(200000, 550000, 5, 5), nodata=nodata)
+    with rasterio.open(src_path, "w", **profile) as dst:
+        dst.write(dem, 1)
+
+    outputs = {name: os.path.join(work_dir, f"check_{name}.tif") for name in PRODUCTS}
+    write_terrain_rasters(src_path, outputs, block_size=block_size, workers=workers, masked=masked, dtype=dtype)
+    mismatches = compare_with_full_array(src_path, outputs, masked=masked, dtype=dtype)
+    if any(mismatches.values()):
+        raise ValueError(f"블록 처리 결과가 전체 배열 계산과 다름: {mismatches}")
+    return mismatches
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    if "--check" in sys.argv:
+        # 작은 합성 래스터로 블록 처리 = 전체 배열 계산 확인 (masked / 비masked 모두)
+        for masked in (True, False):
+            print(f"masked={masked}: {check_tiled_output('./terrain_check', masked=masked)}")
+        sys.exit()
+
+    start = time.perf_counter()
+    write_terrain_rasters("DSM_output.tif", {"slope": "DSM_slope.tif", "aspect": "DSM_aspect.tif",
+                                             "hillshade": "DSM_hillshade.tif"}, dtype=np.float32)
+    print(f"경사 / 향 / Hillshade 래스터 저장 완료 ({time.perf_counter() - start:.1f}초)")
@@ -1,6 +1,11 @@
+import sys
+import os
 import pandas as pd
-import geopandas as gpd
-import osmnx as ox
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.road_network import load_road_edges
+from preprocessing.road_name_matcher import RoadNameMatcher
 
 # -------------------------------
 # 1. 도로열선 데이터 로딩
@@ -12,21 +17,12 @@ heat_road_names = df_heat["도로명"].dropna().unique().tolist()
 # -------------------------------
 # 2. 광진구 도로망 (OSM)
 # -------------------------------
-gdf = gpd.read_file("./shp/LARD_ADM_SECT_SGG_11_202502.shp", encoding="cp949")
-gwangjin = gdf[gdf["SGG_NM"] == "광진구"].copy().to_crs(epsg=4326)
-
-# 🔥 괄호 제거!
-polygon = gwangjin.geometry.unary_union
-
-graph = ox.graph_from_polygon(polygon, network_type="drive")
-edges = ox.graph_to_gdfs(graph, nodes=False, edges=True).to_crs(epsg=3857)
+edges = load_road_edges()  # 광진구 차도망 (road_network 저장소, road_name 포함)
 
 # -------------------------------
 # 3. 도로열선 필터링
 # -------------------------------
-matched = edges[edges["road_name"].apply(
-    lambda name: any(n in name for n in heat_road_names) if isinstance(name, str) else False
-)].copy()
+matched = RoadNameMatcher(heat_road_names).filter(edges).copy()
 
 # -------------------------------
 # 4. 매칭 요약
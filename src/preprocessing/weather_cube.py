@@ -0,0 +1,131 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+WEATHER_VARIABLES = ["ta", "hm", "td", "ws_10m", "rn_60m", "sd_3hr"]
+
+# weather_cube/
+#   values.npy   float32 (시각, gid, 변수) - 같은 시각의 모든 격자가 연속으로 저장되어 시간 구간만 잘라 읽기 쉬움
+#   hours.npy    int64 (시각,) - YYYYMMDDHHMI
+#   coords.csv   gid, lon, lat - 격자 좌표 (좌표만 필요한 스크립트는 이 파일만 읽음)
+#   meta.json    변수 순서, shape, 원본 파일
+VALUES_FILE = "values.npy"
+HOURS_FILE = "hours.npy"
+COORDS_FILE = "coords.csv"
+META_FILE = "meta.json"
+
+
+class WeatherCube:
+    """
+    memory-map 으로 연 기상 큐브입니다. values 는 (시각, gid, 변수) float32 memmap 이라
+    실제로 접근한 시간 구간 / 변수만 디스크에서 읽힙니다.
+    """
+
+    def __init__(self, cube_dir, mode="r"):
+        self.cube_dir = cube_dir
+        with open(os.path.join(cube_dir, META_FILE), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.variables = self.meta["variables"]
+        self.coords = pd.read_csv(os.path.join(cube_dir, COORDS_FILE))
+        self.gids = self.coords["gid"].to_numpy()
+        self.hours = np.load(os.path.join(cube_dir, HOURS_FILE))
+        self.values = np.load(os.path.join(cube_dir, VALUES_FILE), mmap_mode=mode)
+
+    def hour_slice(self, start=None, end=None):
+        # [start, end] 시각(YYYYMMDDHHMI) 구간의 slice
+        t0 = 0 if start is None else int(np.searchsorted(self.hours, int(start), side="left"))
+        t1 = len(self.hours) if end is None else int(np.searchsorted(self.hours, int(end), side="right"))
+        return slice(t0, t1)
+
+    def variable(self, name, start=None, end=None):
+        """
+        변수 하나의 (gid, 시각) 배열을 돌려줍니다. (freezing_detection 의 배열과 같은 방향)
+        """
+        t = self.hour_slice(start, end)
+        return np.asarray(self.values[t, :, self.variables.index(name)], dtype=np.float64).T
+
+    def arrays(self, start=None, end=None, variables=None):
+        return {name: self.variable(name, start, end) for name in (variables or self.variables)}
+
+    def to_frame(self, start=None, end=None):
+        """
+        시간 구간을 기존 CSV 와 같은 긴 표(gid, lon, lat, timestamp, 변수...)로 펼칩니다.
+        """
+        t = self.hour_slice(start, end)
+        block = np.asarray(self.values[t])
+        n_hours, n_gids = block.shape[:2]
+        df = pd.DataFrame({
+            "gid": np.tile(self.gids, n_hours),
+            "lon": np.tile(self.coords["lon"].to_numpy(), n_hours),
+            "lat": np.tile(self.coords["lat"].to_numpy(), n_hours),
+            "timestamp": np.repeat(self.hours[t], n_gids),
+        })
+        for i, name in enumerate(self.variables):
+            df[name] = block[:, :, i].ravel()
+        return df
+
+
+def open_weather_cube(cube_dir, mode="r"):
+    return WeatherCube(cube_dir, mode)
+
+
+def load_gid_coords(source):
+    """
+    gid 별 좌표(gid, lon, lat)를 읽습니다. source 가 큐브 디렉터리면 coords.csv 만 읽고,
+    CSV 파일이면 필요한 세 컬럼만 읽어 gid 별 첫 값을 사용합니다. (groupby('gid').first() 와 같음)
+    """
+    if os.path.isdir(source):
+        return pd.read_csv(os.path.join(source, COORDS_FILE))
+    df = pd.read_csv(source, usecols=["gid", "lon", "lat"])
+    return df.groupby("gid", sort=True).first().reset_index()
+
+
+def migrate_weather_csv(csv_file, cube_dir, chunksize=1_000_000, variables=WEATHER_VARIABLES):
+    """
+    전체 기상 CSV(gid, lon, lat, timestamp, 변수...)를 큐브로 변환합니다.
+    chunksize 행씩 두 번 읽으므로(격자 / 시각 목록 → 값 채우기) CSV 전체를 메모리에 올리지 않습니다.
+    CSV 에 없는 (gid, 시각) 조합은 NaN 으로 남습니다.
+    """
+    coords, hours = [], []
+    for chunk in pd.read_csv(csv_file, usecols=["gid", "lon", "lat", "timestamp"], chunksize=chunksize):
+        coords.append(chunk.drop_duplicates("gid")[["gid", "lon", "lat"]])
+        hours.append(chunk["timestamp"].unique())
+    df_coords = pd.concat(coords).drop_duplicates("gid").sort_values("gid").reset_index(drop=True)
+    hour_index = np.unique(np.concatenate(hours).astype(np.int64))
+    gid_index = df_coords["gid"].to_numpy()
+
+    os.makedirs(cube_dir, exist_ok=True)
+    values = np.lib.format.open_memmap(
+        os.path.join(cube_dir, VALUES_FILE), mode="w+", dtype=np.float32,
+        shape=(len(hour_index), len(gid_index), len(variables))
+    )
+    values[:] = np.nan
+    n_rows = 0
+    for chunk in pd.read_csv(csv_file, usecols=["gid", "timestamp"] + list(variables), chunksize=chunksize):
+        t = np.searchsorted(hour_index, chunk["timestamp"].to_numpy(dtype=np.int64))
+        g = np.searchsorted(gid_index, chunk["gid"].to_numpy())
+        values[t, g, :] = chunk[list(variables)].to_numpy(dtype=np.float32)
+        n_rows += len(chunk)
+    values.flush()
+    del values
+
+    np.save(os.path.join(cube_dir, HOURS_FILE), hour_index)
+    df_coords.to_csv(os.path.join(cube_dir, COORDS_FILE), index=False)
+    with open(os.path.join(cube_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "variables": list(variables),
+            "shape": [len(hour_index), len(gid_index), len(variables)],
+            "layout": ["hour", "gid", "variable"],
+            "dtype": "float32",
+            "source": os.path.basename(csv_file),
+            "rows": n_rows,
+        }, f, ensure_ascii=False, indent=2)
+    return open_weather_cube(cube_dir)
+
+
+if __name__ == '__main__':
+    cube = migrate_weather_csv("전체_기상_데이터.csv", "weather_cube")
+    n_hours, n_gids, n_vars = cube.values.shape
+    size_mb = cube.values.nbytes / 1024 ** 2
+    print(f"기상 큐브 생성 완료: 시각 {n_hours}개 × 격자 {n_gids}개 × 변수 {n_vars}개 ({size_mb:.1f}MB)")
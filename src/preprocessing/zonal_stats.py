@@ -0,0 +1,137 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+import shapely
+import rasterio
+from rasterio.features import rasterize
+from rasterio.windows import from_bounds, Window
+
+DEFAULT_STATS = ("max", "mean", "min", "count")
+
+# 같은 실행 안에서 같은 (격자, 변환) 조합은 디스크도 읽지 않도록 메모리에도 보관
+_label_cache = {}
+
+
+def label_cache_key(grid, out_shape, transform, all_touched=False):
+    """
+    (격자 도형, 래스터 크기, 변환 행렬, all_touched) 조합의 sha1 키. 격자나 래스터 정렬이 바뀌면 키도 바뀝니다.
+    """
+    h = hashlib.sha1()
+    for wkb in shapely.to_wkb(np.asarray(grid.geometry.values)):
+        h.update(wkb)
+    h.update(repr((tuple(out_shape), tuple(transform)[:6], bool(all_touched))).encode("utf-8"))
+    return h.hexdigest()
+
+
+def rasterize_labels(grid, out_shape, transform, all_touched=False):
+    """
+    격자 행 순서(0, 1, 2 ...)를 픽셀 값으로 갖는 라벨 래스터를 한 번에 만듭니다. 격자 밖은 -1.
+    픽셀 중심이 셀 안에 있으면 그 셀로 분류되어 geometry_mask / rasterstats 의 기본 규칙과 같습니다.
+    """
+    shapes = ((geom, i) for i, geom in enumerate(grid.geometry.values) if geom is not None and not geom.is_empty)
+    return rasterize(shapes, out_shape=out_shape, transform=transform, fill=-1,
+                     all_touched=all_touched, dtype="int32")
+
+
+def load_label_raster(grid, out_shape, transform, cache_dir="zonal_cache", all_touched=False):
+    """
+    라벨 래스터를 (격자, 변환) 별로 한 번만 만들고 cache_dir 에 .npy 로 저장해 재사용합니다.
+    cache_dir=None 이면 메모리 캐시만 사용합니다.
+    """
+    key = label_cache_key(grid, out_shape, transform, all_touched)
+    if key in _label_cache:
+        return _label_cache[key]
+    path = os.path.join(cache_dir, f"labels_{key}.npy") if cache_dir is not None else None
+    if path is not None and os.path.exists(path):
+        labels = np.load(path)
+    else:
+        labels = rasterize_labels(grid, out_shape, transform, all_touched)
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, labels)
+            os.replace(tmp_path, path)
+    _label_cache[key] = labels
+    return labels
+
+
+def zonal_stats_array(values, labels, n_zones, stats=DEFAULT_STATS, percentiles=(), nodata=None):
+    """
+    라벨 래스터와 같은 크기의 값 배열에서 셀별 통계를 한 번에 계산합니다.
+    NaN / nodata / 마스크된 픽셀은 제외하며, 픽셀이 없는 셀은 count 0, 나머지 통계는 NaN 입니다.
+    percentiles 는 np.percentile(linear) 과 같은 방식으로 보간합니다. (예: (50, 90) → p50, p90 컬럼)
+    """
+    values = np.ma.filled(np.ma.asarray(values, dtype=np.float64), np.nan).ravel()
+    labels = np.asarray(labels).ravel()
+    valid = (labels >= 0) & ~np.isnan(values)
+    if nodata is not None:
+        valid &= values != nodata
+    codes = labels[valid].astype(np.int64)
+    vals = values[valid]
+
+    count = np.bincount(codes, minlength=n_zones)
+    result = {}
+    if "count" in stats:
+        result["count"] = count
+    if "sum" in stats or "mean" in stats:
+        total = np.bincount(codes, weights=vals, minlength=n_zones)
+        if "sum" in stats:
+            result["sum"] = total
+        if "mean" in stats:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result["mean"] = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+    if {"min", "max", "median"} & set(stats) or percentiles:
+        # 셀 번호, 값 순으로 정렬하면 각 셀의 값이 연속 구간에 오름차순으로 놓임
+        order = np.lexsort((vals, codes))
+        sorted_vals = vals[order]
+        starts = np.concatenate([[0], np.cumsum(count)[:-1]])
+        has = count > 0
+
+        def quantile(q):
+            out = np.full(n_zones, np.nan)
+            pos = starts[has] + (count[has] - 1) * (q / 100.0)
+            lo = np.floor(pos).astype(np.int64)
+            hi = np.ceil(pos).astype(np.int64)
+            out[has] = sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (pos - lo)
+            return out
+
+        if "min" in stats:
+            result["min"] = quantile(0)
+        if "max" in stats:
+            result["max"] = quantile(100)
+        if "median" in stats:
+            result["median"] = quantile(50)
+        for q in percentiles:
+            result[f"p{q:g}"] = quantile(q)
+    return pd.DataFrame(result)
+
+
+def zonal_stats_raster(raster_path, grid, stats=DEFAULT_STATS, percentiles=(), band=1,
+                       cache_dir="zonal_cache", all_touched=False):
+    """
+    래스터 파일에서 격자 범위(window)만 한 번 읽어 모든 셀의 통계를 계산합니다. 결과 index 는 grid 와 같습니다.
+    격자 CRS 가 래스터와 다르면 래스터 CRS 로 변환해서 사용합니다.
+    격자가 래스터 범위와 전혀 겹치지 않으면 모든 통계가 NaN 인 표를 돌려줍니다.
+    """
+    with rasterio.open(raster_path) as src:
+        if grid.crs is not None and src.crs is not None and grid.crs != src.crs:
+            grid = grid.to_crs(src.crs)
+        # 격자 경계를 덮는 정수 픽셀 범위 (바깥쪽으로 내림/올림)
+        w = from_bounds(*grid.total_bounds, transform=src.transform)
+        col0, row0 = int(np.floor(w.col_off)), int(np.floor(w.row_off))
+        col1, row1 = int(np.ceil(w.col_off + w.width)), int(np.ceil(w.row_off + w.height))
+        if col1 <= 0 or row1 <= 0 or col0 >= src.width or row0 >= src.height:
+            # 읽을 픽셀이 없음 (Window.intersection 은 이 경우 WindowError)
+            columns = zonal_stats_array(np.empty(0), np.empty(0, dtype=np.int32), len(grid), stats, percentiles).columns
+            return pd.DataFrame(np.nan, index=grid.index, columns=columns)
+        window = Window(col0, row0, col1 - col0, row1 - row0).intersection(Window(0, 0, src.width, src.height))
+        values = src.read(band, window=window, masked=True)
+        transform = src.window_transform(window)
+        nodata = src.nodata
+
+    labels = load_label_raster(grid, values.shape, transform, cache_dir, all_touched)
+    df = zonal_stats_array(values, labels, len(grid), stats, percentiles, nodata)
+    df.index = grid.index
+    return df
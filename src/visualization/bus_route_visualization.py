@@ -1,10 +1,17 @@
+import sys
+import os
 import geopandas as gpd
 import matplotlib.pyplot as plt
 import contextily as ctx
-import osmnx as ox
 import koreanize_matplotlib
 import pandas as pd
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.road_network import load_road_edges
+from preprocessing.road_incidence import edges_in_cells
+from preprocessing.road_name_matcher import RoadNameMatcher
+
 # -------------------------------
 # 1. 도로명 리스트 추출
 # -------------------------------
@@ -14,12 +21,7 @@ safe_road_names = df_master["도로명"].dropna().unique().tolist()
 # -------------------------------
 # 2. 광진구 도로망 불러오기 (OSM 기반)
 # -------------------------------
-gdf = gpd.read_file("./shp/LARD_ADM_SECT_SGG_11_202502.shp", encoding="cp949")
-gwangjin = gdf[gdf['SGG_NM'] == '광진구'].copy().to_crs(epsg=4326)
-
-polygon = gwangjin.geometry.unary_union
-graph = ox.graph_from_polygon(polygon, network_type="drive")
-edges = ox.graph_to_gdfs(graph, nodes=False, edges=True).to_crs(epsg=3857)
+edges = load_road_edges()  # 광진구 차도망 (road_network 저장소, road_name 포함)
 
 # -------------------------------
 # 3. 격자 (보호구역) 불러오기
@@ -29,18 +31,11 @@ filtered_gdf = gpd.read_file("./shp/overlap_final.shp").to_crs(epsg=3857)
 # -------------------------------
 # 4. 도로명 처리 + 보호구역 내부 도로만 필터링
 # -------------------------------
-# 도로명 통합 (리스트 → 문자열)
-edges["road_name"] = edges["name"].apply(
-    lambda x: ", ".join(x) if isinstance(x, list) else x
-)
-
 # 보호구역 격자 내 도로만 추출
-edges_in_highlighted = gpd.overlay(edges, filtered_gdf, how="intersection")
+edges_in_highlighted = edges_in_cells(filtered_gdf)
 
 # 도로명 조건 일치하는 것만 추출
-safe_edges = edges_in_highlighted[edges_in_highlighted["road_name"].apply(
-    lambda name: any(rd in name for rd in safe_road_names) if isinstance(name, str) else False
-)]
+safe_edges = RoadNameMatcher(safe_road_names).filter(edges_in_highlighted)
 
 # -------------------------------
 # 5. 시각화
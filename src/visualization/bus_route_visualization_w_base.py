@@ -1,11 +1,17 @@
+import sys
+import os
 import geopandas as gpd
 import matplotlib.pyplot as plt
 import contextily as ctx
 import fiona
 import pandas as pd
-import osmnx as ox
 import koreanize_matplotlib
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.road_incidence import edges_in_cells
+from preprocessing.road_name_matcher import RoadNameMatcher
+
 # -------------------------------
 # 1. Base Layer 관련 파일 불러오기
 # -------------------------------
@@ -27,21 +33,13 @@ gdf_layers = {
 df_master = pd.read_csv("./data/광진구_도로명_주소마스터.csv", encoding="utf-8-sig")
 safe_road_names = df_master["도로명"].dropna().unique().tolist()
 
-gdf = gpd.read_file("./shp/LARD_ADM_SECT_SGG_11_202502.shp", encoding='cp949')
-gwangjin = gdf[gdf['SGG_NM'] == '광진구'].copy().to_crs(epsg=4326)
-polygon = gwangjin.geometry.unary_union
-graph = ox.graph_from_polygon(polygon, network_type="drive")
-edges = ox.graph_to_gdfs(graph, nodes=False, edges=True).to_crs(epsg=3857)
 
 # -------------------------------
 # 3. 격자 및 도로 필터링
 # -------------------------------
 filtered_gdf = gpd.read_file("./shp/overlap_final.shp").to_crs(epsg=3857)
-edges["road_name"] = edges["name"].apply(lambda x: ", ".join(x) if isinstance(x, list) else x)
-edges_in_highlighted = gpd.overlay(edges, filtered_gdf, how="intersection")
-safe_edges = edges_in_highlighted[edges_in_highlighted["road_name"].apply(
-    lambda name: any(rd in name for rd in safe_road_names) if isinstance(name, str) else False
-)]
+edges_in_highlighted = edges_in_cells(filtered_gdf)
+safe_edges = RoadNameMatcher(safe_road_names).filter(edges_in_highlighted)
 
 # -------------------------------
 # 4. 시각화 (Base Layer + 버스노선 도로만)
@@ -1,9 +1,15 @@
+import sys
+import os
 import geopandas as gpd
 import pandas as pd
 import koreanize_matplotlib
 import matplotlib.pyplot as plt
 import contextily as ctx
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.weather_cube import load_gid_coords
+
 
 def extract_unique_gid_coords(df_weather: pd.DataFrame) -> gpd.GeoDataFrame:
     df_coords = df_weather[['gid', 'lon', 'lat']].drop_duplicates(subset='gid')
@@ -69,7 +75,8 @@ def visualize_result(gdf: gpd.GeoDataFrame, enriched_centroids: gpd.GeoDataFrame
 
 
 def freezing_visualization_pipeline(weather_csv: str, freezing_csv: str, shapefile: str, top_percent: float = 0.5):
-    df_weather = pd.read_csv(weather_csv)
+    # weather_csv 에는 전체 기상 CSV 또는 weather_cube 디렉터리를 줄 수 있으며, 어느 쪽이든 gid 좌표만 읽음
+    df_weather = load_gid_coords(weather_csv)
     df_freezing = pd.read_csv(freezing_csv)
     gdf = gpd.read_file(shapefile)
 
@@ -1,40 +1,33 @@
+import sys
 import geopandas as gpd
 import pandas as pd
-import osmnx as ox
 import fiona
 import matplotlib.pyplot as plt
 import koreanize_matplotlib
 import os
 import matplotlib.cm as cm
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.road_incidence import edges_in_cells
+from preprocessing.road_name_matcher import RoadNameMatcher
+
+# 도로열선 도로명 매처 (도로명 목록이 고정이므로 모듈 로드 시 한 번만 만듦)
+df_heat = pd.read_csv("./data/서울특별시 광진구 도로열선.csv", encoding="euc-kr")
+heat_matcher = RoadNameMatcher(df_heat["도로명"].dropna().unique().tolist())
+
 # -------------------------------
 # [1] 데이터 준비 함수
 # -------------------------------
 def load_filtered_edges(target_road_name: str) -> gpd.GeoDataFrame:
-    # 도로열선 도로명
-    df_heat = pd.read_csv("./data/서울특별시 광진구 도로열선.csv", encoding="euc-kr")
-    heat_road_names = df_heat["도로명"].dropna().unique().tolist()
-
-    # 광진구 행정경계
-    gdf = gpd.read_file("./shp/LARD_ADM_SECT_SGG_11_202502.shp", encoding="cp949")
-    gwangjin = gdf[gdf['SGG_NM'] == '광진구'].copy().to_crs(epsg=4326)
-    polygon = gwangjin.geometry.unary_union
-
-    # 도로망
-    graph = ox.graph_from_polygon(polygon, network_type="drive")
-    edges = ox.graph_to_gdfs(graph, nodes=False, edges=True).to_crs(epsg=3857)
-    edges["road_name"] = edges["name"].apply(lambda x: ", ".join(x) if isinstance(x, list) else x)
-
     # 보호구역 격자
     filtered_gdf = gpd.read_file("./shp/overlap_final.shp").to_crs(epsg=3857)
-    edges_in_highlighted = gpd.overlay(edges, filtered_gdf, how="intersection")
+    edges_in_highlighted = edges_in_cells(filtered_gdf)
 
     # 열선 도로 중 해당 도로명만 필터링
-    safe_edges = edges_in_highlighted[edges_in_highlighted["road_name"].apply(
-        lambda name: any(rd in name for rd in heat_road_names) if isinstance(name, str) else False
-    )]
+    safe_edges = heat_matcher.filter(edges_in_highlighted)
 
-    return safe_edges[safe_edges["road_name"].str.contains(target_road_name, na=False)].copy()
+    return RoadNameMatcher([target_road_name]).filter(safe_edges).copy()
 
 # -------------------------------
 # [2] 시각화 함수 (선택 구간만)
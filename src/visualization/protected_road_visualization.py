@@ -1,25 +1,21 @@
+import sys
+import os
 import geopandas as gpd
 import matplotlib.pyplot as plt
 import contextily as ctx
-import osmnx as ox
 from shapely.geometry import Point
 import koreanize_matplotlib
 
-# 1. SHP 파일 불러오기 (압축 해제된 경로 기준)
-gdf = gpd.read_file("./shp/LARD_ADM_SECT_SGG_11_202502.shp", encoding='cp949')
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-# 2. 광진구만 필터링 (컬럼명: 'SIG_KOR_NM' 기준)
-gwangjin = gdf[gdf['SGG_NM'] == '광진구'].copy()
-
-gwangjin = gwangjin.to_crs(epsg=4326)
+from preprocessing.road_network import load_road_edges
+from preprocessing.road_incidence import edges_in_cells
+from preprocessing.road_name_matcher import RoadNameMatcher
 
 # -------------------------------
-# 2. 광진구 polygon 기반 도로망 가져오기
+# 1. 광진구 도로망 (road_network 저장소)
 # -------------------------------
-polygon = gwangjin.geometry.unary_union
-graph = ox.graph_from_polygon(polygon, network_type="drive")
-edges = ox.graph_to_gdfs(graph, nodes=False, edges=True).to_crs(epsg=3857)
-gwangjin = gwangjin.to_crs(epsg=3857)
+edges = load_road_edges()  # 광진구 차도망 (road_network 저장소, road_name 포함)
 
 # -------------------------------
 # 3. 주소 기반 좌표 입력 → GeoDataFrame
@@ -83,20 +79,13 @@ safe_road_names = [
     "워커힐로"
 ]
 
-# name 컬럼 문자열화
-edges["road_name"] = edges["name"].apply(
-    lambda x: ", ".join(x) if isinstance(x, list) else x
-)
-
 # -------------------------------
 # 6. 보호구역 격자 내 도로 필터링
 # -------------------------------
-edges_in_highlighted = gpd.overlay(edges, highlighted_gdf, how="intersection")
+edges_in_highlighted = edges_in_cells(highlighted_gdf)
 
 # 도로명 조건 적용
-safe_edges = edges_in_highlighted[edges_in_highlighted["road_name"].apply(
-    lambda name: any(rd in name for rd in safe_road_names) if isinstance(name, str) else False
-)]
+safe_edges = RoadNameMatcher(safe_road_names).filter(edges_in_highlighted)
 
 # -------------------------------
 # 7. 시각화
@@ -1,12 +1,18 @@
+import sys
+import os
 import geopandas as gpd
 import matplotlib.pyplot as plt
 import pandas as pd
 import fiona
-import osmnx as ox
 from shapely.geometry import Point
 import contextily as ctx
 import koreanize_matplotlib
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.road_incidence import edges_in_cells
+from preprocessing.road_name_matcher import RoadNameMatcher
+
 # -------------------------------
 # 1. Base Layer 관련 파일 불러오기
 # -------------------------------
@@ -33,12 +39,6 @@ gdf_layers = {
 # -------------------------------
 # 2. 보호구역 내 도로 (safe_edges) 생성
 # -------------------------------
-gdf = gpd.read_file("./shp/LARD_ADM_SECT_SGG_11_202502.shp", encoding='cp949')
-gwangjin = gdf[gdf['SGG_NM'] == '광진구'].copy().to_crs(epsg=4326)
-polygon = gwangjin.geometry.unary_union
-graph = ox.graph_from_polygon(polygon, network_type="drive")
-edges = ox.graph_to_gdfs(graph, nodes=False, edges=True).to_crs(epsg=3857)
-
 points = [
     (127.091743, 37.557558),
     (127.100496, 37.541105),
@@ -76,11 +76,8 @@ safe_road_names = [
     "능동로4길", "자양로50길", "워커힐로"
 ]
 
-edges["road_name"] = edges["name"].apply(lambda x: ", ".join(x) if isinstance(x, list) else x)
-edges_in_highlighted = gpd.overlay(edges, highlighted_gdf, how="intersection")
-safe_edges = edges_in_highlighted[edges_in_highlighted["road_name"].apply(
-    lambda name: any(rd in name for rd in safe_road_names) if isinstance(name, str) else False
-)]
+edges_in_highlighted = edges_in_cells(highlighted_gdf)
+safe_edges = RoadNameMatcher(safe_road_names).filter(edges_in_highlighted)
 
 # -------------------------------
 # 3. 시각화 (Base Layer + Safe Roads)
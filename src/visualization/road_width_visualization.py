@@ -1,10 +1,17 @@
+import sys
+import os
 import geopandas as gpd
 import matplotlib.pyplot as plt
 import contextily as ctx
-import osmnx as ox
 import koreanize_matplotlib
 import pandas as pd
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.road_network import load_road_edges
+from preprocessing.road_incidence import edges_in_cells
+from preprocessing.road_name_matcher import RoadNameMatcher
+
 # -------------------------------
 # 1. 도로명 리스트 추출 (from sorted_roads.csv)
 # -------------------------------
@@ -14,12 +21,7 @@ safe_road_names = df_sorted_roads["도로명"].dropna().unique().tolist()
 # -------------------------------
 # 2. 광진구 도로망 생성
 # -------------------------------
-gdf = gpd.read_file("./shp/LARD_ADM_SECT_SGG_11_202502.shp", encoding="cp949")
-gwangjin = gdf[gdf['SGG_NM'] == '광진구'].copy().to_crs(epsg=4326)
-
-polygon = gwangjin.geometry.unary_union
-graph = ox.graph_from_polygon(polygon, network_type="drive")
-edges = ox.graph_to_gdfs(graph, nodes=False, edges=True).to_crs(epsg=3857)
+edges = load_road_edges()  # 광진구 차도망 (road_network 저장소, road_name 포함)
 
 # -------------------------------
 # 3. 보호구역 격자 불러오기
@@ -29,15 +31,9 @@ filtered_gdf = gpd.read_file("./shp/overlap_final.shp").to_crs(epsg=3857)
 # -------------------------------
 # 4. 도로명 처리 + 조건 필터링
 # -------------------------------
-edges["road_name"] = edges["name"].apply(
-    lambda x: ", ".join(x) if isinstance(x, list) else x
-)
-
-edges_in_highlighted = gpd.overlay(edges, filtered_gdf, how="intersection")
+edges_in_highlighted = edges_in_cells(filtered_gdf)
 
-safe_edges = edges_in_highlighted[edges_in_highlighted["road_name"].apply(
-    lambda name: any(rd in name for rd in safe_road_names) if isinstance(name, str) else False
-)]
+safe_edges = RoadNameMatcher(safe_road_names).filter(edges_in_highlighted)
 
 # -------------------------------
 # 5. 시각화
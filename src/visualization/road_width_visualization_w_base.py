@@ -1,10 +1,16 @@
+import sys
+import os
 import geopandas as gpd
 import matplotlib.pyplot as plt
 import pandas as pd
-import osmnx as ox
 import fiona
 import koreanize_matplotlib
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.road_incidence import edges_in_cells
+from preprocessing.road_name_matcher import RoadNameMatcher
+
 # -------------------------------
 # 1. 도로명 리스트 추출
 # -------------------------------
@@ -12,31 +18,19 @@ df_sorted_roads = pd.read_csv("./data/sorted_roads.csv", encoding="euc-kr")
 safe_road_names = df_sorted_roads["도로명"].dropna().unique().tolist()
 
 # -------------------------------
-# 2. 광진구 도로망 생성
-# -------------------------------
-gdf = gpd.read_file("./shp/LARD_ADM_SECT_SGG_11_202502.shp", encoding="cp949")
-gwangjin = gdf[gdf['SGG_NM'] == '광진구'].copy().to_crs(epsg=4326)
-polygon = gwangjin.geometry.unary_union
-graph = ox.graph_from_polygon(polygon, network_type="drive")
-edges = ox.graph_to_gdfs(graph, nodes=False, edges=True).to_crs(epsg=3857)
-
-# -------------------------------
-# 3. 보호구역 격자 불러오기
+# 2. 보호구역 격자 불러오기
 # -------------------------------
 filtered_gdf = gpd.read_file("./shp/overlap_final.shp").to_crs(epsg=3857)
 
 # -------------------------------
-# 4. 도로명 처리 + 조건 필터링
+# 3. 도로명 처리 + 조건 필터링
 # -------------------------------
-edges["road_name"] = edges["name"].apply(lambda x: ", ".join(x) if isinstance(x, list) else x)
-edges_in_highlighted = gpd.overlay(edges, filtered_gdf, how="intersection")
+edges_in_highlighted = edges_in_cells(filtered_gdf)
 
-safe_edges = edges_in_highlighted[edges_in_highlighted["road_name"].apply(
-    lambda name: any(rd in name for rd in safe_road_names) if isinstance(name, str) else False
-)]
+safe_edges = RoadNameMatcher(safe_road_names).filter(edges_in_highlighted)
 
 # -------------------------------
-# 5. Base Layer 구성 요소 불러오기
+# 4. Base Layer 구성 요소 불러오기
 # -------------------------------
 shp_boundary = "./shp/overlap/TN_SIGNGU_BNDRY.shp"
 shp_road = "./shp/overlap/N3A_A0010000.shp"
@@ -51,7 +45,7 @@ gdf_layers = {
 }
 
 # -------------------------------
-# 6. 시각화 (Base Layer + 조건 도로만)
+# 5. 시각화 (Base Layer + 조건 도로만)
 # -------------------------------
 fig, ax = plt.subplots(figsize=(12, 12))
 
@@ -69,7 +63,7 @@ for gdf in gdf_layers.values():
 safe_edges.plot(ax=ax, color="#BC4749", linewidth=2.5, alpha=0.95, label="도로 폭 필터링된 도로")
 
 # -------------------------------
-# 7. safe_edges 저장 (road_name + geometry만)
+# 6. safe_edges 저장 (road_name + geometry만)
 # -------------------------------
 output_path = "./output/road_width.csv"
 
@@ -1,60 +1,65 @@
-import pandas as pd
+import sys
+import os
+import numpy as np
 import geopandas as gpd
 import matplotlib.pyplot as plt
 import contextily as ctx
 import koreanize_matplotlib
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-def get_filtered_a60(opt_csv_path, pop_shp_path):
-    df_opt = pd.read_csv(opt_csv_path)
-    df_opt.columns = df_opt.columns.str.lower()
-    opt_gids = df_opt['gid_500'].astype(str).unique()
-
-    gdf_pop = gpd.read_file(pop_shp_path)
-    gdf_pop.columns = gdf_pop.columns.str.lower()
-    gdf_pop['gid_500'] = gdf_pop['gid_500'].astype(str)
-
-    gdf_filtered = gdf_pop[gdf_pop['gid_500'].isin(opt_gids)].copy()
+from preprocessing.criteria_stack import (
+    build_criteria_stack,
+    layer_rank,
+    select_overlap_final,
+    layer_intersection,
+    overlap_final_frame,
+)
 
-    if gdf_filtered.crs is None:
-        gdf_filtered.set_crs(epsg=5181, inplace=True)
-    return gdf_filtered.to_crs(epsg=3857)
 
+def read_layer(path):
+    gdf = gpd.read_file(path)
+    if gdf.crs is None:
+        gdf.set_crs(epsg=5181, inplace=True)
+    return gdf
 
-def get_filtered_slope_in_freeze(slope_path, freeze_path):
-    gdf_slope = gpd.read_file(slope_path)
-    gdf_freeze = gpd.read_file(freeze_path)
 
-    if gdf_slope.crs is None:
-        gdf_slope.set_crs(epsg=5181, inplace=True)
-    if gdf_freeze.crs is None:
-        gdf_freeze.set_crs(epsg=5181, inplace=True)
+def build_stack(grid_path, opt_csv_path, pop_shp_path, slope_csv_path, slope_path, freeze_path, stack_path=None):
+    """
+    100m 격자에 맞춘 기준 band 를 한 번 만들어 둡니다.
+    A60 / 경사도 선정은 추출 레이어의 행 순서(순위)로, 결빙은 선정된 gid_500 으로 band 에 기록합니다.
+    """
+    stack = build_criteria_stack(grid_path, slope_csv_path=slope_csv_path, opt_csv_path=opt_csv_path)
+    layers = {"pop": read_layer(pop_shp_path), "slope": read_layer(slope_path)}
+    stack.add_band("pop_rank", layer_rank(stack, layers["pop"]))
+    stack.add_band("slope_rank", layer_rank(stack, layers["slope"]))
+    freeze_500 = read_layer(freeze_path)["gid_500"].to_numpy()
+    stack.add_band("freeze_selected", np.isin(stack.gid_500, freeze_500))
+    if stack_path is not None:
+        stack.save(stack_path)
+    return stack, layers
 
-    gdf_slope = gdf_slope.to_crs(epsg=3857)
-    gdf_freeze = gdf_freeze.to_crs(epsg=3857)
 
-    # slope 격자가 freeze 안에 포함된 것만
-    gdf_selected = gpd.sjoin(gdf_slope, gdf_freeze, predicate='within', how='inner')
-    gdf_result = gdf_slope[gdf_slope.index.isin(gdf_selected.index)].copy()
-    return gdf_result
+def select_intersection(stack, layers):
+    # (A60 상위 & 접근성 500m) & (경사도 상위 & 결빙 500m) 를 배열 연산으로 고른 뒤, 선정 셀만 폴리곤 생성
+    rows = select_overlap_final(stack)
+    geometry = layer_intersection(layers["pop"], stack["pop_rank"], layers["slope"], stack["slope_rank"], rows)
+    return overlap_final_frame(stack, rows, geometry)
 
 
-def save_and_visualize_intersection(gdf_a, gdf_b, full_shp_path, output_path,
+def save_and_visualize_intersection(gdf_intersection, full_shp_path, output_path,
                                     title="전체 필터링된 지역"):
-    # 1. 교차 영역 추출
-    gdf_intersection = gpd.overlay(gdf_a, gdf_b, how='intersection')
-
-    # 2. 저장
+    # 1. 저장 (교차 영역은 select_intersection 결과)
     gdf_intersection.to_file(output_path)
     print(f"✅ 교차 영역 저장 완료: {output_path}")
 
-    # 3. 전체 도형 불러오기 (정확하게 전체 100m 격자)
+    # 2. 전체 도형 불러오기 (정확하게 전체 100m 격자)
     gdf_all = gpd.read_file(full_shp_path)
     if gdf_all.crs is None:
         gdf_all.set_crs(epsg=5181, inplace=True)
     gdf_all = gdf_all.to_crs(epsg=3857)
 
-    # 4. 시각화
+    # 3. 시각화
     fig, ax = plt.subplots(figsize=(12, 12))
 
     # 전체 배경: 흐릿한 회색
@@ -72,24 +77,26 @@ def save_and_visualize_intersection(gdf_a, gdf_b, full_shp_path, output_path,
     plt.show()
 
 # 입력 파일 경로
+grid_path = "./shp/100m_500m.shp"
 opt_csv_path = "./data/opt.csv"
 pop_shp_path = "./extract_shp/filtered_pop.shp"
+slope_csv_path = "./data/slope_stats_by_cell.csv"
 slope_path = "./extract_shp/filtered_slope.shp"
 freeze_path = "./extract_shp/filtered_freeze.shp"
+stack_path = "./extract_shp/criteria_stack.npz"
 output_path = "./extract_shp/overlap_final.shp"
 
-# 1. A60 격자 불러오기
-gdf_a = get_filtered_a60(opt_csv_path, pop_shp_path)
+# 1. 기준 band 생성 (A60, 접근성, 경사도, 결빙, 보호구역)
+stack, layers = build_stack(grid_path, opt_csv_path, pop_shp_path, slope_csv_path, slope_path, freeze_path,
+                            stack_path)
 
-# 2. 경사도 격자 불러오기
-gdf_b = get_filtered_slope_in_freeze(slope_path, freeze_path)
+# 2. A60 ∩ 경사도(결빙 지역 안) 선정
+gdf_intersection = select_intersection(stack, layers)
 
 # 3. 교차 결과 시각화
 save_and_visualize_intersection(
-    gdf_a=gdf_a,
-    gdf_b=gdf_b,
-    full_shp_path="./shp/100m_500m.shp",  # 전체 100m 대상 배경
+    gdf_intersection=gdf_intersection,
+    full_shp_path=grid_path,  # 전체 100m 대상 배경
     output_path=output_path,
     title="전체 필터링된 지역"
 )
-
@@ -1,11 +1,16 @@
+import sys
+import os
 import geopandas as gpd
 import pandas as pd
 import matplotlib.pyplot as plt
 import contextily as ctx
 
-# --- 1. 전체 기상 데이터에서 gid와 좌표 추출 ---
-df_weather = pd.read_csv("전체_기상_데이터.csv")
-df_coords = df_weather[['gid', 'lon', 'lat']].drop_duplicates(subset='gid')
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from preprocessing.weather_cube import load_gid_coords
+
+# --- 1. gid와 좌표 추출 (기상 큐브가 있으면 좌표 파일만, 없으면 전체 기상 CSV 의 세 컬럼만 읽음) ---
+df_coords = load_gid_coords("weather_cube" if os.path.isdir("weather_cube") else "전체_기상_데이터.csv")
 gdf_coords = gpd.GeoDataFrame(
     df_coords, 
     geometry=gpd.points_from_xy(df_coords.lon, df_coords.lat),